@@ -1,7 +1,7 @@
 import OpenAI from "openai";
 import { z } from "zod";
 import { zodTextFormat } from "openai/helpers/zod";
-import { spawn } from "child_process";
+import { spawn, ChildProcessWithoutNullStreams } from "child_process";
 import path from "path";
 
 const openAiApiKey =
@@ -122,84 +122,194 @@ type PythonResult = {
   segments_with_speaker?: SpeakerSegment[];
 };
 
+type WorkerResponse = {
+  id?: string;
+  ready?: boolean;
+  result?: PythonResult;
+  error?: string;
+};
+
+type PendingRequest = {
+  resolve: (result: PythonResult) => void;
+  reject: (err: Error) => void;
+};
+
+// A request the worker has not answered after this long is rejected
+// (the worker keeps running; a late answer is logged and dropped).
+const STT_REQUEST_TIMEOUT_MS = Number(
+  process.env.STT_REQUEST_TIMEOUT_MS ?? 30 * 60 * 1000,
+);
+
+let sttWorker: ChildProcessWithoutNullStreams | null = null;
+let nextRequestId = 0;
+const pendingRequests = new Map<string, PendingRequest>();
+
 /**
- * Run the Python stt_with_diarization_new.py script in the project root
+ * Start (once) the Python stt_with_diarization_new.py script in worker mode
  * using the virtualenv: .venv/bin/python3
+ *
+ * The worker loads Whisper and pyannote a single time and then answers
+ * one JSON request per line, so every call after the first one only pays
+ * for inference. If the worker dies, all pending calls are rejected and
+ * the next call starts a fresh worker.
  */
-const runPythonStt = (audioPath: string): Promise<PythonResult> => {
+const getSttWorker = (): ChildProcessWithoutNullStreams => {
+  if (sttWorker) {
+    return sttWorker;
+  }
+
   // Resolve project root: /.../CGI-ApoBank-Checker
   const projectRoot = path.resolve(__dirname, "..", "..");
   const pythonBin = path.join(projectRoot, ".venv", "bin", "python3");
-  const scriptPath = path.join(projectRoot, "transcription", "stt_with_diarization_new.py");
-
-  // Make sure Python gets an absolute path to the audio file
-  const audioAbsPath = path.isAbsolute(audioPath)
-    ? audioPath
-    : path.resolve(audioPath);
+  const scriptPath = path.join(
+    projectRoot,
+    "transcription",
+    "stt_with_diarization_new.py",
+  );
 
-  console.log("runPythonStt:", {
+  console.log("Starting Python STT worker:", {
     projectRoot,
     pythonBin,
     scriptPath,
-    audioAbsPath,
   });
 
-  return new Promise((resolve, reject) => {
-    const child = spawn(pythonBin, [scriptPath, audioAbsPath], {
-      cwd: projectRoot,
-      env: {
-        ...process.env,
-        ORT_LOG_SEVERITY_LEVEL: "3", // silence ONNX warnings
-      },
-    });
-
-    let stdout = "";
-    let stderr = "";
+  const child = spawn(pythonBin, [scriptPath, "--serve"], {
+    cwd: projectRoot,
+    env: {
+      ...process.env,
+      ORT_LOG_SEVERITY_LEVEL: "3", // silence ONNX warnings
+    },
+  });
 
-    child.stdout.on("data", (data) => {
-      stdout += data.toString("utf8");
-    });
+  let stdoutBuffer = "";
+  let stderr = "";
 
-    child.stderr.on("data", (data) => {
-      stderr += data.toString("utf8");
-    });
+  child.stdout.on("data", (data) => {
+    stdoutBuffer += data.toString("utf8");
 
-    child.on("error", (err) => {
-      console.error("Failed to start Python process:", err);
-      reject(err);
-    });
+    let newline = stdoutBuffer.indexOf("\n");
+    while (newline !== -1) {
+      const line = stdoutBuffer.slice(0, newline).trim();
+      stdoutBuffer = stdoutBuffer.slice(newline + 1);
+      newline = stdoutBuffer.indexOf("\n");
 
-    child.on("close", (code) => {
-      if (code !== 0) {
-        console.error("Python exited with code:", code);
-        console.error("Python stderr:\n", stderr);
-        return reject(
-          new Error(
-            `Python exited with code ${code}\n\nstderr:\n${stderr}`,
-          ),
-        );
+      if (!line) {
+        continue;
       }
+
+      let response: WorkerResponse;
       try {
-        const parsed = JSON.parse(stdout) as PythonResult;
-        resolve(parsed);
+        response = JSON.parse(line) as WorkerResponse;
       } catch (err) {
         console.error(
-          "Failed to parse Python JSON output:",
+          "Failed to parse Python worker output:",
           err,
-          "\nstdout:\n",
-          stdout,
-          "\nstderr:\n",
-          stderr,
+          "\nline:\n",
+          line,
         );
+        continue;
+      }
+
+      if (response.ready) {
+        console.log("Python STT worker ready");
+        continue;
+      }
+
+      const pending = response.id ? pendingRequests.get(response.id) : null;
+      if (!pending || !response.id) {
+        console.error("Python worker answered unknown request:", line);
+        continue;
+      }
+      pendingRequests.delete(response.id);
+
+      if (response.error !== undefined) {
+        pending.reject(new Error(`Python STT failed: ${response.error}`));
+      } else {
+        pending.resolve(response.result ?? {});
+      }
+    }
+  });
+
+  child.stderr.on("data", (data) => {
+    // keep only the tail so a long-lived worker does not grow unbounded
+    stderr = (stderr + data.toString("utf8")).slice(-10000);
+  });
+
+  const failAll = (err: Error) => {
+    if (sttWorker === child) {
+      sttWorker = null;
+    }
+    for (const pending of pendingRequests.values()) {
+      pending.reject(err);
+    }
+    pendingRequests.clear();
+  };
+
+  child.on("error", (err) => {
+    console.error("Failed to start Python process:", err);
+    failAll(err);
+  });
+
+  // EPIPE when the worker died with a write in flight; without a listener
+  // this would be an unhandled 'error' event and crash the backend
+  child.stdin.on("error", (err) => {
+    console.error("Python worker stdin failed:", err);
+    failAll(err);
+    child.kill();
+  });
+
+  child.on("close", (code) => {
+    console.error("Python worker exited with code:", code);
+    console.error("Python stderr:\n", stderr);
+    failAll(
+      new Error(
+        `Python exited with code ${String(code)}\n\nstderr:\n${stderr}`,
+      ),
+    );
+  });
+
+  sttWorker = child;
+  return child;
+};
+
+/**
+ * Send one audio file to the persistent Python STT worker.
+ */
+const runPythonStt = (audioPath: string): Promise<PythonResult> => {
+  // Make sure Python gets an absolute path to the audio file
+  const audioAbsPath = path.isAbsolute(audioPath)
+    ? audioPath
+    : path.resolve(audioPath);
+
+  const worker = getSttWorker();
+  const id = String(nextRequestId++);
+
+  console.log("runPythonStt:", { id, audioAbsPath });
+
+  return new Promise((resolve, reject) => {
+    const timer = setTimeout(() => {
+      if (pendingRequests.delete(id)) {
         reject(
           new Error(
-            `Failed to parse Python JSON output: ${
-              (err as Error).message
-            }\n\nstdout:\n${stdout}\n\nstderr:\n${stderr}`,
+            `Python STT timed out after ${STT_REQUEST_TIMEOUT_MS} ms (request ${id})`,
           ),
         );
       }
+    }, STT_REQUEST_TIMEOUT_MS);
+
+    pendingRequests.set(id, {
+      resolve: (result) => {
+        clearTimeout(timer);
+        resolve(result);
+      },
+      reject: (err) => {
+        clearTimeout(timer);
+        reject(err);
+      },
     });
+    worker.stdin.write(
+      JSON.stringify({ id, audio_path: audioAbsPath, language: "de" }) + "\n",
+    );
   });
 };
 
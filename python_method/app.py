@@ -1,36 +1,169 @@
-import tempfile
+import os
+import time
+import asyncio
+import logging
+import hashlib
 import json
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Callable, Iterator, Optional
 
-from fastapi import FastAPI, UploadFile, File, HTTPException
+from fastapi import FastAPI, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 
-from openai import OpenAI
+from openai import AsyncOpenAI
 
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse, StreamingResponse
+from fastapi.encoders import jsonable_encoder
 from fastapi.middleware.cors import CORSMiddleware
 
+from disk_cache import DiskCache, hash_file, make_key
+from jobs import Job, JobStore
+from rate_limit import RateLimiter
+from keyword_classifier import KeywordClassifier, clear_winner
+from relevance import ContextReport, RelevanceWindows
+from checklist_store import ChecklistStore, CompiledChecklists
+from stt_backends import LocalWhisperBackend, OpenAIWhisperBackend
+from uploads import UploadRejected, receive_file
+from metrics import DURATION_BUCKETS, SIZE_BUCKETS, TOKEN_BUCKETS, Registry, server_timing
+
+
+logger = logging.getLogger(__name__)
+
 
 # ---------- config----------
 
 OPENAI_MODEL_TRANSCRIBE = "whisper-1"      
 OPENAI_MODEL_CHAT = "gpt-4.1-mini"         
 
-client = OpenAI()
+client = AsyncOpenAI()
+
+# Speech-to-text:
+#   "openai" -> upload to OPENAI_MODEL_TRANSCRIBE
+#   "local"  -> faster-whisper in STT_LOCAL_WORKERS processes with preloaded
+#               models (default: one per STT_LOCAL_THREADS cores)
+STT_BACKEND = os.getenv("STT_BACKEND", "openai")
+
+if STT_BACKEND == "local":
+    stt_backend = LocalWhisperBackend(
+        model_size=os.getenv("WHISPER_MODEL_SIZE", "medium"),
+        device=os.getenv("WHISPER_DEVICE", "cpu"),
+        compute_type=os.getenv("WHISPER_COMPUTE_TYPE", "int8"),
+        workers=int(os.getenv("STT_LOCAL_WORKERS", "0")) or None,
+        cpu_threads=int(os.getenv("STT_LOCAL_THREADS", "4")),
+        beam_size=int(os.getenv("WHISPER_BEAM_SIZE", "5")),
+    )
+elif STT_BACKEND == "openai":
+    stt_backend = OpenAIWhisperBackend(client, model=OPENAI_MODEL_TRANSCRIBE)
+else:
+    raise RuntimeError(f"Unknown STT_BACKEND: {STT_BACKEND}")
+
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(250 * 1024 ** 2)))
+# multipart boundaries and headers on top of the file itself
+_MULTIPART_SLACK_BYTES = 64 * 1024
+
+# Checklist evaluation:
+#   "single"   -> one prompt with the whole checklist (cheap)
+#   "per_item" -> every item judged on its own CHECKLIST_VOTES times and
+#                 decided by majority vote (more accurate, more calls)
+CHECKLIST_EVAL_MODE = os.getenv("CHECKLIST_EVAL_MODE", "single")
+CHECKLIST_VOTES = int(os.getenv("CHECKLIST_VOTES", "3"))
+CHECKLIST_VOTE_TEMPERATURE = float(os.getenv("CHECKLIST_VOTE_TEMPERATURE", "0.5"))
+
+# Shared by all requests: caps in-flight chat completions and their start rate
+llm_limiter = RateLimiter(
+    max_concurrency=int(os.getenv("LLM_MAX_CONCURRENCY", "16")),
+    per_second=float(os.getenv("LLM_REQUESTS_PER_SECOND", "0")),
+)
+
+ITEM_STATUSES = ("vorhanden", "fehlt", "unklar")
+
+# Relevance windowing: instead of the full transcript, checklist prompts get
+# only the RELEVANCE_TOP_K transcript windows that best match the item text
+# (BM25). Items without a window scoring RELEVANCE_MIN_SCORE see everything.
+RELEVANCE_WINDOWING = os.getenv("RELEVANCE_WINDOWING", "0") == "1"
+RELEVANCE_TOP_K = int(os.getenv("RELEVANCE_TOP_K", "3"))
+RELEVANCE_MIN_SCORE = float(os.getenv("RELEVANCE_MIN_SCORE", "2.0"))
+RELEVANCE_WINDOW_SENTENCES = int(os.getenv("RELEVANCE_WINDOW_SENTENCES", "4"))
+
+# How many uploads are processed at the same time; further requests wait
+# (without blocking the event loop) until a slot is free.
+MAX_CONCURRENT_ANALYSES = int(os.getenv("MAX_CONCURRENT_ANALYSES", "8"))
+analysis_slots = asyncio.Semaphore(MAX_CONCURRENT_ANALYSES)
 
 BASE_DIR = Path(__file__).resolve().parent
 CHECKLIST_PATH = BASE_DIR / "checklists.json"
+CHECKLIST_EXCEL_PATH = BASE_DIR / "checklisten_sprachaufzeichnungen.xlsx"
+# how often the JSON/Excel sources are checked for changes (0 = never)
+CHECKLIST_RELOAD_SECONDS = float(os.getenv("CHECKLIST_RELOAD_SECONDS", "10"))
 
-if not CHECKLIST_PATH.exists():
-    raise RuntimeError(f"checklists.json nicht gefunden unter {CHECKLIST_PATH}")
+CHECKLIST_STORE = ChecklistStore(
+    CHECKLIST_PATH,
+    excel_path=CHECKLIST_EXCEL_PATH if os.getenv("CHECKLIST_WATCH_EXCEL", "1") == "1" else None,
+)
 
-with CHECKLIST_PATH.open(encoding="utf-8") as f:
-    CHECKLISTS: Dict[str, List[Dict[str, Any]]] = json.load(f)
+# Conversation type detection:
+#   "llm"            -> always ask the chat model
+#   "keywords_first" -> skip the LLM when the keyword scorer has a clear winner
+CONVERSATION_TYPE_MODE = os.getenv("CONVERSATION_TYPE_MODE", "llm")
+KEYWORD_MIN_HITS = int(os.getenv("KEYWORD_MIN_HITS", "3"))
+KEYWORD_MIN_LEAD = int(os.getenv("KEYWORD_MIN_LEAD", "2"))
 
-CONVERSATION_TYPES = list(CHECKLISTS.keys())
+KEYWORD_CLASSIFIER = KeywordClassifier.from_file(
+    BASE_DIR / "keywords.json",
+    max_edits=int(os.getenv("KEYWORD_MAX_EDITS", "1")),   # 0 or 1: tolerate small ASR errors
+)
+
+TRANSCRIPT_LANGUAGE = "de"
+# Chat completions keyed by model, temperature and the rendered messages,
+# so re-analysing a recording (or an unchanged checklist item) is free.
+LLM_CACHE = DiskCache(
+    Path(os.getenv("LLM_CACHE_DIR", str(BASE_DIR / ".cache" / "llm"))),
+    max_bytes=int(os.getenv("LLM_CACHE_MAX_BYTES", str(64 * 1024 ** 2))),
+)
+TRANSCRIPT_CACHE = DiskCache(
+    Path(os.getenv("TRANSCRIPT_CACHE_DIR", str(BASE_DIR / ".cache" / "transcripts"))),
+    max_bytes=int(os.getenv("TRANSCRIPT_CACHE_MAX_BYTES", str(256 * 1024 ** 2))),
+)
+
+# Process-wide metrics, exposed on GET /metrics (Prometheus text format)
+METRICS = Registry()
+STAGE_SECONDS = METRICS.histogram(
+    "call_analysis_stage_seconds",
+    "Duration of each analysis stage (wait = queued for an analysis slot).",
+    DURATION_BUCKETS,
+)
+STAGE_ERRORS = METRICS.counter(
+    "call_analysis_errors_total",
+    "Analyses that failed, by the stage they failed in.",
+)
+STAGE_CANCELLED = METRICS.counter(
+    "call_analysis_cancelled_total",
+    "Analyses cancelled (client gone, shutdown), by the stage they were in.",
+)
+UPLOAD_BYTES = METRICS.histogram(
+    "call_upload_bytes", "Size of uploaded audio files.", SIZE_BUCKETS,
+)
+TRANSCRIPT_CHARS = METRICS.histogram(
+    "call_transcript_chars",
+    "Length of the transcripts sent to the LLM.",
+    (1000, 2500, 5000, 10000, 25000, 50000, 100000, 250000),
+)
+LLM_SECONDS = METRICS.histogram(
+    "llm_request_seconds", "Duration of uncached chat completions.", DURATION_BUCKETS,
+)
+LLM_TOKENS = METRICS.histogram(
+    "llm_request_tokens", "Tokens per uncached chat completion (kind=prompt|completion).", TOKEN_BUCKETS,
+)
+LLM_TOKENS_TOTAL = METRICS.counter(
+    "llm_tokens_total", "Tokens used by chat completions (kind=prompt|completion).",
+)
+VOTE_ERRORS = METRICS.counter(
+    "checklist_vote_errors_total",
+    "Per-item checklist votes that failed, by exception type.",
+)
 
 
 # ---------- FastAPI app ----------
@@ -47,6 +180,25 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+@app.middleware("http")
+async def reject_oversized_uploads(request: Request, call_next):
+    """
+    Refuse uploads with a too large Content-Length before reading the body;
+    bodies without one are capped while streaming (see save_upload).
+    """
+    length = request.headers.get("content-length")
+    if (
+        request.method == "POST"
+        and length is not None
+        and length.isdigit()
+        and int(length) > MAX_UPLOAD_BYTES + _MULTIPART_SLACK_BYTES
+    ):
+        return JSONResponse(
+            status_code=413,
+            content={"detail": f"Audio file larger than {MAX_UPLOAD_BYTES // (1024 ** 2)} MB"},
+        )
+    return await call_next(request)
+
 # -----------------------------
 #  Static files (front-end)
 # -----------------------------
@@ -59,6 +211,40 @@ app.mount("/static", StaticFiles(directory="static"), name="static")
 async def serve_frontend():
     return FileResponse("static/index.html")
 
+@app.on_event("startup")
+async def start_stt_backend():
+    await stt_backend.start()
+
+@app.on_event("shutdown")
+async def stop_stt_backend():
+    stt_backend.close()
+
+@app.on_event("startup")
+async def start_checklist_watcher():
+    if CHECKLIST_RELOAD_SECONDS > 0:
+        app.state.checklist_watcher = asyncio.create_task(
+            CHECKLIST_STORE.watch(CHECKLIST_RELOAD_SECONDS)
+        )
+
+@app.get("/checklists/version")
+async def checklist_version():
+    """active checklist snapshot and the last reload error, if any."""
+    current = CHECKLIST_STORE.current
+    return {
+        "version": current.version,
+        "conversation_types": current.types,
+        "last_error": CHECKLIST_STORE.last_error,
+    }
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    return PlainTextResponse(METRICS.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/cache/stats")
+async def cache_stats():
+    """hit/miss counters of the transcript and LLM caches (since start)."""
+    return {"transcripts": TRANSCRIPT_CACHE.stats(), "llm": LLM_CACHE.stats()}
+
 # ---------- Antwort model---------
 
 class ChecklistItemResult(BaseModel):
@@ -66,6 +252,7 @@ class ChecklistItemResult(BaseModel):
     description: str
     status: str              # "vorhanden" | "fehlt" | "unklar"
     evidence: str | None = None
+    confidence: float | None = None   # share of agreeing votes (per-item mode)
 
 class AnalysisResponse(BaseModel):
     conversation_type: str
@@ -73,26 +260,108 @@ class AnalysisResponse(BaseModel):
     coverage: float
     items: List[ChecklistItemResult]
     transcript: str
+    context_tokens: Dict[str, int] | None = None   # set with RELEVANCE_WINDOWING
+    timings: Dict[str, float] | None = None        # seconds per stage
 
 
 # ---------- ----------
 
-def transcribe_audio_to_text(file_path: Path) -> str:
-    """transcript mit Whisper."""
-    with file_path.open("rb") as f:
-        result = client.audio.transcriptions.create(
-            model=OPENAI_MODEL_TRANSCRIBE,
-            file=f,
-            language="de",
-        )
-    text = getattr(result, "text", None) or result["text"]
+async def transcribe_audio_to_text(file_path: Path) -> str:
+    """transcript mit Whisper (cached per audio hash + model + language)."""
+    # hashing and the cache are plain file I/O -> keep them off the event loop
+    audio_hash = await asyncio.to_thread(hash_file, file_path)
+    key = make_key(
+        audio=audio_hash,
+        model=stt_backend.model_id,
+        language=TRANSCRIPT_LANGUAGE,
+    )
+    cached = await asyncio.to_thread(TRANSCRIPT_CACHE.get, key)
+    if cached is not None:
+        return cached["text"]
+
+    text = await stt_backend.transcribe(file_path, TRANSCRIPT_LANGUAGE)
+
+    await asyncio.to_thread(TRANSCRIPT_CACHE.put, key, {"text": text})
     return text
 
 
-def detect_conversation_type(transcript: str) -> str:
+async def chat_json(
+    messages: List[Dict[str, str]],
+    temperature: float,
+    variant: int = 0,
+    validate: Optional[Callable[[Dict[str, Any]], None]] = None,
+) -> Dict[str, Any]:
+    """
+    JSON-mode chat completion through llm_limiter, cached on disk; returns
+    the decoded reply. `variant` separates otherwise identical requests
+    that are meant to be sampled independently (the votes of the per-item
+    evaluation). `validate` raises on a reply the caller can't use; only
+    replies that decode and validate are cached, so a bad one is asked
+    again next time instead of being replayed (cached replies are checked
+    again too, e.g. against reloaded checklists).
+    """
+    key = make_key(
+        model=OPENAI_MODEL_CHAT,
+        temperature=temperature,
+        response_format="json_object",
+        messages=hashlib.sha256(
+            json.dumps(messages, ensure_ascii=False).encode("utf-8")
+        ).hexdigest(),
+        variant=variant,
+    )
+    cached = await asyncio.to_thread(LLM_CACHE.get, key)
+    if cached is not None:
+        try:
+            return _decode_reply(cached["content"], validate)
+        except (ValueError, KeyError, TypeError):
+            pass
+
+    async with llm_limiter:
+        started = time.perf_counter()
+        resp = await client.chat.completions.create(
+            model=OPENAI_MODEL_CHAT,
+            response_format={"type": "json_object"},
+            messages=messages,
+            temperature=temperature,
+        )
+    LLM_SECONDS.observe(time.perf_counter() - started)
+
+    usage = getattr(resp, "usage", None)
+    if usage is not None:
+        for kind, tokens in (("prompt", usage.prompt_tokens), ("completion", usage.completion_tokens)):
+            LLM_TOKENS.observe(tokens, kind=kind)
+            LLM_TOKENS_TOTAL.inc(tokens, kind=kind)
+
+    content = resp.choices[0].message.content
+    data = _decode_reply(content, validate)
+    await asyncio.to_thread(LLM_CACHE.put, key, {"content": content})
+    return data
+
+
+def _decode_reply(content: str, validate: Optional[Callable[[Dict[str, Any]], None]]) -> Dict[str, Any]:
+    data = json.loads(content)
+    if not isinstance(data, dict):
+        raise ValueError(f"Expected a JSON object from the model, got {type(data).__name__}")
+    if validate is not None:
+        validate(data)
+    return data
+
+
+async def detect_conversation_type(
+    transcript: str,
+    checklists: Optional[CompiledChecklists] = None,
+) -> str:
     """تllm erkent welche typen."""
+    checklists = checklists or CHECKLIST_STORE.current
 
-    types_description = "\n".join(f"- {t}" for t in CONVERSATION_TYPES)
+    if CONVERSATION_TYPE_MODE == "keywords_first":
+        # single pass over the transcript, no API call
+        scores = await asyncio.to_thread(KEYWORD_CLASSIFIER.score, transcript)
+        winner = clear_winner(scores, KEYWORD_MIN_HITS, KEYWORD_MIN_LEAD)
+        if winner in checklists.types:
+            return winner
+
+    types_description = checklists.types_description
 
     system_msg = (
         "Du bist ein Compliance-Experte in einer deutschen Bank. "
@@ -112,38 +381,57 @@ Antworte im JSON-Format:
 {{"conversation_type": "<einer der Schlüssel oben>", "begruendung": "<kurze Begründung>"}}
 """
 
-    resp = client.chat.completions.create(
-        model=OPENAI_MODEL_CHAT,
-        response_format={"type": "json_object"},
-        messages=[
+    def validate(data: Dict[str, Any]) -> None:
+        if data.get("conversation_type") not in checklists.types:
+            raise ValueError(f"Unknown conversation_type from model: {data.get('conversation_type')}")
+
+    data = await chat_json(
+        [
             {"role": "system", "content": system_msg},
             {"role": "user", "content": user_msg},
         ],
         temperature=0.1,
+        validate=validate,
     )
+    return data["conversation_type"]
 
-    content = resp.choices[0].message.content
-    data = json.loads(content)
-    ctype = data["conversation_type"]
 
-    if ctype not in CONVERSATION_TYPES:
-        raise ValueError(f"Unknown conversation_type from model: {ctype}")
-
-    return ctype
+def _transcript_context(
+    transcript: str,
+    excerpt: Optional[str],
+    report: Optional[ContextReport],
+    prompts: int = 1,
+) -> tuple[str, str]:
+    """(prompt heading, text) -- the excerpt if there is one, else the full transcript."""
+    if report is not None:
+        report.add(transcript, excerpt or transcript, fallback=excerpt is None, prompts=prompts)
+    if excerpt is None:
+        return "Transkript des Kundentelefonats (deutsch):", transcript
+    return (
+        "Relevante Auszüge aus dem Transkript des Kundentelefonats "
+        "(deutsch, [...] = ausgelassen):",
+        excerpt,
+    )
 
 
-def evaluate_against_checklist(
+async def evaluate_against_checklist(
     transcript: str,
     conversation_type: str,
+    windows: Optional[RelevanceWindows] = None,
+    report: Optional[ContextReport] = None,
+    checklists: Optional[CompiledChecklists] = None,
 ) -> List[ChecklistItemResult]:
     """بLLM überprüft jede Item mit checklist."""
+    checklists = checklists or CHECKLIST_STORE.current
 
-    checklist = CHECKLISTS[conversation_type]
+    checklist = checklists[conversation_type]
 
-    checklist_text = "\n".join(
-        f'{item["id"]}: {item["description"]}'
-        for item in checklist
-    )
+    excerpt = None
+    if windows is not None:
+        excerpt = windows.excerpt_for_all(item["description"] for item in checklist)
+    heading, context = _transcript_context(transcript, excerpt, report)
+
+    checklist_text = checklists.checklist_text[conversation_type]
 
     system_msg = (
         "Du bist ein Compliance-Prüfer. "
@@ -151,9 +439,9 @@ def evaluate_against_checklist(
     )
 
     user_msg = f"""
-Transkript des Kundentelefonats (deutsch):
+{heading}
 
-\"\"\"{transcript}\"\"\"
+\"\"\"{context}\"\"\"
 
 Gesprächstyp: {conversation_type}
 
@@ -181,21 +469,17 @@ Antworte NUR im JSON-Format:
 Nutze ausschließlich die IDs aus der Liste oben.
 """
 
-    resp = client.chat.completions.create(
-        model=OPENAI_MODEL_CHAT,
-        response_format={"type": "json_object"},
-        messages=[
+    data = await chat_json(
+        [
             {"role": "system", "content": system_msg},
             {"role": "user", "content": user_msg},
         ],
         temperature=0.1,
+        validate=_validate_items,
     )
-
-    content = resp.choices[0].message.content
-    data = json.loads(content)
     items_raw = data["items"]
 
-    desc_by_id = {item["id"]: item["description"] for item in checklist}
+    desc_by_id = checklists.desc_by_id[conversation_type]
 
     results: List[ChecklistItemResult] = []
     for item in items_raw:
@@ -215,6 +499,172 @@ Nutze ausschließlich die IDs aus der Liste oben.
     return results
 
 
+def _validate_items(data: Dict[str, Any]) -> None:
+    items = data.get("items")
+    if not isinstance(items, list):
+        raise ValueError("Model reply has no items list")
+    for item in items:
+        if not isinstance(item, dict) or "id" not in item or item.get("status") not in ITEM_STATUSES:
+            raise ValueError(f"Malformed checklist item from model: {item!r}")
+
+
+def _validate_vote(data: Dict[str, Any]) -> None:
+    if data.get("status") not in ITEM_STATUSES:
+        raise ValueError(f"Invalid status from model: {data.get('status')!r}")
+
+
+async def _vote_on_item(
+    transcript: str,
+    conversation_type: str,
+    item: Dict[str, Any],
+    vote: int = 0,
+    heading: str = "Transkript des Kundentelefonats (deutsch):",
+) -> Dict[str, Any]:
+    """One independent LLM judgement for a single checklist item."""
+
+    system_msg = (
+        "Du bist ein Compliance-Prüfer. "
+        "Du prüfst, ob ein regulatorischer Pflichtinhalt in einem Gesprächstranskript vorkommt."
+    )
+
+    user_msg = f"""
+{heading}
+
+\"\"\"{transcript}\"\"\"
+
+Gesprächstyp: {conversation_type}
+
+Pflichtinhalt:
+{item["description"]}
+
+Entscheide:
+
+- status: "vorhanden", "fehlt" oder "unklar"
+- evidence: ein kurzer Satz aus dem Transkript, der deine Entscheidung stützt (oder leer, falls fehlt).
+
+Antworte NUR im JSON-Format:
+{{"status": "vorhanden" | "fehlt" | "unklar", "evidence": "..."}}
+"""
+
+    data = await chat_json(
+        [
+            {"role": "system", "content": system_msg},
+            {"role": "user", "content": user_msg},
+        ],
+        temperature=CHECKLIST_VOTE_TEMPERATURE,
+        variant=vote,
+        validate=_validate_vote,
+    )
+    return {"status": data["status"], "evidence": data.get("evidence") or None}
+
+
+def aggregate_votes(item: Dict[str, Any], votes: List[Dict[str, Any]]) -> ChecklistItemResult:
+    """Majority status (ties -> "unklar"), confidence = share of the majority."""
+    if not votes:
+        return ChecklistItemResult(
+            id=item["id"],
+            description=item["description"],
+            status="unklar",
+            evidence=None,
+            confidence=0.0,
+        )
+
+    counts = {status: 0 for status in ITEM_STATUSES}
+    for vote in votes:
+        counts[vote["status"]] += 1
+
+    top = max(counts.values())
+    leaders = [status for status, n in counts.items() if n == top]
+    status = leaders[0] if len(leaders) == 1 else "unklar"
+
+    evidence = next(
+        (v["evidence"] for v in votes if v["status"] == status and v["evidence"]),
+        None,
+    )
+
+    return ChecklistItemResult(
+        id=item["id"],
+        description=item["description"],
+        status=status,
+        evidence=evidence,
+        confidence=counts[status] / len(votes),
+    )
+
+
+async def _evaluate_item(
+    transcript: str,
+    conversation_type: str,
+    item: Dict[str, Any],
+    votes: int,
+    windows: Optional[RelevanceWindows] = None,
+    report: Optional[ContextReport] = None,
+) -> ChecklistItemResult:
+    excerpt = windows.excerpt(item["description"]) if windows is not None else None
+    heading, context = _transcript_context(transcript, excerpt, report, prompts=votes)
+
+    results = await asyncio.gather(
+        *(
+            _vote_on_item(context, conversation_type, item, i, heading=heading)
+            for i in range(votes)
+        ),
+        return_exceptions=True,
+    )
+    valid = []
+    for r in results:
+        if isinstance(r, asyncio.CancelledError):
+            raise r
+        if isinstance(r, BaseException):
+            VOTE_ERRORS.inc(error=type(r).__name__)
+            logger.warning("checklist vote failed for item %s: %s: %s", item["id"], type(r).__name__, r)
+        else:
+            valid.append(r)
+
+    # a failed call doesn't get a vote, but without a majority of answers
+    # the item (and with it the Ampel) can't be decided
+    if len(valid) < votes // 2 + 1:
+        raise HTTPException(
+            status_code=502,
+            detail=f"Only {len(valid)} of {votes} LLM votes succeeded for item {item['id']}",
+        )
+    return aggregate_votes(item, valid)
+
+
+async def evaluate_checklist_per_item(
+    transcript: str,
+    conversation_type: str,
+    on_item: Optional[Callable[[ChecklistItemResult], None]] = None,
+    votes: int = CHECKLIST_VOTES,
+    windows: Optional[RelevanceWindows] = None,
+    report: Optional[ContextReport] = None,
+    checklists: Optional[CompiledChecklists] = None,
+) -> List[ChecklistItemResult]:
+    """
+    Judge every checklist item independently `votes` times (all calls go
+    through llm_limiter) and aggregate by majority. on_item is called as
+    soon as an item is decided; the returned list keeps checklist order.
+    With `windows` each item only sees the transcript passages matching it.
+    """
+    checklist = (checklists or CHECKLIST_STORE.current)[conversation_type]
+
+    tasks = [
+        asyncio.create_task(_evaluate_item(
+            transcript, conversation_type, item, votes, windows=windows, report=report,
+        ))
+        for item in checklist
+    ]
+    try:
+        for finished in asyncio.as_completed(tasks):
+            result = await finished
+            if on_item is not None:
+                on_item(result)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        raise
+
+    return [task.result() for task in tasks]
+
+
 def compute_ampel(items: List[ChecklistItemResult]) -> tuple[str, float]:
     """frome the perzent it calculate the person of ampelو"""
     total = len(items)
@@ -237,47 +687,307 @@ def compute_ampel(items: List[ChecklistItemResult]) -> tuple[str, float]:
 
 # ---------- ----------
 
-@app.post("/analyze_call/", response_model=AnalysisResponse)
-async def analyze_call(audio_file: UploadFile = File(...)):
-    """it return checklist result + transcript + type + Ampel for uploaded audio file."""
+@contextmanager
+def _measure(timings: Dict[str, float], stage: str) -> Iterator[None]:
+    """Time one stage into `timings` and STAGE_SECONDS; failures count per stage."""
+    started = time.perf_counter()
+    try:
+        yield
+    except asyncio.CancelledError:
+        # not a failure of the stage: the request went away
+        STAGE_CANCELLED.inc(stage=stage)
+        raise
+    except BaseException:
+        STAGE_ERRORS.inc(stage=stage)
+        raise
+    finally:
+        elapsed = time.perf_counter() - started
+        timings[stage] = timings.get(stage, 0.0) + elapsed
+        STAGE_SECONDS.observe(elapsed, stage=stage)
+
+
+async def run_analysis(
+    audio_path: Path,
+    on_stage: Optional[Callable[[str], None]] = None,
+    on_item: Optional[Callable[[ChecklistItemResult], None]] = None,
+    timings: Optional[Dict[str, float]] = None,
+) -> AnalysisResponse:
+    """
+    transcribe -> classify -> evaluate -> score; on_stage is told when each
+    step starts, on_item whenever a checklist item is decided. Stage
+    durations are added to `timings` (the caller may already have put the
+    upload time there) and returned in the response.
+    """
+    timings = {} if timings is None else timings
+
+    def stage(name: str) -> None:
+        if on_stage is not None:
+            on_stage(name)
+
+    with _measure(timings, "wait"):
+        await analysis_slots.acquire()
+    try:
+        # one snapshot for the whole analysis, even if a reload happens meanwhile
+        checklists = CHECKLIST_STORE.current
+
+        # STT
+        stage("transcribe")
+        with _measure(timings, "transcribe"):
+            transcript = await transcribe_audio_to_text(audio_path)
+        TRANSCRIPT_CHARS.observe(len(transcript))
+
+        # Typenerkennung
+        stage("classify")
+        with _measure(timings, "classify"):
+            conversation_type = await detect_conversation_type(transcript, checklists)
+
+        stage("evaluate")
+        with _measure(timings, "evaluate"):
+            windows = None
+            report = None
+            if RELEVANCE_WINDOWING:
+                # built once per call, shared by all checklist prompts
+                windows = await asyncio.to_thread(
+                    RelevanceWindows,
+                    transcript,
+                    top_k=RELEVANCE_TOP_K,
+                    min_score=RELEVANCE_MIN_SCORE,
+                    sentences=RELEVANCE_WINDOW_SENTENCES,
+                )
+                report = ContextReport()
+
+            if CHECKLIST_EVAL_MODE == "per_item":
+                items = await evaluate_checklist_per_item(
+                    transcript, conversation_type, on_item=on_item,
+                    windows=windows, report=report, checklists=checklists,
+                )
+            else:
+                items = await evaluate_against_checklist(
+                    transcript, conversation_type, windows=windows, report=report,
+                    checklists=checklists,
+                )
+                if on_item is not None:
+                    for item in items:
+                        on_item(item)
+    finally:
+        analysis_slots.release()
 
-    if not audio_file.filename:
-        raise HTTPException(status_code=400, detail="No file uploaded")
+    # Ampel
+    stage("score")
+    with _measure(timings, "score"):
+        ampel, coverage = compute_ampel(items)
 
-    suffix = Path(audio_file.filename).suffix or ".wav"
+    return AnalysisResponse(
+        conversation_type=conversation_type,
+        ampel=ampel,
+        coverage=coverage,
+        items=items,
+        transcript=transcript,
+        context_tokens=report.as_dict() if report is not None else None,
+        timings=timings,
+    )
 
+
+# the upload endpoints parse their multipart body themselves (see
+# uploads.py); this keeps the file field in the OpenAPI docs
+UPLOAD_OPENAPI = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "required": ["audio_file"],
+                    "properties": {"audio_file": {"type": "string", "format": "binary"}},
+                },
+            },
+        },
+    },
+}
+
+
+async def save_upload(request: Request) -> Path:
+    """
+    Stream the "audio_file" part of the request body to a temp file while
+    it arrives, enforcing MAX_UPLOAD_BYTES on the way (also for chunked
+    uploads without Content-Length). Memory per request stays at one
+    chunk and the file is written once. The caller deletes it.
+    """
     try:
-        # 1) 
-        with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
-            temp_path = Path(tmp.name)
-            contents = await audio_file.read()
-            tmp.write(contents)
+        temp_path, _, written = await receive_file(
+            request, "audio_file", MAX_UPLOAD_BYTES, _MULTIPART_SLACK_BYTES,
+        )
+    except UploadRejected as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
 
-        # 2) STT
-        transcript = transcribe_audio_to_text(temp_path)
+    UPLOAD_BYTES.observe(written)
+    return temp_path
 
-        # 3) Typenerkennung
-        conversation_type = detect_conversation_type(transcript)
 
-        # 4) 
-        items = evaluate_against_checklist(transcript, conversation_type)
+def remove_temp_file(path: Path) -> None:
+    try:
+        if path.exists():
+            path.unlink()
+    except Exception:
+        pass
 
-        # 5) Ampel
-        ampel, coverage = compute_ampel(items)
 
-        # 6) 
-        return AnalysisResponse(
-            conversation_type=conversation_type,
-            ampel=ampel,
-            coverage=coverage,
-            items=items,
-            transcript=transcript,
-        )
+@app.post("/analyze_call/", response_model=AnalysisResponse, openapi_extra=UPLOAD_OPENAPI)
+async def analyze_call(request: Request, response: Response):
+    """it return checklist result + transcript + type + Ampel for uploaded audio file."""
 
+    timings: Dict[str, float] = {}
+    with _measure(timings, "upload"):
+        temp_path = await save_upload(request)
+    try:
+        result = await run_analysis(temp_path, timings=timings)
     finally:
+        remove_temp_file(temp_path)
+
+    response.headers["Server-Timing"] = server_timing(timings)
+    return result
+
+
+@app.post("/analyze_call/stream", openapi_extra=UPLOAD_OPENAPI)
+async def analyze_call_stream(request: Request):
+    """
+    Same analysis as /analyze_call/, streamed as NDJSON: one line per stage
+    ({"event": "stage"}), per decided checklist item ({"event": "item"}) and
+    finally the full {"event": "result"} (or {"event": "error"}).
+    """
+    timings: Dict[str, float] = {}
+    with _measure(timings, "upload"):
+        temp_path = await save_upload(request)
+    events: "asyncio.Queue[Dict[str, Any] | None]" = asyncio.Queue()
+
+    async def produce() -> None:
         try:
-            if "temp_path" in locals() and temp_path.exists():
-                temp_path.unlink()
-        except Exception:
-            pass
+            result = await run_analysis(
+                temp_path,
+                on_stage=lambda name: events.put_nowait({"event": "stage", "stage": name}),
+                on_item=lambda item: events.put_nowait(
+                    {"event": "item", **jsonable_encoder(item)}
+                ),
+                timings=timings,
+            )
+            events.put_nowait({"event": "result", **jsonable_encoder(result)})
+        except Exception as e:
+            events.put_nowait({"event": "error", "detail": f"{type(e).__name__}: {e}"})
+        finally:
+            remove_temp_file(temp_path)
+            events.put_nowait(None)
+
+    async def body():
+        task = asyncio.create_task(produce())
+        try:
+            while (event := await events.get()) is not None:
+                yield json.dumps(event, ensure_ascii=False) + "\n"
+        finally:
+            if not task.done():
+                task.cancel()
+
+    return StreamingResponse(body(), media_type="application/x-ndjson")
+
+
+# ---------- Jobs (submit / poll / result) ----------
+#
+# For long recordings the synchronous endpoint above runs into proxy
+# timeouts. POST /jobs/ only stores the upload and returns a job id; a
+# fixed pool of workers takes jobs from a bounded queue (full queue -> 503),
+# and the client polls GET /jobs/{id} until the result is ready.
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", str(MAX_CONCURRENT_ANALYSES)))
+JOB_QUEUE_SIZE = int(os.getenv("JOB_QUEUE_SIZE", "32"))
+JOB_TTL_SECONDS = float(os.getenv("JOB_TTL_SECONDS", "3600"))
+JOB_MAX_STORED = int(os.getenv("JOB_MAX_STORED", "500"))
+
+job_store = JobStore(max_jobs=JOB_MAX_STORED, ttl_seconds=JOB_TTL_SECONDS)
+job_queue: "asyncio.Queue[Job]" = asyncio.Queue(maxsize=JOB_QUEUE_SIZE)
+
+
+class JobSubmitResponse(BaseModel):
+    job_id: str
+    status: str
+
+
+class JobStatusResponse(BaseModel):
+    job_id: str
+    status: str              # "queued" | "running" | "done" | "failed"
+    stage: str | None = None
+    progress: Dict[str, str]
+    error: str | None = None
+
+
+async def _job_worker() -> None:
+    while True:
+        job = await job_queue.get()
+        try:
+            result = await run_analysis(job.audio_path, on_stage=job.start_stage)
+            job.finish(result)
+        except Exception as e:
+            job.fail(f"{type(e).__name__}: {e}")
+        finally:
+            remove_temp_file(job.audio_path)
+            job_queue.task_done()
+
+
+@app.on_event("startup")
+async def start_job_workers():
+    app.state.job_workers = [
+        asyncio.create_task(_job_worker()) for _ in range(JOB_WORKERS)
+    ]
+
+
+@app.post("/jobs/", response_model=JobSubmitResponse, status_code=202, openapi_extra=UPLOAD_OPENAPI)
+async def submit_job(request: Request):
+    """store the upload and queue it; returns immediately with the job id."""
+    if job_queue.full():
+        raise HTTPException(
+            status_code=503,
+            detail="Too many queued analyses, try again later",
+            headers={"Retry-After": "30"},
+        )
+
+    temp_path = await save_upload(request)
+    job = job_store.create(temp_path)
+    try:
+        job_queue.put_nowait(job)
+    except asyncio.QueueFull:
+        job_store.remove(job.id)
+        remove_temp_file(temp_path)
+        raise HTTPException(
+            status_code=503,
+            detail="Too many queued analyses, try again later",
+            headers={"Retry-After": "30"},
+        )
+
+    return JobSubmitResponse(job_id=job.id, status=job.status)
+
+
+def _get_job_or_404(job_id: str) -> Job:
+    job = job_store.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired job")
+    return job
+
+
+@app.get("/jobs/{job_id}", response_model=JobStatusResponse)
+async def get_job_status(job_id: str):
+    job = _get_job_or_404(job_id)
+    return JobStatusResponse(
+        job_id=job.id,
+        status=job.status,
+        stage=job.stage,
+        progress=job.progress(),
+        error=job.error,
+    )
+
 
+@app.get("/jobs/{job_id}/result", response_model=AnalysisResponse)
+async def get_job_result(job_id: str):
+    job = _get_job_or_404(job_id)
+    if job.status == "failed":
+        raise HTTPException(status_code=500, detail=job.error)
+    if job.status != "done":
+        raise HTTPException(status_code=409, detail=f"Job is {job.status}")
+    return job.result
@@ -0,0 +1,115 @@
+import json
+import asyncio
+import logging
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+
+logger = logging.getLogger(__name__)
+
+
+class CompiledChecklists:
+    """
+    Immutable snapshot of all checklists plus everything the prompts need
+    pre-rendered, so requests don't rebuild it. A request should take one
+    snapshot and use it throughout (a reload then can't change the
+    checklist halfway through an analysis).
+    """
+
+    def __init__(self, checklists: Dict[str, List[Dict[str, Any]]], version: str):
+        if not checklists:
+            raise ValueError("checklists are empty")
+
+        self.version = version
+        self.checklists = checklists
+        self.types: List[str] = list(checklists.keys())
+        self.types_description = "\n".join(f"- {t}" for t in self.types)
+        self.checklist_text: Dict[str, str] = {
+            ctype: "\n".join(f'{item["id"]}: {item["description"]}' for item in items)
+            for ctype, items in checklists.items()
+        }
+        self.desc_by_id: Dict[str, Dict[str, str]] = {
+            ctype: {item["id"]: item["description"] for item in items}
+            for ctype, items in checklists.items()
+        }
+
+    def __getitem__(self, conversation_type: str) -> List[Dict[str, Any]]:
+        return self.checklists[conversation_type]
+
+
+def _mtime(path: Optional[Path]) -> Optional[float]:
+    try:
+        return path.stat().st_mtime if path is not None else None
+    except FileNotFoundError:
+        return None
+
+
+class ChecklistStore:
+    """
+    Holds the current CompiledChecklists and replaces it when the sources
+    change. `json_path` is what gets loaded; if `excel_path` is given and
+    newer than the JSON, it is first recompiled with
+    prepare_checklists.build_checklists (needs pandas).
+
+    watch() polls the modification times and does all loading and compiling
+    in a worker thread; the new snapshot is swapped in with a single
+    assignment. If anything fails the previous snapshot stays active.
+    """
+
+    def __init__(self, json_path: Path, excel_path: Optional[Path] = None):
+        self.json_path = Path(json_path)
+        self.excel_path = Path(excel_path) if excel_path is not None else None
+        self.last_error: Optional[str] = None
+        self._seen: Tuple[Optional[float], Optional[float]] = (None, None)
+
+        if not self.json_path.exists():
+            raise RuntimeError(f"checklists.json nicht gefunden unter {self.json_path}")
+        self._current = self._load()
+        self._seen = self._source_mtimes()
+
+    @property
+    def current(self) -> CompiledChecklists:
+        return self._current
+
+    def _source_mtimes(self) -> Tuple[Optional[float], Optional[float]]:
+        return _mtime(self.json_path), _mtime(self.excel_path)
+
+    def _load(self) -> CompiledChecklists:
+        with self.json_path.open(encoding="utf-8") as f:
+            checklists = json.load(f)
+        return CompiledChecklists(checklists, version=str(_mtime(self.json_path)))
+
+    def _compile_excel(self) -> None:
+        from prepare_checklists import build_checklists
+
+        build_checklists(self.excel_path, self.json_path)
+
+    def reload_if_changed(self) -> bool:
+        """Blocking; returns True if a new snapshot was swapped in."""
+        json_mtime, excel_mtime = self._source_mtimes()
+        if (json_mtime, excel_mtime) == self._seen:
+            return False
+
+        try:
+            if excel_mtime is not None and (json_mtime is None or excel_mtime > json_mtime):
+                self._compile_excel()
+            compiled = self._load()
+        except Exception as e:
+            self.last_error = f"{type(e).__name__}: {e}"
+            # don't retry the same broken files on every poll
+            self._seen = (json_mtime, excel_mtime)
+            logger.warning(
+                "checklist reload failed, keeping version %s: %s", self._current.version, self.last_error
+            )
+            return False
+
+        self._current = compiled
+        self._seen = self._source_mtimes()
+        self.last_error = None
+        logger.info("checklists reloaded (version %s, types: %s)", compiled.version, ", ".join(compiled.types))
+        return True
+
+    async def watch(self, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            await asyncio.to_thread(self.reload_if_changed)
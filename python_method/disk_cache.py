@@ -0,0 +1,148 @@
+import os
+import json
+import hashlib
+import tempfile
+import threading
+from pathlib import Path
+from typing import IO, Any, Dict, Optional
+
+
+_HASH_CHUNK = 1024 * 1024
+
+
+def hash_file(path: Path) -> str:
+    """sha256 of a file, read in chunks."""
+    digest = hashlib.sha256()
+    with Path(path).open("rb") as f:
+        for chunk in iter(lambda: f.read(_HASH_CHUNK), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def make_key(**parts: Any) -> str:
+    """Stable key from JSON-serialisable parts (order independent)."""
+    payload = json.dumps(parts, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class DiskCache:
+    """
+    Small persistent JSON cache: one file per key in `directory`.
+
+    The file mtime is the LRU clock (bumped on each hit); once the
+    directory grows beyond `max_bytes` the least recently used entries
+    are removed.
+
+    transcription/transcript_cache.TranscriptCache uses the same scheme
+    for finished transcripts. get/put may run in worker
+    threads (asyncio.to_thread); the hit/miss counters and the size
+    estimate are only touched under one lock.
+    """
+
+    def __init__(self, directory: Path, max_bytes: int):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        # running size estimate so put() doesn't list the directory every time
+        self._approx_bytes: Optional[int] = None
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses}
+
+    def _count(self, hit: bool) -> None:
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def _dump(self, value: Any, f: IO[str]) -> None:
+        json.dump(value, f, ensure_ascii=False)
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.json"
+
+    def get(self, key: str) -> Optional[Any]:
+        path = self._path(key)
+        try:
+            with path.open(encoding="utf-8") as f:
+                value = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self._count(hit=False)
+            return None
+
+        self._count(hit=True)
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return value
+
+    def put(self, key: str, value: Any) -> None:
+        # write to a temp file first so concurrent readers never see half a file
+        fd, tmp_name = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                self._dump(value, f)
+            size = os.path.getsize(tmp_name)
+        except BaseException:
+            try:
+                os.unlink(tmp_name)
+            except OSError:
+                pass
+            raise
+
+        path = self._path(key)
+        with self._lock:
+            # an overwritten entry's old size leaves the estimate with it
+            try:
+                replaced = path.stat().st_size
+            except FileNotFoundError:
+                replaced = 0
+            try:
+                os.replace(tmp_name, path)
+            except BaseException:
+                try:
+                    os.unlink(tmp_name)
+                except OSError:
+                    pass
+                raise
+
+            if self._approx_bytes is None:
+                self._evict()
+            else:
+                self._approx_bytes += size - replaced
+                if self._approx_bytes > self.max_bytes:
+                    self._evict()
+
+    def _evict(self) -> None:
+        """Recount the directory and drop LRU entries; caller holds self._lock."""
+        entries = []
+        total = 0
+        for path in self.directory.glob("*.json"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+
+        self._approx_bytes = total
+        if total <= self.max_bytes:
+            return
+
+        # least recently used first
+        entries.sort(key=lambda e: e[0])
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                path.unlink()
+                total -= size
+            except FileNotFoundError:
+                pass
+        self._approx_bytes = total
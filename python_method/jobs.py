@@ -0,0 +1,101 @@
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+
+STAGES = ["transcribe", "classify", "evaluate", "score"]
+
+
+class Job:
+    """One submitted analysis; mutated in place by the worker that runs it."""
+
+    def __init__(self, audio_path: Path):
+        self.id = uuid.uuid4().hex
+        self.audio_path = audio_path
+        self.status = "queued"          # queued | running | done | failed
+        self.stage: Optional[str] = None
+        self.stages_done: List[str] = []
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.created = time.time()
+        self.updated = self.created
+
+    def start_stage(self, stage: str) -> None:
+        if self.stage is not None and self.stage not in self.stages_done:
+            self.stages_done.append(self.stage)
+        self.status = "running"
+        self.stage = stage
+        self.updated = time.time()
+
+    def finish(self, result: Any) -> None:
+        if self.stage is not None and self.stage not in self.stages_done:
+            self.stages_done.append(self.stage)
+        self.status = "done"
+        self.stage = None
+        self.result = result
+        self.updated = time.time()
+
+    def fail(self, error: str) -> None:
+        self.status = "failed"
+        self.error = error
+        self.updated = time.time()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("done", "failed")
+
+    def progress(self) -> Dict[str, str]:
+        """Per-stage state: pending | running | done."""
+        out = {}
+        for stage in STAGES:
+            if stage in self.stages_done:
+                out[stage] = "done"
+            elif stage == self.stage:
+                out[stage] = "running"
+            else:
+                out[stage] = "pending"
+        return out
+
+
+class JobStore:
+    """
+    In-memory job registry. Finished jobs are dropped after `ttl_seconds`,
+    and once more than `max_jobs` are stored the oldest finished ones go
+    first (queued/running jobs are never evicted).
+    """
+
+    def __init__(self, max_jobs: int, ttl_seconds: float):
+        self.max_jobs = max_jobs
+        self.ttl_seconds = ttl_seconds
+        self._jobs: Dict[str, Job] = {}
+
+    def create(self, audio_path: Path) -> Job:
+        self.evict()
+        job = Job(audio_path)
+        self._jobs[job.id] = job
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        self.evict()
+        return self._jobs.get(job_id)
+
+    def remove(self, job_id: str) -> None:
+        self._jobs.pop(job_id, None)
+
+    def evict(self) -> None:
+        now = time.time()
+        for job_id in [
+            j.id for j in self._jobs.values()
+            if j.finished and now - j.updated > self.ttl_seconds
+        ]:
+            del self._jobs[job_id]
+
+        overflow = len(self._jobs) - self.max_jobs
+        if overflow > 0:
+            finished = sorted(
+                (j for j in self._jobs.values() if j.finished),
+                key=lambda j: j.updated,
+            )
+            for job in finished[:overflow]:
+                del self._jobs[job.id]
@@ -0,0 +1,197 @@
+import re
+import json
+from collections import deque
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+
+
+_NON_WORD = re.compile(r"[^\w]+")
+
+
+def normalize(text: str) -> str:
+    """lowercase, punctuation -> space, single spaces (same for keywords and transcript)."""
+    return " ".join(_NON_WORD.sub(" ", text.lower()).split())
+
+
+def within_edits(a: str, b: str, max_edits: int) -> bool:
+    """Levenshtein(a, b) <= max_edits, with early exit."""
+    if abs(len(a) - len(b)) > max_edits:
+        return False
+    prev = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        cur = [i] + [0] * len(b)
+        for j, cb in enumerate(b, 1):
+            cur[j] = min(
+                prev[j] + 1,                 # deletion
+                cur[j - 1] + 1,              # insertion
+                prev[j - 1] + (ca != cb),    # substitution
+            )
+        if min(cur) > max_edits:
+            return False
+        prev = cur
+    return prev[-1] <= max_edits
+
+
+def _deletes(word: str, max_edits: int) -> Set[str]:
+    """All strings reachable from `word` by deleting up to max_edits characters."""
+    out = {word}
+    frontier = {word}
+    for _ in range(max_edits):
+        frontier = {w[:i] + w[i + 1:] for w in frontier for i in range(len(w))}
+        out |= frontier
+    return out
+
+
+class KeywordClassifier:
+    """
+    Keyword scorer for conversation types (Python port of the Node
+    backend's calcKeywordScore).
+
+    All keywords are compiled into one Aho-Corasick automaton, so the
+    transcript is scanned once no matter how many keywords there are.
+    With max_edits=1, single-word keywords of at least fuzzy_min_length
+    characters that did not match exactly are also looked up in a deletion
+    index (SymSpell style) by every distinct transcript word, so ASR errors
+    like "kontoführungsgebür" still count. Multi-word keywords only match
+    exactly; larger max_edits are rejected because the number of deletes
+    per word grows with len(word) ** max_edits.
+    """
+
+    def __init__(
+        self,
+        keywords_by_type: Dict[str, List[str]],
+        max_edits: int = 0,
+        fuzzy_min_length: int = 8,
+    ):
+        if max_edits not in (0, 1):
+            raise ValueError(f"max_edits must be 0 or 1, got {max_edits}")
+        self.types = list(keywords_by_type)
+        self.max_edits = max_edits
+        self.fuzzy_min_length = fuzzy_min_length
+
+        # one pattern per distinct normalized keyword, shared across types
+        self.patterns: List[str] = []
+        pattern_ids: Dict[str, int] = {}
+        self._type_patterns: Dict[str, List[int]] = {}
+        for ctype, keywords in keywords_by_type.items():
+            ids = []
+            for kw in keywords:
+                norm = normalize(kw)
+                if not norm:
+                    continue
+                if norm not in pattern_ids:
+                    pattern_ids[norm] = len(self.patterns)
+                    self.patterns.append(norm)
+                ids.append(pattern_ids[norm])
+            self._type_patterns[ctype] = ids
+
+        self._build_automaton()
+
+        # single-word keywords only: transcript words are matched one by one
+        self._fuzzy_index: Dict[str, List[int]] = {}
+        if max_edits > 0:
+            for pid, pattern in enumerate(self.patterns):
+                if len(pattern) < fuzzy_min_length or " " in pattern:
+                    continue
+                for variant in _deletes(pattern, max_edits):
+                    self._fuzzy_index.setdefault(variant, []).append(pid)
+
+    @classmethod
+    def from_file(cls, path: Path, **kwargs) -> "KeywordClassifier":
+        with Path(path).open(encoding="utf-8") as f:
+            return cls(json.load(f), **kwargs)
+
+    # ----- Aho-Corasick -----
+
+    def _build_automaton(self) -> None:
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[int]] = [[]]
+
+        for pid, pattern in enumerate(self.patterns):
+            state = 0
+            for ch in pattern:
+                nxt = self._goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[state][ch] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                state = nxt
+            self._out[state].append(pid)
+
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                f = self._fail[state]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                self._fail[nxt] = self._goto[f].get(ch, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def _exact_matches(self, text: str) -> Set[int]:
+        found: Set[int] = set()
+        goto, fail, out = self._goto, self._fail, self._out
+        state = 0
+        for ch in text:
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if out[state]:
+                found.update(out[state])
+        return found
+
+    def _fuzzy_matches(self, text: str, skip: Set[int]) -> Set[int]:
+        found: Set[int] = set()
+        if not self._fuzzy_index:
+            return found
+        # a word one deletion shorter than the shortest indexed keyword can still match
+        min_length = self.fuzzy_min_length - self.max_edits
+        for token in set(text.split()):
+            if len(token) < min_length:
+                continue
+            for variant in _deletes(token, self.max_edits):
+                for pid in self._fuzzy_index.get(variant, ()):
+                    if pid in skip or pid in found:
+                        continue
+                    if within_edits(token, self.patterns[pid], self.max_edits):
+                        found.add(pid)
+        return found
+
+    # ----- scoring -----
+
+    def score(self, transcript: str) -> Dict[str, Dict[str, float]]:
+        """{type: {"count": matched keywords, "ratio": count / all matches}}"""
+        text = normalize(transcript)
+        matched = self._exact_matches(text)
+        if self.max_edits > 0:
+            matched |= self._fuzzy_matches(text, matched)
+
+        counts = {
+            ctype: sum(1 for pid in ids if pid in matched)
+            for ctype, ids in self._type_patterns.items()
+        }
+        total = sum(counts.values())
+        return {
+            ctype: {"count": count, "ratio": count / total if total else 0.0}
+            for ctype, count in counts.items()
+        }
+
+
+def clear_winner(
+    scores: Dict[str, Dict[str, float]],
+    min_hits: int,
+    min_lead: int,
+) -> Optional[str]:
+    """The top type if it has at least min_hits keywords and leads the runner-up by min_lead."""
+    ranked = sorted(scores.items(), key=lambda kv: kv[1]["count"], reverse=True)
+    if not ranked:
+        return None
+    best_type, best = ranked[0]
+    runner_up = ranked[1][1]["count"] if len(ranked) > 1 else 0
+    if best["count"] >= min_hits and best["count"] - runner_up >= min_lead:
+        return best_type
+    return None
@@ -0,0 +1,185 @@
+# file: load_test.py
+#
+# Load generator for app.py. Sends `--requests` uploads with `--concurrency`
+# in flight and reports throughput, latency percentiles and memory:
+#
+#   python load_test.py --url http://127.0.0.1:8000 --requests 200 \
+#       --concurrency 16 --audio-seconds 120 --server-pid $(pgrep -f "uvicorn app:app")
+#
+# Meant to run against app.py talking to mock_openai.py (see there), so
+# capacity can be planned without touching the real API. Every upload is a
+# distinct synthetic WAV, so app.py's transcript/LLM caches don't hide the
+# work. With --server-pid the server's resident memory is sampled during
+# the run (Linux /proc).
+
+import io
+import sys
+import json
+import time
+import wave
+import asyncio
+import argparse
+import resource
+from typing import Any, Dict, List, Optional
+
+import httpx
+import numpy as np
+
+
+SAMPLE_RATE = 16000
+
+
+def synthetic_wav(seconds: float, seed: int) -> bytes:
+    """Low-level noise with a seed-dependent tone: valid audio, unique bytes."""
+    rng = np.random.default_rng(seed)
+    n = int(seconds * SAMPLE_RATE)
+    t = np.arange(n, dtype=np.float32) / SAMPLE_RATE
+    audio = 0.1 * np.sin(2 * np.pi * (150 + seed % 200) * t) + 0.01 * rng.standard_normal(n)
+    pcm = (np.clip(audio, -1.0, 1.0) * 32767).astype(np.int16)
+
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(SAMPLE_RATE)
+        wf.writeframes(pcm.tobytes())
+    return buf.getvalue()
+
+
+def percentile(sorted_values: List[float], q: float) -> Optional[float]:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(1, int(np.ceil(q / 100.0 * len(sorted_values))))
+    return sorted_values[rank - 1]
+
+
+def _rss_mb(pid: int) -> Optional[float]:
+    try:
+        with open(f"/proc/{pid}/status", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        return None
+    return None
+
+
+async def _sample_memory(pid: int, samples: List[float], interval: float = 0.5) -> None:
+    while True:
+        rss = _rss_mb(pid)
+        if rss is not None:
+            samples.append(rss)
+        await asyncio.sleep(interval)
+
+
+async def _one_request(
+    client: httpx.AsyncClient,
+    url: str,
+    audio: bytes,
+    name: str,
+) -> Dict[str, Any]:
+    started = time.perf_counter()
+    try:
+        resp = await client.post(url, files={"audio_file": (name, audio, "audio/wav")})
+        status = resp.status_code
+        server_timing = resp.headers.get("server-timing")
+    except httpx.HTTPError as e:
+        status = type(e).__name__
+        server_timing = None
+    return {
+        "status": status,
+        "seconds": time.perf_counter() - started,
+        "server_timing": server_timing,
+    }
+
+
+async def run_load(args: argparse.Namespace) -> Dict[str, Any]:
+    url = args.url.rstrip("/") + args.endpoint
+    slots = asyncio.Semaphore(args.concurrency)
+    results: List[Dict[str, Any]] = []
+    rss_samples: List[float] = []
+    upload_bytes = 0
+
+    async def worker(i: int) -> None:
+        nonlocal upload_bytes
+        async with slots:
+            # generated per request (off the event loop) and dropped after it,
+            # so at most `concurrency` payloads exist and the client's own
+            # memory doesn't skew the figures; latency is measured after this
+            audio = await asyncio.to_thread(synthetic_wav, args.audio_seconds, args.seed + i)
+            upload_bytes = len(audio)
+            results.append(await _one_request(client, url, audio, f"load_{i}.wav"))
+
+    sampler = None
+    if args.server_pid:
+        sampler = asyncio.create_task(_sample_memory(args.server_pid, rss_samples))
+
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(timeout=args.timeout, limits=limits) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(i) for i in range(args.requests)))
+        wall = time.perf_counter() - started
+
+    if sampler is not None:
+        sampler.cancel()
+
+    ok = sorted(r["seconds"] for r in results if r["status"] == 200)
+    errors: Dict[str, int] = {}
+    for r in results:
+        if r["status"] != 200:
+            errors[str(r["status"])] = errors.get(str(r["status"]), 0) + 1
+
+    return {
+        "url": url,
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "audio_seconds": args.audio_seconds,
+        "upload_bytes": upload_bytes,
+        "wall_seconds": wall,
+        "throughput_rps": len(ok) / wall if wall else 0.0,
+        "succeeded": len(ok),
+        "errors": errors,
+        "latency_seconds": {
+            "mean": float(np.mean(ok)) if ok else None,
+            "p50": percentile(ok, 50),
+            "p95": percentile(ok, 95),
+            "p99": percentile(ok, 99),
+            "max": ok[-1] if ok else None,
+        },
+        "server_rss_mb": {
+            "start": rss_samples[0] if rss_samples else None,
+            "peak": max(rss_samples) if rss_samples else None,
+            "end": rss_samples[-1] if rss_samples else None,
+        },
+        # ru_maxrss is KiB on Linux, bytes on macOS
+        "client_peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        / (1024 ** 2 if sys.platform == "darwin" else 1024),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Concurrent upload load test for app.py.")
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--endpoint", default="/analyze_call/")
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--audio-seconds", type=float, default=60.0)
+    parser.add_argument("--timeout", type=float, default=600.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--server-pid", type=int, default=None,
+                        help="sample this process's RSS during the run")
+    parser.add_argument("--output", default=None, help="write the JSON report here")
+    args = parser.parse_args()
+
+    report = asyncio.run(run_load(args))
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+# file: mock_openai.py
+#
+# Local stand-in for the parts of the OpenAI API that app.py uses
+# (audio.transcriptions, chat.completions, models.list), for load tests
+# without network access or cost.
+#
+#     uvicorn mock_openai:app --port 8100
+#     OPENAI_BASE_URL=http://127.0.0.1:8100/v1 OPENAI_API_KEY=mock uvicorn app:app
+#
+# Behaviour is set through environment variables:
+#
+#     MOCK_TRANSCRIBE_LATENCY   seconds per transcription (default 2.0)
+#     MOCK_CHAT_LATENCY         seconds per chat completion (default 0.8)
+#     MOCK_LATENCY_JITTER       +- fraction applied to both (default 0.25)
+#     MOCK_FAILURE_RATE         share of requests answered with an error (default 0)
+#     MOCK_REPLIES_FILE         JSON file with canned replies, see DEFAULT_REPLIES
+#
+# Replies are built from the prompt, so they always fit the checklist that
+# app.py sent: the classification prompt gets a conversation type, the
+# checklist prompt an entry for each item id, and the per-item prompt a
+# single status. Every transcript ends with a reference to the audio hash,
+# so different uploads never share a cache entry in app.py.
+
+import os
+import re
+import json
+import time
+import random
+import asyncio
+import hashlib
+from pathlib import Path
+from typing import Any, Dict
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+
+TRANSCRIBE_LATENCY = float(os.getenv("MOCK_TRANSCRIBE_LATENCY", "2.0"))
+CHAT_LATENCY = float(os.getenv("MOCK_CHAT_LATENCY", "0.8"))
+LATENCY_JITTER = float(os.getenv("MOCK_LATENCY_JITTER", "0.25"))
+FAILURE_RATE = float(os.getenv("MOCK_FAILURE_RATE", "0"))
+
+DEFAULT_REPLIES: Dict[str, Any] = {
+    "transcript": (
+        "Guten Tag, hier ist die Wertpapierabteilung. Ich möchte hundert Stück "
+        "der Aktie kaufen. Das ist ein beratungsfreies Geschäft, Sie erhalten "
+        "keine Anlageberatung. Die Order wird an der Heimatbörse mit Limit ausgeführt. "
+        "Ich wiederhole: Ihre Depotnummer endet auf 123."
+    ),
+    "conversation_type": None,          # None -> first type listed in the prompt
+    "statuses": {"vorhanden": 0.7, "fehlt": 0.2, "unklar": 0.1},
+    "evidence": "Das ist ein beratungsfreies Geschäft.",
+}
+
+_replies_file = os.getenv("MOCK_REPLIES_FILE")
+REPLIES = dict(DEFAULT_REPLIES)
+if _replies_file:
+    REPLIES.update(json.loads(Path(_replies_file).read_text(encoding="utf-8")))
+
+_TYPE_OPTION = re.compile(r"^- (\S+)$", re.MULTILINE)
+_ITEM_ID = re.compile(r"^(item_\d+):", re.MULTILINE)
+
+app = FastAPI(title="OpenAI mock")
+
+
+def _jittered(seconds: float) -> float:
+    return max(0.0, seconds * random.uniform(1.0 - LATENCY_JITTER, 1.0 + LATENCY_JITTER))
+
+
+def _maybe_fail() -> JSONResponse | None:
+    if FAILURE_RATE > 0 and random.random() < FAILURE_RATE:
+        status, kind = random.choice([(429, "rate_limit_exceeded"), (500, "server_error")])
+        return JSONResponse(
+            status_code=status,
+            content={"error": {"message": "mock failure", "type": kind, "code": kind}},
+        )
+    return None
+
+
+def _random_status() -> str:
+    statuses = REPLIES["statuses"]
+    return random.choices(list(statuses), weights=list(statuses.values()))[0]
+
+
+def _reply_for(prompt: str) -> Dict[str, Any]:
+    if '"conversation_type"' in prompt:
+        options = _TYPE_OPTION.findall(prompt)
+        ctype = REPLIES["conversation_type"] or (options[0] if options else "unbekannt")
+        return {"conversation_type": ctype, "begruendung": "mock"}
+
+    if '"items"' in prompt:
+        return {
+            "items": [
+                {"id": item_id, "status": _random_status(), "evidence": REPLIES["evidence"]}
+                for item_id in _ITEM_ID.findall(prompt)
+            ]
+        }
+
+    return {"status": _random_status(), "evidence": REPLIES["evidence"]}
+
+
+@app.get("/v1/models")
+async def list_models():
+    return {
+        "object": "list",
+        "data": [
+            {"id": model, "object": "model", "created": 0, "owned_by": "mock"}
+            for model in ("whisper-1", "gpt-4.1-mini", "gpt-4.1")
+        ],
+    }
+
+
+@app.post("/v1/audio/transcriptions")
+async def create_transcription(request: Request):
+    form = await request.form()
+    upload = form.get("file")
+    audio = await upload.read() if upload is not None else b""
+
+    await asyncio.sleep(_jittered(TRANSCRIBE_LATENCY))
+    failure = _maybe_fail()
+    if failure is not None:
+        return failure
+
+    ref = hashlib.sha256(audio).hexdigest()[:12]
+    return {"text": f"{REPLIES['transcript']} Referenz {ref}."}
+
+
+@app.post("/v1/chat/completions")
+async def create_chat_completion(request: Request):
+    body = await request.json()
+    prompt = "\n".join(m.get("content") or "" for m in body.get("messages", []))
+
+    await asyncio.sleep(_jittered(CHAT_LATENCY))
+    failure = _maybe_fail()
+    if failure is not None:
+        return failure
+
+    content = json.dumps(_reply_for(prompt), ensure_ascii=False)
+    prompt_tokens = len(prompt) // 4
+    completion_tokens = len(content) // 4
+    return {
+        "id": f"chatcmpl-mock-{random.getrandbits(48):012x}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model", "mock"),
+        "choices": [
+            {
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }
+        ],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        },
+    }
@@ -18,11 +18,12 @@ def normalize_key(sheet_name: str) -> str:
         name = name.replace(k, v)
     return name
 
-def build_checklists():
-    if not EXCEL_PATH.exists():
-        raise FileNotFoundError(f"Excel-Datei nicht gefunden: {EXCEL_PATH}")
+def read_checklists(excel_path: Path = EXCEL_PATH) -> dict:
+    """{normalized sheet name: [{"id": "item_N", "description": ...}]} from the Excel file."""
+    if not excel_path.exists():
+        raise FileNotFoundError(f"Excel-Datei nicht gefunden: {excel_path}")
 
-    xls = pd.ExcelFile(EXCEL_PATH)
+    xls = pd.ExcelFile(excel_path)
     all_checklists = {}
 
     for sheet in xls.sheet_names:
@@ -46,11 +47,20 @@ def build_checklists():
         ]
         print(f"{sheet} -> {key}: {len(items)} items")
 
-    OUTPUT_PATH.write_text(
+    return all_checklists
+
+def build_checklists(excel_path: Path = EXCEL_PATH, output_path: Path = OUTPUT_PATH) -> dict:
+    all_checklists = read_checklists(excel_path)
+
+    # write next to the target and rename, so readers never see half a file
+    tmp_path = output_path.with_suffix(output_path.suffix + ".tmp")
+    tmp_path.write_text(
         json.dumps(all_checklists, ensure_ascii=False, indent=2),
         encoding="utf-8",
     )
-    print(f"✔ checklists written to {OUTPUT_PATH}")
+    tmp_path.replace(output_path)
+    print(f"✔ checklists written to {output_path}")
+    return all_checklists
 
 if __name__ == "__main__":
     build_checklists()
@@ -0,0 +1,37 @@
+import asyncio
+import time
+
+
+class RateLimiter:
+    """
+    Global limit for outgoing LLM calls: at most `max_concurrency` requests
+    in flight and, if `per_second` > 0, no more than that many started per
+    second (evenly spaced).
+
+        async with limiter:
+            await client.chat.completions.create(...)
+    """
+
+    def __init__(self, max_concurrency: int, per_second: float = 0.0):
+        self._slots = asyncio.Semaphore(max_concurrency)
+        self._interval = 1.0 / per_second if per_second > 0 else 0.0
+        self._next_start = 0.0
+        self._lock = asyncio.Lock()
+
+    async def __aenter__(self) -> "RateLimiter":
+        await self._slots.acquire()
+        if self._interval:
+            try:
+                async with self._lock:
+                    now = time.monotonic()
+                    wait = self._next_start - now
+                    self._next_start = max(now, self._next_start) + self._interval
+                if wait > 0:
+                    await asyncio.sleep(wait)
+            except BaseException:
+                self._slots.release()
+                raise
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        self._slots.release()
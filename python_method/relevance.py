@@ -0,0 +1,169 @@
+import re
+import math
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Sequence
+
+
+_SENTENCE_END = re.compile(r"(?<=[.!?…])\s+")
+_WORD = re.compile(r"\w+")
+
+# frequent German function words; they match everywhere and only add noise
+STOPWORDS = frozenset("""
+aber alle als also am an auch auf aus bei bin bis bitte da damit dann das dass
+dem den der des die dies diese diesem diesen dieser doch dort du durch ein eine
+einem einen einer eines er es etwa für ganz gibt hat hatte haben hier ich ihm
+ihn ihr ihre ihnen im in ist ja jetzt kann kein keine mal man mein mit muss nach
+nein nicht noch nun nur ob oder ok okay schon sehr sein sich sie sind so soll
+um und uns unter vom von vor war was weil wenn wer wie wir wird wo zu zum zur
+""".split())
+
+# German compounds and inflections ("beratungsfrei", "beratungsfreies") share
+# their first few characters, which is good enough for lexical ranking
+STEM_CHARS = 7
+
+
+def tokenize(text: str) -> List[str]:
+    """lowercase word stems without stopwords, digits and very short words."""
+    out = []
+    for word in _WORD.findall(text.lower()):
+        if len(word) < 3 or word.isdigit() or word in STOPWORDS:
+            continue
+        out.append(word[:STEM_CHARS])
+    return out
+
+
+def approx_tokens(text: str) -> int:
+    """rough LLM token count (about 4 characters per token)."""
+    return (len(text) + 3) // 4
+
+
+def split_windows(transcript: str, sentences: int = 4, overlap: int = 1) -> List[str]:
+    """Overlapping windows of `sentences` consecutive sentences."""
+    parts = [s.strip() for s in _SENTENCE_END.split(transcript) if s.strip()]
+    if len(parts) <= sentences:
+        return [" ".join(parts)] if parts else []
+
+    step = max(1, sentences - overlap)
+    windows = []
+    for start in range(0, len(parts), step):
+        windows.append(" ".join(parts[start:start + sentences]))
+        if start + sentences >= len(parts):
+            break
+    return windows
+
+
+class BM25Index:
+    """Okapi BM25 over a fixed list of passages."""
+
+    def __init__(self, passages: Sequence[str], k1: float = 1.5, b: float = 0.75):
+        self.passages = list(passages)
+        self.k1 = k1
+        self.b = b
+
+        self._tfs: List[Counter] = [Counter(tokenize(p)) for p in self.passages]
+        self._lengths = [sum(tf.values()) for tf in self._tfs]
+        self._avg_length = (sum(self._lengths) / len(self._lengths)) if self._lengths else 0.0
+
+        df: Counter = Counter()
+        for tf in self._tfs:
+            df.update(tf.keys())
+        n = len(self.passages)
+        self._idf = {
+            term: math.log(1.0 + (n - count + 0.5) / (count + 0.5))
+            for term, count in df.items()
+        }
+
+    def scores(self, query: str) -> List[float]:
+        terms = [t for t in set(tokenize(query)) if t in self._idf]
+        out = []
+        for tf, length in zip(self._tfs, self._lengths):
+            norm = self.k1 * (1.0 - self.b + self.b * length / (self._avg_length or 1.0))
+            score = 0.0
+            for term in terms:
+                f = tf.get(term)
+                if f:
+                    score += self._idf[term] * f * (self.k1 + 1.0) / (f + norm)
+            out.append(score)
+        return out
+
+    def top(self, query: str, k: int) -> List[tuple]:
+        """[(passage index, score)] of the k best passages, best first."""
+        ranked = sorted(enumerate(self.scores(query)), key=lambda e: e[1], reverse=True)
+        return ranked[:k]
+
+
+class RelevanceWindows:
+    """
+    Per-call index over transcript windows. excerpt() returns only the
+    windows that match a checklist item description, or None when nothing
+    scores at least `min_score` -- the caller then sends the full transcript.
+    """
+
+    GAP = "\n[...]\n"
+
+    def __init__(
+        self,
+        transcript: str,
+        top_k: int = 3,
+        min_score: float = 2.0,
+        sentences: int = 4,
+        overlap: int = 1,
+    ):
+        self.transcript = transcript
+        self.top_k = top_k
+        self.min_score = min_score
+        self.index = BM25Index(split_windows(transcript, sentences, overlap))
+
+    def _select(self, query: str) -> Optional[List[int]]:
+        best = [(i, s) for i, s in self.index.top(query, self.top_k) if s > 0]
+        if not best or best[0][1] < self.min_score:
+            return None
+        return [i for i, _ in best]
+
+    def _join(self, indices: Iterable[int]) -> str:
+        # transcript order, so the model still sees the course of the call
+        return self.GAP.join(self.index.passages[i] for i in sorted(set(indices)))
+
+    def excerpt(self, query: str) -> Optional[str]:
+        if len(self.index.passages) <= self.top_k:
+            return None   # nothing to cut
+        selected = self._select(query)
+        return None if selected is None else self._join(selected)
+
+    def excerpt_for_all(self, queries: Iterable[str]) -> Optional[str]:
+        """Union of the windows of every query; None if any query needs the full text."""
+        if len(self.index.passages) <= self.top_k:
+            return None
+        indices: List[int] = []
+        for query in queries:
+            selected = self._select(query)
+            if selected is None:
+                return None
+            indices.extend(selected)
+        excerpt = self._join(indices)
+        return excerpt if len(excerpt) < len(self.transcript) else None
+
+
+class ContextReport:
+    """Transcript tokens that would have been sent vs. actually sent in prompts."""
+
+    def __init__(self) -> None:
+        self.full_tokens = 0
+        self.sent_tokens = 0
+        self.prompts = 0
+        self.fallbacks = 0
+
+    def add(self, full_text: str, sent_text: str, fallback: bool, prompts: int = 1) -> None:
+        self.full_tokens += prompts * approx_tokens(full_text)
+        self.sent_tokens += prompts * approx_tokens(sent_text)
+        self.prompts += prompts
+        self.fallbacks += prompts * int(fallback)
+
+    def as_dict(self) -> Dict[str, int]:
+        return {
+            "prompts": self.prompts,
+            "fallbacks": self.fallbacks,
+            "transcript_tokens_full": self.full_tokens,
+            "transcript_tokens_sent": self.sent_tokens,
+            "transcript_tokens_saved": self.full_tokens - self.sent_tokens,
+        }
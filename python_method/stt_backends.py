@@ -0,0 +1,105 @@
+import os
+import asyncio
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Optional
+
+
+class OpenAIWhisperBackend:
+    """Upload the file to the hosted whisper-1 endpoint."""
+
+    def __init__(self, client: Any, model: str = "whisper-1"):
+        self.client = client
+        self.model = model
+        self.model_id = model
+
+    async def start(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+    async def transcribe(self, file_path: Path, language: str) -> str:
+        with file_path.open("rb") as f:
+            result = await self.client.audio.transcriptions.create(
+                model=self.model,
+                file=f,
+                language=language,
+            )
+        return getattr(result, "text", None) or result["text"]
+
+
+# ---------- local faster-whisper (runs in worker processes) ----------
+
+# set in each worker by _init_worker
+_model = None
+_beam_size = 5
+
+
+def _init_worker(model_size: str, device: str, compute_type: str, cpu_threads: int, beam_size: int) -> None:
+    """Runs once per worker process: load the model, then keep it for every file."""
+    global _model, _beam_size
+    from faster_whisper import WhisperModel
+
+    _model = WhisperModel(
+        model_size,
+        device=device,
+        compute_type=compute_type,
+        cpu_threads=cpu_threads,
+    )
+    _beam_size = beam_size
+
+
+def _warm_up() -> int:
+    return os.getpid()
+
+
+def _transcribe_in_worker(audio_path: str, language: str) -> str:
+    segments, _ = _model.transcribe(audio_path, language=language, beam_size=_beam_size)
+    return " ".join(seg.text.strip() for seg in segments).strip()
+
+
+class LocalWhisperBackend:
+    """
+    faster-whisper in a pool of `workers` processes, each with its own
+    preloaded model and `cpu_threads` CTranslate2 threads. Processes are
+    used instead of threads so decoding of different calls never competes
+    for the GIL; the event loop only awaits the pool futures.
+    """
+
+    def __init__(
+        self,
+        model_size: str = "medium",
+        device: str = "cpu",
+        compute_type: str = "int8",
+        workers: Optional[int] = None,
+        cpu_threads: int = 4,
+        beam_size: int = 5,
+    ):
+        self.workers = workers or max(1, (os.cpu_count() or 1) // cpu_threads)
+        self.model_id = f"faster-whisper-{model_size}-{compute_type}-beam{beam_size}"
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.workers,
+            # spawn: CTranslate2 / OpenMP state doesn't survive fork
+            mp_context=mp.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(model_size, device, compute_type, cpu_threads, beam_size),
+        )
+
+    async def start(self) -> None:
+        """Spawn all workers now, so models load at server start, not on the first upload."""
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(
+            loop.run_in_executor(self._pool, _warm_up) for _ in range(self.workers)
+        ))
+
+    def close(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    async def transcribe(self, file_path: Path, language: str) -> str:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._pool, _transcribe_in_worker, str(file_path), language,
+        )
+
@@ -0,0 +1,132 @@
+import asyncio
+import tempfile
+from pathlib import Path
+from typing import IO, Dict, Optional, Tuple
+
+from starlette.requests import Request
+
+try:
+    from python_multipart.multipart import MultipartParser, parse_options_header
+    from python_multipart.exceptions import MultipartParseError
+except ImportError:  # python-multipart < 0.0.13
+    from multipart.multipart import MultipartParser, parse_options_header
+    from multipart.exceptions import MultipartParseError
+
+
+class UploadRejected(Exception):
+    """The upload can't be accepted; status_code / detail go to the client."""
+
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+async def receive_file(
+    request: Request,
+    field: str,
+    max_bytes: int,
+    slack_bytes: int = 64 * 1024,
+) -> Tuple[Path, str, int]:
+    """
+    Parse a multipart/form-data body straight from request.stream() and
+    write the file part named `field` to a temp file as it arrives.
+
+    Nothing is spooled by the framework first, so the size limit holds for
+    chunked uploads without Content-Length too: the request is aborted as
+    soon as the file passes `max_bytes` (or the whole body passes it plus
+    `slack_bytes` of form overhead). Memory stays at one network chunk.
+
+    Returns (temp_path, filename, size); the caller deletes the file.
+    """
+    content_type, params = parse_options_header(request.headers.get("content-type", ""))
+    boundary = params.get(b"boundary")
+    if content_type != b"multipart/form-data" or not boundary:
+        raise UploadRejected(400, "Expected a multipart/form-data upload")
+
+    too_large = UploadRejected(413, f"Audio file larger than {max_bytes // (1024 ** 2)} MB")
+
+    header_field = bytearray()
+    header_value = bytearray()
+    headers: Dict[bytes, bytes] = {}
+    pending = bytearray()   # file bytes parsed from the current chunk
+    in_file = False
+    done = False
+    filename = ""
+    tmp: Optional[IO[bytes]] = None
+
+    def on_part_begin() -> None:
+        headers.clear()
+
+    def on_header_field(data: bytes, start: int, end: int) -> None:
+        header_field.extend(data[start:end])
+
+    def on_header_value(data: bytes, start: int, end: int) -> None:
+        header_value.extend(data[start:end])
+
+    def on_header_end() -> None:
+        headers[bytes(header_field).lower()] = bytes(header_value)
+        header_field.clear()
+        header_value.clear()
+
+    def on_headers_finished() -> None:
+        nonlocal in_file, filename, tmp
+        _, options = parse_options_header(headers.get(b"content-disposition", b""))
+        name = options.get(b"name", b"").decode("utf-8", "replace")
+        part_filename = options.get(b"filename", b"").decode("utf-8", "replace")
+        # only the first file part under `field` is kept
+        in_file = name == field and bool(part_filename) and tmp is None
+        if in_file:
+            filename = part_filename
+            tmp = tempfile.NamedTemporaryFile(delete=False, suffix=Path(filename).suffix or ".wav")
+
+    def on_part_data(data: bytes, start: int, end: int) -> None:
+        if in_file:
+            pending.extend(data[start:end])
+
+    def on_part_end() -> None:
+        nonlocal in_file, done
+        if in_file:
+            done = True
+        in_file = False
+
+    parser = MultipartParser(boundary, {
+        "on_part_begin": on_part_begin,
+        "on_header_field": on_header_field,
+        "on_header_value": on_header_value,
+        "on_header_end": on_header_end,
+        "on_headers_finished": on_headers_finished,
+        "on_part_data": on_part_data,
+        "on_part_end": on_part_end,
+    })
+
+    received = 0
+    written = 0
+    try:
+        async for chunk in request.stream():
+            received += len(chunk)
+            if received > max_bytes + slack_bytes:
+                raise too_large
+            try:
+                parser.write(chunk)
+            except MultipartParseError as e:
+                raise UploadRejected(400, f"Malformed multipart body: {e}")
+
+            if pending:
+                written += len(pending)
+                if written > max_bytes:
+                    raise too_large
+                await asyncio.to_thread(tmp.write, bytes(pending))
+                pending.clear()
+
+        parser.finalize()
+        if tmp is None or not done:
+            raise UploadRejected(400, "No file uploaded")
+        tmp.close()
+    except BaseException:
+        if tmp is not None:
+            tmp.close()
+            Path(tmp.name).unlink(missing_ok=True)
+        raise
+
+    return Path(tmp.name), filename, written
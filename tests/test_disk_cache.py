@@ -0,0 +1,45 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from disk_cache import DiskCache, make_key
+
+
+def directory_bytes(cache):
+    return sum(p.stat().st_size for p in cache.directory.glob("*.json"))
+
+
+def test_round_trip_and_counters(tmp_path):
+    cache = DiskCache(tmp_path, max_bytes=1 << 20)
+    key = make_key(model="m", messages=[{"role": "user", "content": "hallo"}])
+    assert cache.get(key) is None
+    cache.put(key, {"answer": "grüß gott"})
+    assert cache.get(key) == {"answer": "grüß gott"}
+    assert cache.stats() == {"hits": 1, "misses": 1}
+
+
+def test_make_key_is_order_independent():
+    assert make_key(a=1, b=[1, 2]) == make_key(b=[1, 2], a=1)
+    assert make_key(a=1) != make_key(a=2)
+
+
+def test_overwrite_does_not_inflate_size_estimate(tmp_path):
+    cache = DiskCache(tmp_path, max_bytes=1 << 20)
+    for n in range(50):
+        cache.put("same", {"payload": "x" * (100 + n)})
+    assert cache._approx_bytes == directory_bytes(cache)
+
+
+def test_concurrent_puts_keep_size_estimate(tmp_path):
+    cache = DiskCache(tmp_path, max_bytes=1 << 20)
+    cache.put("warm", 0)   # first put counts the directory
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(lambda n: cache.put(f"k{n % 20}", {"n": "x" * n}), range(400)))
+    assert cache._approx_bytes == directory_bytes(cache)
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = DiskCache(tmp_path, max_bytes=2500)
+    for n in range(10):
+        cache.put(f"k{n}", "x" * 1000)
+    assert directory_bytes(cache) <= 2500
+    assert cache.get("k9") is not None
+    assert cache.get("k0") is None
@@ -0,0 +1,86 @@
+import random
+import time
+import json
+from pathlib import Path
+
+import pytest
+
+from keyword_classifier import KeywordClassifier, clear_winner, normalize, within_edits
+
+
+KEYWORDS = Path(__file__).resolve().parent.parent / "python_method" / "keywords.json"
+
+
+def naive_score(keywords_by_type, transcript):
+    """Substring counting, as in the Node backend's calcKeywordScore."""
+    text = normalize(transcript)
+    counts = {
+        ctype: sum(1 for kw in map(normalize, kws) if kw and kw in text)
+        for ctype, kws in keywords_by_type.items()
+    }
+    total = sum(counts.values())
+    return {
+        ctype: {"count": count, "ratio": count / total if total else 0.0}
+        for ctype, count in counts.items()
+    }
+
+
+def test_exact_matches_equal_substring_counting():
+    keywords_by_type = json.loads(KEYWORDS.read_text("utf-8"))
+    classifier = KeywordClassifier(keywords_by_type)
+    keywords = [kw for kws in keywords_by_type.values() for kw in kws]
+    rng = random.Random(0)
+    filler = ["also", "die", "order", "bitte", "danke", "ja", "genau", "konto"]
+    for _ in range(200):
+        words = [rng.choice(filler) for _ in range(40)]
+        for kw in rng.sample(keywords, 3):
+            words.insert(rng.randrange(len(words) + 1), kw)
+        transcript = " ".join(words)
+        assert classifier.score(transcript) == naive_score(keywords_by_type, transcript)
+
+
+def test_fuzzy_matches_single_words_only():
+    classifier = KeywordClassifier(
+        {"a": ["angemessenheitsprüfung"], "b": ["ohne beratung", "kurze variante"]},
+        max_edits=1,
+    )
+    scores = classifier.score("Die Angemesenheitsprüfung ist erfolgt, ohne beratunk.")
+    assert scores["a"]["count"] == 1
+    assert scores["b"]["count"] == 0
+
+
+def test_fuzzy_min_length():
+    classifier = KeywordClassifier({"a": ["depotwechsel"], "b": ["order"]}, max_edits=1)
+    scores = classifier.score("der depotwechse und die ordr")
+    assert scores["a"]["count"] == 1
+    assert scores["b"]["count"] == 0
+
+
+def test_max_edits_above_one_is_rejected():
+    with pytest.raises(ValueError):
+        KeywordClassifier({"a": ["angemessenheitsprüfung"]}, max_edits=2)
+
+
+def test_within_edits():
+    assert within_edits("beratung", "beratunk", 1)
+    assert not within_edits("beratung", "beratnk", 0)
+    assert not within_edits("beratung", "bera", 1)
+
+
+def test_clear_winner():
+    scores = {"a": {"count": 4}, "b": {"count": 1}, "c": {"count": 0}}
+    assert clear_winner(scores, min_hits=3, min_lead=2) == "a"
+    assert clear_winner(scores, min_hits=5, min_lead=2) is None
+    assert clear_winner({}, min_hits=1, min_lead=1) is None
+
+
+def test_long_transcript_is_fast():
+    classifier = KeywordClassifier.from_file(KEYWORDS, max_edits=1)
+    rng = random.Random(1)
+    letters = "abcdefghijklmnopqrstuvwxyzäöü"
+    vocabulary = ["".join(rng.choice(letters) for _ in range(rng.randint(2, 16))) for _ in range(5000)]
+    transcript = " ".join(rng.choice(vocabulary) for _ in range(15000))
+
+    started = time.perf_counter()
+    classifier.score(transcript)
+    assert time.perf_counter() - started < 1.0
@@ -0,0 +1,85 @@
+import math
+from collections import Counter
+
+import pytest
+
+from relevance import BM25Index, ContextReport, RelevanceWindows, split_windows, tokenize
+
+
+FILLER = "Wir sprechen kurz über das Wetter und den Urlaub."
+TRANSCRIPT = " ".join(
+    [FILLER] * 6
+    + ["Es handelt sich um ein beratungsfreies Geschäft ohne Anlageberatung."]
+    + [FILLER] * 6
+    + ["Die Angemessenheitsprüfung wurde durchgeführt."]
+    + [FILLER] * 6
+)
+
+
+def test_tokenize_drops_stopwords_and_stems():
+    assert tokenize("Das ist ein beratungsfreies Geschäft, 100 Stück!") == ["beratun", "geschäf", "stück"]
+
+
+def test_split_windows_overlap():
+    text = "Eins. Zwei. Drei. Vier. Fünf. Sechs."
+    assert split_windows(text, sentences=3, overlap=1) == [
+        "Eins. Zwei. Drei.", "Drei. Vier. Fünf.", "Fünf. Sechs.",
+    ]
+    assert split_windows("Eins. Zwei.", sentences=3) == ["Eins. Zwei."]
+    assert split_windows("  ") == []
+
+
+def test_bm25_matches_textbook_formula():
+    passages = ["Order Aktien kaufen", "Aktien Aktien verkaufen heute", "Wetter Urlaub"]
+    index = BM25Index(passages)
+    docs = [Counter(tokenize(p)) for p in passages]
+    avg = sum(sum(d.values()) for d in docs) / len(docs)
+    query = "aktien verkaufen"
+
+    expected = []
+    for d in docs:
+        score = 0.0
+        for term in set(tokenize(query)):
+            n_t = sum(1 for other in docs if term in other)
+            if not n_t:
+                continue
+            idf = math.log(1 + (len(docs) - n_t + 0.5) / (n_t + 0.5))
+            f = d[term]
+            score += idf * f * 2.5 / (f + 1.5 * (0.25 + 0.75 * sum(d.values()) / avg))
+        expected.append(score)
+    assert index.scores(query) == pytest.approx(expected)
+    assert index.top(query, 1)[0][0] == 1
+
+
+def test_excerpt_keeps_only_matching_windows():
+    windows = RelevanceWindows(TRANSCRIPT, top_k=1, min_score=0.5)
+    excerpt = windows.excerpt("beratungsfreies Geschäft")
+    assert "beratungsfreies" in excerpt
+    assert "Angemessenheitsprüfung" not in excerpt
+    assert len(excerpt) < len(TRANSCRIPT)
+
+
+def test_excerpt_falls_back_to_full_transcript():
+    windows = RelevanceWindows(TRANSCRIPT, top_k=1, min_score=0.5)
+    assert windows.excerpt("Kryptowährung Hebelprodukt") is None
+    assert windows.excerpt_for_all(["beratungsfreies Geschäft", "Kryptowährung"]) is None
+
+
+def test_excerpt_for_all_is_union_in_transcript_order():
+    windows = RelevanceWindows(TRANSCRIPT, top_k=1, min_score=0.5)
+    excerpt = windows.excerpt_for_all(["Angemessenheitsprüfung", "beratungsfreies Geschäft"])
+    assert excerpt.index("beratungsfreies") < excerpt.index("Angemessenheitsprüfung")
+    assert RelevanceWindows.GAP in excerpt
+
+
+def test_context_report():
+    report = ContextReport()
+    report.add("x" * 400, "x" * 100, fallback=False, prompts=2)
+    report.add("x" * 400, "x" * 400, fallback=True)
+    assert report.as_dict() == {
+        "prompts": 3,
+        "fallbacks": 1,
+        "transcript_tokens_full": 300,
+        "transcript_tokens_sent": 150,
+        "transcript_tokens_saved": 150,
+    }
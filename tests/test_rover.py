@@ -0,0 +1,48 @@
+import pytest
+
+from rover import GAP, build_network, fuse
+
+
+def test_identical_hypotheses():
+    words = ["ich", "kaufe", "zehn", "aktien"]
+    assert fuse([words, words]) == [{"word": w, "confidence": 1.0} for w in words]
+
+
+def test_majority_vote_and_confidence():
+    fused = fuse([
+        ["ich", "kaufe", "zehn"],
+        ["ich", "kaufe", "zehn"],
+        ["ich", "laufe", "zehn"],
+    ])
+    assert [w["word"] for w in fused] == ["ich", "kaufe", "zehn"]
+    assert fused[1]["confidence"] == pytest.approx(0.667)
+
+
+def test_columns_hold_one_entry_per_hypothesis():
+    hypotheses = [["a", "b", "c"], ["a", "c"], ["x", "a", "b", "c", "d"]]
+    for column in build_network(hypotheses):
+        assert len(column) == len(hypotheses)
+
+
+def test_empty_first_hypothesis_keeps_columns_aligned():
+    hypotheses = [[], ["ich", "kaufe"], ["ich", "kaufe"]]
+    network = build_network(hypotheses)
+    assert network == [[GAP, "ich", "ich"], [GAP, "kaufe", "kaufe"]]
+
+    # the empty hypothesis' weight goes to the gaps, not to a real word
+    fused = fuse(hypotheses, weights=[10.0, 1.0, 1.0])
+    assert fused == []
+    fused = fuse(hypotheses, weights=[1.0, 1.0, 1.0])
+    assert fused == [
+        {"word": "ich", "confidence": 0.667},
+        {"word": "kaufe", "confidence": 0.667},
+    ]
+
+
+def test_gap_columns_are_dropped():
+    fused = fuse([["ja", "gut"], ["ja", "äh", "gut"], ["ja", "gut"]])
+    assert [w["word"] for w in fused] == ["ja", "gut"]
+
+
+def test_no_hypotheses():
+    assert fuse([]) == []
@@ -0,0 +1,92 @@
+import io
+import json
+
+import pytest
+
+from segment_store import (
+    ROW_KEYS, SegmentTable, SegmentTableBuilder, dump_json, encode_result, to_plain,
+)
+
+
+SEGMENTS = [
+    {"start": 0.0, "end": 1.25, "text": "Guten Tag, apoBank.", "speaker_id": "SPEAKER_00"},
+    {"start": 1.25, "end": 4.5, "text": "Ich möchte eine Order aufgeben.", "speaker_id": "SPEAKER_01"},
+    {"start": 4.5, "end": 5.0, "text": "", "speaker_id": None},
+    {"start": 5.0, "end": 7.75, "text": "Gerne – welches Wertpapier? 😊", "speaker_id": "SPEAKER_00"},
+]
+WORDS = [{"start": 0.0, "end": 0.5, "word": "Guten"}, {"start": 0.5, "end": 1.0, "word": "Tag"}]
+TURNS = [{"start": 0.0, "end": 1.25, "speaker_id": "SPEAKER_00"}]
+
+
+def test_rows_round_trip():
+    table = SegmentTable.from_segments(SEGMENTS)
+    assert len(table) == len(SEGMENTS)
+    assert table.to_dicts() == SEGMENTS
+    assert table.speakers.labels == ["SPEAKER_00", "SPEAKER_01"]
+    assert table.nbytes < len(json.dumps(SEGMENTS))
+
+
+@pytest.mark.parametrize("key, rows", [("segments", SEGMENTS), ("words", WORDS), ("spk_segments", TURNS)])
+def test_layouts_keep_their_keys(key, rows):
+    layout = ROW_KEYS[key]
+    table = SegmentTable.from_segments(rows, **layout)
+    expected = [
+        {k: v for k, v in row.items() if k in ("start", "end", layout["text_key"])
+         or (k == "speaker_id" and layout["with_speaker"])}
+        for row in rows
+    ]
+    assert table.to_dicts() == expected
+
+
+def test_builder_can_be_read_while_filling():
+    builder = SegmentTableBuilder()
+    for n, seg in enumerate(SEGMENTS, 1):
+        builder.append(seg)
+        assert len(builder) == n
+    assert builder.build().to_dicts() == SEGMENTS
+
+
+def test_columns_round_trip():
+    table = SegmentTable.from_segments(SEGMENTS)
+    columns = table.to_columns()
+    assert SegmentTable.from_columns(columns).to_dicts() == SEGMENTS
+    with pytest.raises(ValueError):
+        SegmentTable.from_columns(dict(columns, format="segments-columnar/0"))
+
+
+def test_dump_json_matches_plain_json():
+    result = {
+        "language": "de",
+        "segments_with_speaker": SegmentTable.from_segments(SEGMENTS),
+        "words": SegmentTable.from_segments(WORDS, **ROW_KEYS["words"]),
+        "empty": SegmentTable.from_segments([]),
+        "timings": {"transcribe": 1.5},
+    }
+    out = io.StringIO()
+    dump_json(result, out)
+    assert json.loads(out.getvalue()) == to_plain(result)
+    assert to_plain(result)["segments_with_speaker"] == SEGMENTS
+
+
+def test_msgpack_round_trip():
+    msgpack = pytest.importorskip("msgpack")
+    payload = msgpack.unpackb(encode_result({"segments_with_speaker": SEGMENTS, "n": 1}, "msgpack"), raw=False)
+    assert payload["n"] == 1
+    assert SegmentTable.from_columns(payload["segments_with_speaker"]).to_dicts() == SEGMENTS
+
+
+def test_arrow_round_trip():
+    pa = pytest.importorskip("pyarrow")
+    data = encode_result({"segments_with_speaker": SEGMENTS, "spk_segments": TURNS}, "arrow")
+    table = pa.ipc.open_stream(data).read_all()
+    assert table.to_pylist() == [
+        {"start": s["start"], "end": s["end"], "speaker_id": s["speaker_id"], "text": s["text"]}
+        for s in SEGMENTS
+    ]
+    extra = json.loads(table.schema.metadata[b"extra"])
+    assert extra == {"spk_segments": TURNS, "rows": "segments_with_speaker"}
+
+
+def test_unknown_format():
+    with pytest.raises(ValueError):
+        encode_result({"segments": []}, "csv")
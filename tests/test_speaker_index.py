@@ -0,0 +1,58 @@
+import random
+
+import numpy as np
+import pytest
+
+from speaker_index import LinearTurnScan, SpeakerTurnIndex, TurnPointLookup
+
+
+def random_turns(rng, n):
+    """Turns on a coarse grid so overlaps, touching ends and center ties are common."""
+    turns = []
+    for _ in range(n):
+        start = rng.randrange(0, 200) / 2
+        end = start + rng.randrange(1, 20) / 2
+        turns.append({"start": start, "end": end, "speaker_id": f"SPEAKER_{rng.randrange(3):02d}"})
+    return turns
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_index_matches_linear_scan(seed):
+    rng = random.Random(seed)
+    turns = random_turns(rng, rng.randrange(1, 60))
+    index, linear = SpeakerTurnIndex(turns), LinearTurnScan(turns)
+    for _ in range(200):
+        start = rng.randrange(-10, 220) / 4
+        end = start + rng.randrange(0, 40) / 4
+        assert index.overlapping(start, end) == linear.overlapping(start, end)
+        assert index.nearest(start, end) is linear.nearest(start, end)
+
+
+def test_nearest_on_empty_index():
+    with pytest.raises(ValueError):
+        SpeakerTurnIndex([]).nearest(0.0, 1.0)
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_point_lookup(seed):
+    rng = random.Random(seed)
+    turns = random_turns(rng, rng.randrange(1, 60))
+    times = np.array([rng.randrange(-20, 440) / 4 for _ in range(300)])
+    result = TurnPointLookup(turns)(times)
+
+    centers = [0.5 * (t["start"] + t["end"]) for t in turns]
+    for t, i in zip(times, result):
+        covering = [k for k, turn in enumerate(turns) if turn["start"] <= t < turn["end"]]
+        if covering:
+            assert i in covering
+            started = [k for k, turn in enumerate(turns) if turn["start"] <= t]
+            latest = max(started, key=lambda k: (turns[k]["start"], k))
+            if latest in covering:
+                assert i == latest
+        else:
+            assert abs(centers[i] - t) == min(abs(c - t) for c in centers)
+
+
+def test_point_lookup_needs_turns():
+    with pytest.raises(ValueError):
+        TurnPointLookup([])
@@ -0,0 +1,32 @@
+from segment_store import SegmentTable, to_plain
+from transcript_cache import TranscriptCache, hash_audio_file, make_cache_key
+
+
+SEGMENTS = [
+    {"start": 0.0, "end": 1.5, "text": "Guten Tag", "speaker_id": "SPEAKER_00"},
+    {"start": 1.5, "end": 3.25, "text": "Ich möchte kaufen", "speaker_id": "SPEAKER_01"},
+]
+
+
+def test_key_depends_on_audio_and_settings(tmp_path):
+    audio = tmp_path / "a.wav"
+    audio.write_bytes(b"RIFF" + bytes(1000))
+    audio_hash = hash_audio_file(str(audio))
+    key = make_cache_key(audio_hash, {"model": "large-v3", "language": "de"})
+    assert key == make_cache_key(audio_hash, {"language": "de", "model": "large-v3"})
+    assert key != make_cache_key(audio_hash, {"model": "medium", "language": "de"})
+
+
+def test_tables_are_stored_as_rows(tmp_path):
+    cache = TranscriptCache(tmp_path, max_bytes=1 << 20)
+    result = {"language": "de", "segments_with_speaker": SegmentTable.from_segments(SEGMENTS)}
+    cache.put("k", result)
+    assert cache.get("k") == to_plain(result)
+    assert cache.get("missing") is None
+
+
+def test_overwrite_does_not_inflate_size_estimate(tmp_path):
+    cache = TranscriptCache(tmp_path, max_bytes=1 << 20)
+    for n in range(20):
+        cache.put("k", {"segments": SEGMENTS * (n + 1)})
+    assert cache._approx_bytes == sum(p.stat().st_size for p in tmp_path.glob("*.json"))
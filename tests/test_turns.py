@@ -0,0 +1,76 @@
+import random
+from typing import Any, Dict, List, Optional
+
+from turns import TurnBuilder, iter_turns, merge_segments_by_speaker
+
+
+def merge_by_concatenation(segments: List[Dict[str, Any]], max_gap: float = 1.0) -> List[Dict[str, Any]]:
+    """The original merge from stt_with_diarization_old.py (string concatenation per segment)."""
+    turns: List[Dict[str, Any]] = []
+    current: Optional[Dict[str, Any]] = None
+    for seg in segments:
+        if current is not None \
+                and seg["speaker_id"] == current["speaker_id"] \
+                and seg["start"] - current["end"] <= max_gap:
+            current["end"] = seg["end"]
+            current["text"] = current["text"].rstrip() + " " + seg["text"].lstrip()
+            continue
+        if current is not None:
+            turns.append(current)
+        current = {k: seg[k] for k in ("speaker_id", "start", "end", "text")}
+    if current is not None:
+        turns.append(current)
+    return turns
+
+
+def random_segments(rng: random.Random, n: int) -> List[Dict[str, Any]]:
+    texts = ["ja", " gut ", "", "  ", "Order", "bitte ", " danke", "zehn Stück"]
+    segments, t = [], 0.0
+    for _ in range(n):
+        start = t + rng.choice([0.0, 0.5, 1.0, 1.5, 3.0])
+        end = start + rng.choice([0.5, 2.0])
+        segments.append({
+            "start": start, "end": end,
+            "speaker_id": rng.choice(["SPEAKER_00", "SPEAKER_01"]),
+            "text": rng.choice(texts),
+        })
+        t = end
+    return segments
+
+
+def test_matches_concatenating_merge():
+    rng = random.Random(0)
+    for _ in range(1000):
+        segments = random_segments(rng, rng.randrange(0, 30))
+        max_gap = rng.choice([0.0, 1.0, 2.0])
+        assert merge_segments_by_speaker(segments, max_gap) == merge_by_concatenation(segments, max_gap)
+
+
+def test_turns_are_yielded_when_the_next_speaker_starts():
+    segments = [
+        {"start": 0.0, "end": 1.0, "speaker_id": "A", "text": "Hallo"},
+        {"start": 1.0, "end": 2.0, "speaker_id": "A", "text": "zusammen"},
+        {"start": 2.0, "end": 3.0, "speaker_id": "B", "text": "Guten Tag"},
+    ]
+    builder = TurnBuilder()
+    assert builder.add(segments[0]) is None
+    assert builder.add(segments[1]) is None
+    assert builder.add(segments[2]) == {"speaker_id": "A", "start": 0.0, "end": 2.0, "text": "Hallo zusammen"}
+    assert builder.finish() == {"speaker_id": "B", "start": 2.0, "end": 3.0, "text": "Guten Tag"}
+    assert builder.finish() is None
+
+
+def test_iter_turns_is_lazy():
+    def segments():
+        yield {"start": 0.0, "end": 1.0, "speaker_id": "A", "text": "a"}
+        yield {"start": 1.0, "end": 2.0, "speaker_id": "B", "text": "b"}
+        raise AssertionError("read past the first closed turn")
+
+    assert next(iter_turns(segments()))["text"] == "a"
+
+
+def test_long_monologue():
+    segments = [{"start": float(i), "end": i + 1.0, "speaker_id": "A", "text": "wort"} for i in range(50000)]
+    (turn,) = merge_segments_by_speaker(segments)
+    assert turn["end"] == 50000.0
+    assert turn["text"] == " ".join(["wort"] * 50000)
@@ -0,0 +1,93 @@
+import numpy as np
+import pytest
+
+from vad import SAMPLE_RATE, SpeechMap, detect_speech, energy_speech_spans
+
+
+SR = SAMPLE_RATE
+
+
+def band_noise(rng, seconds):
+    """Noise limited to the telephone band: loud, in band, spectrum changes every frame."""
+    n = int(seconds * SR)
+    spectrum = np.fft.rfft(rng.standard_normal(n))
+    freqs = np.fft.rfftfreq(n, 1.0 / SR)
+    spectrum[(freqs < 400) | (freqs > 3000)] = 0
+    signal = np.fft.irfft(spectrum, n)
+    return (0.3 * signal / np.std(signal)).astype(np.float32)
+
+
+def quiet(rng, seconds):
+    return (1e-4 * rng.standard_normal(int(seconds * SR))).astype(np.float32)
+
+
+def tone(seconds, hz=1000.0):
+    t = np.arange(int(seconds * SR)) / SR
+    return (0.3 * np.sin(2 * np.pi * hz * t)).astype(np.float32)
+
+
+def test_compact_and_to_original_round_trip():
+    audio = np.arange(10 * SR, dtype=np.float32)
+    speech = SpeechMap([(1 * SR, 3 * SR), (5 * SR, 6 * SR), (8 * SR, 10 * SR)], len(audio))
+    short = speech.compact(audio)
+    assert len(short) == speech.speech_samples == 5 * SR
+
+    for pos in range(0, len(short), 997):
+        original = speech.to_original(pos / SR)
+        assert audio[int(round(original * SR))] == short[pos]
+
+
+def test_cut_points_belong_to_the_right_span():
+    speech = SpeechMap([(1 * SR, 3 * SR), (5 * SR, 6 * SR)], 8 * SR)
+    # compact t=2.0 is the cut between both spans
+    assert speech.to_original(2.0, is_end=True) == 3.0
+    assert speech.to_original(2.0) == 5.0
+    assert speech.map_segment({"start": 0.5, "end": 2.0, "text": "a"}) == {"start": 1.5, "end": 3.0, "text": "a"}
+
+
+def test_map_segment_maps_words():
+    speech = SpeechMap([(2 * SR, 4 * SR)], 4 * SR)
+    seg = {"start": 0.0, "end": 1.0, "words": [{"word": "ja", "start": 0.25, "end": 0.5}]}
+    assert speech.map_segment(seg)["words"] == [{"word": "ja", "start": 2.25, "end": 2.5}]
+
+
+def test_map_turn_splits_at_cuts():
+    speech = SpeechMap([(1 * SR, 3 * SR), (5 * SR, 6 * SR), (8 * SR, 10 * SR)], 10 * SR)
+    pieces = speech.map_turn({"start": 1.0, "end": 3.5, "speaker_id": "SPEAKER_00"})
+    assert [(p["start"], p["end"]) for p in pieces] == [(2.0, 3.0), (5.0, 6.0), (8.0, 8.5)]
+    assert all(p["speaker_id"] == "SPEAKER_00" for p in pieces)
+    assert sum(p["end"] - p["start"] for p in pieces) == pytest.approx(2.5)
+
+
+def test_report_and_speech_between():
+    speech = SpeechMap([(1 * SR, 3 * SR), (5 * SR, 6 * SR)], 10 * SR)
+    assert speech.report() == {"audio_seconds": 10.0, "speech_seconds": 3.0, "skipped_percent": 70.0, "spans": 2}
+    assert speech.speech_seconds_between(2.0, 5.5) == pytest.approx(1.5)
+    assert SpeechMap.everything(0).report()["spans"] == 0
+
+
+def test_everything_compacts_to_the_same_buffer():
+    audio = np.zeros(SR, dtype=np.float32)
+    assert SpeechMap.everything(len(audio)).compact(audio) is audio
+
+
+def test_energy_vad_keeps_speech_and_drops_silence_and_tones():
+    rng = np.random.default_rng(0)
+    audio = np.concatenate([
+        quiet(rng, 3), band_noise(rng, 4), quiet(rng, 3), tone(4), quiet(rng, 3), band_noise(rng, 2), quiet(rng, 3),
+    ])
+    spans = energy_speech_spans(audio)
+    seconds = [(s / SR, e / SR) for s, e in spans]
+    assert len(seconds) == 2
+    (s1, e1), (s2, e2) = seconds
+    assert s1 <= 3.0 and e1 >= 7.0 and e1 < 10.0
+    assert s2 > 14.0 and s2 <= 17.0 and e2 >= 19.0
+
+
+def test_energy_vad_on_empty_audio():
+    assert energy_speech_spans(np.zeros(10, dtype=np.float32)) == []
+
+
+def test_unknown_method():
+    with pytest.raises(ValueError):
+        detect_speech(np.zeros(SR, dtype=np.float32), "webrtc")
@@ -0,0 +1,231 @@
+# file: batch_transcribe.py
+#
+# Nightly batch runs: transcribe + diarize every recording in a directory
+# (or listed in a manifest) with a pool of worker processes. Each worker
+# loads Whisper and pyannote once and then processes many files.
+#
+#   python batch_transcribe.py /data/archive --output-dir /data/transcripts --workers 4
+#   python batch_transcribe.py manifest.txt  --output-dir out/
+#
+# One JSON file is written per recording (same relative path, .json suffix).
+# Recordings whose JSON already exists are skipped, so an interrupted run
+# can simply be restarted.
+
+import os
+import sys
+import json
+import time
+import argparse
+import multiprocessing as mp
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+
+
+AUDIO_EXTENSIONS = (".mp3", ".wav", ".m4a", ".flac", ".ogg")
+
+# set in each worker by _init_worker
+_stt = None
+_options: Dict[str, Any] = {}
+
+
+def collect_inputs(source: Path) -> Tuple[Path, List[Path]]:
+    """
+    Return (base_dir, files). `source` is either a directory (searched
+    recursively for audio files) or a manifest with one path per line
+    (relative paths are resolved against the manifest's directory).
+    """
+    if source.is_dir():
+        files = sorted(
+            p for p in source.rglob("*")
+            if p.is_file() and p.suffix.lower() in AUDIO_EXTENSIONS
+        )
+        return source, files
+
+    base = source.parent
+    files = []
+    with source.open(encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            path = Path(line)
+            files.append(path if path.is_absolute() else base / path)
+    return base, files
+
+
+def output_path_for(audio_path: Path, base_dir: Path, output_dir: Path) -> Path:
+    try:
+        relative = audio_path.resolve().relative_to(base_dir.resolve())
+    except ValueError:
+        relative = Path(audio_path.name)
+    return output_dir / relative.with_suffix(".json")
+
+
+def _init_worker(threads_per_stage: int, options: Dict[str, Any]) -> None:
+    """Runs once per worker process: size thread pools, then load the models."""
+    global _stt, _options
+    os.environ.setdefault("WHISPER_CPU_THREADS", str(threads_per_stage))
+    os.environ.setdefault("DIARIZATION_THREADS", str(threads_per_stage))
+
+    import stt_with_diarization_new as stt
+
+    stt.get_whisper_model()
+    stt.get_diarization_pipeline()
+    _stt = stt
+    _options = options
+
+
+def _audio_duration(audio_path: Path) -> float:
+    import av
+
+    with av.open(str(audio_path), metadata_errors="ignore") as container:
+        if container.duration is not None:
+            return container.duration / av.time_base
+        stream = container.streams.audio[0]
+        if stream.duration is not None and stream.time_base is not None:
+            return float(stream.duration * stream.time_base)
+    return 0.0
+
+
+def _process_one(job: Tuple[str, str]) -> Dict[str, Any]:
+    audio_path, out_path = job
+    t0 = time.perf_counter()
+    try:
+        result = _stt.process_call(
+            audio_path,
+            language=_options["language"],
+            use_cache=_options["use_cache"],
+            align=_options["align"],
+            chunk_seconds=_options["chunk_seconds"],
+        )
+
+        out = Path(out_path)
+        out.parent.mkdir(parents=True, exist_ok=True)
+        tmp = out.with_suffix(".json.tmp")
+        with tmp.open("w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False)
+        os.replace(tmp, out)
+
+        return {
+            "audio_path": audio_path,
+            "ok": True,
+            "audio_seconds": _audio_duration(Path(audio_path)),
+            "seconds": time.perf_counter() - t0,
+        }
+    except Exception as e:
+        return {
+            "audio_path": audio_path,
+            "ok": False,
+            "error": f"{type(e).__name__}: {e}",
+            "seconds": time.perf_counter() - t0,
+        }
+
+
+def run_batch(
+    source: Path,
+    output_dir: Path,
+    workers: int,
+    options: Dict[str, Any],
+    threads_per_stage: Optional[int] = None,
+) -> Dict[str, Any]:
+    base_dir, files = collect_inputs(source)
+
+    jobs: List[Tuple[str, str]] = []
+    skipped = 0
+    for audio_path in files:
+        out_path = output_path_for(audio_path, base_dir, output_dir)
+        if out_path.exists():
+            skipped += 1
+            continue
+        jobs.append((str(audio_path), str(out_path)))
+
+    print(
+        f"{len(files)} recordings, {skipped} already done, {len(jobs)} to process "
+        f"with {workers} workers",
+        file=sys.stderr,
+    )
+
+    if threads_per_stage is None:
+        # every worker runs Whisper and pyannote side by side
+        threads_per_stage = max(1, (os.cpu_count() or 1) // (2 * workers))
+
+    done = failed = 0
+    audio_seconds = 0.0
+    t0 = time.perf_counter()
+
+    if jobs:
+        # spawn: torch / CTranslate2 thread pools do not survive fork well
+        ctx = mp.get_context("spawn")
+        with ctx.Pool(
+            processes=workers,
+            initializer=_init_worker,
+            initargs=(threads_per_stage, options),
+        ) as pool:
+            for res in pool.imap_unordered(_process_one, jobs):
+                if res["ok"]:
+                    done += 1
+                    audio_seconds += res["audio_seconds"]
+                    print(
+                        f"[{done + failed}/{len(jobs)}] {res['audio_path']} "
+                        f"({res['audio_seconds']:.0f}s audio in {res['seconds']:.0f}s)",
+                        file=sys.stderr,
+                    )
+                else:
+                    failed += 1
+                    print(
+                        f"[{done + failed}/{len(jobs)}] FAILED {res['audio_path']}: {res['error']}",
+                        file=sys.stderr,
+                    )
+
+    wall_seconds = time.perf_counter() - t0
+    return {
+        "files": len(files),
+        "processed": done,
+        "skipped": skipped,
+        "failed": failed,
+        "audio_hours": audio_seconds / 3600.0,
+        "wall_hours": wall_seconds / 3600.0,
+        # audio-hours processed per wall-clock hour
+        "throughput": audio_seconds / wall_seconds if wall_seconds > 0 else 0.0,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Transcribe and diarize a directory or manifest of recordings.",
+    )
+    parser.add_argument("source", help="directory of recordings or manifest file")
+    parser.add_argument("--output-dir", required=True)
+    parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 1) // 8))
+    parser.add_argument(
+        "--threads-per-stage",
+        type=int,
+        default=None,
+        help="CPU threads for Whisper and for pyannote inside each worker",
+    )
+    parser.add_argument("--language", default="de")
+    parser.add_argument("--align", choices=("segments", "words"), default="segments")
+    parser.add_argument("--chunk-seconds", type=float, default=None)
+    parser.add_argument("--no-cache", action="store_true")
+    args = parser.parse_args()
+
+    summary = run_batch(
+        Path(args.source),
+        Path(args.output_dir),
+        workers=args.workers,
+        options={
+            "language": args.language,
+            "use_cache": not args.no_cache,
+            "align": args.align,
+            "chunk_seconds": args.chunk_seconds,
+        },
+        threads_per_stage=args.threads_per_stage,
+    )
+
+    print(json.dumps(summary, indent=2))
+    if summary["failed"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+# file: bench_pipeline.py
+#
+# Offline benchmark for the stages of stt_with_diarization_new.process_call.
+#
+# For every combination of model size, compute type, call length and
+# alignment mode a fresh child process is started (so model load time and
+# peak memory are measured per run), a synthetic recording of that length
+# is written to a temporary WAV, and decode / transcribe / diarize /
+# assign / merge are timed separately. The report is JSON so it can be
+# stored and compared across versions:
+#
+#   python bench_pipeline.py --lengths 60 300 900 --model-sizes small medium \
+#       --compute-types int8 float32 --output bench.json
+#
+# By default the audio is a tone/noise "conversation" between two synthetic
+# voices. With --source Order3.mp3 a real recording is tiled to each
+# length instead, which gives Whisper actual speech to decode.
+
+import os
+import sys
+import json
+import wave
+import time
+import platform
+import argparse
+import resource
+import subprocess
+import tempfile
+from typing import Dict, Any, List, Optional
+
+import numpy as np
+
+
+SAMPLE_RATE = 16000
+
+
+def synthetic_conversation(seconds: float, seed: int = 0) -> np.ndarray:
+    """
+    Two alternating "speakers" (different pitch and timbre), syllable-rate
+    amplitude modulation, short pauses between turns and background noise.
+    Not intelligible, but it has the structure diarization looks for.
+    """
+    rng = np.random.default_rng(seed)
+    n = int(seconds * SAMPLE_RATE)
+    audio = np.zeros(n, dtype=np.float32)
+
+    voices = [(120.0, (1.0, 0.5, 0.25)), (210.0, (1.0, 0.3, 0.4))]
+    pos = 0
+    speaker = 0
+    while pos < n:
+        turn = int(rng.uniform(2.0, 12.0) * SAMPLE_RATE)
+        end = min(n, pos + turn)
+        t = np.arange(end - pos, dtype=np.float32) / SAMPLE_RATE
+
+        f0, harmonics = voices[speaker]
+        f0 = f0 * (1.0 + 0.05 * np.sin(2 * np.pi * 0.7 * t))  # intonation
+        phase = 2 * np.pi * np.cumsum(f0) / SAMPLE_RATE
+        voice = sum(a * np.sin((k + 1) * phase) for k, a in enumerate(harmonics))
+        syllables = 0.5 * (1.0 + np.sin(2 * np.pi * rng.uniform(3.0, 5.0) * t))
+        audio[pos:end] = 0.2 * voice * syllables
+
+        pos = end + int(rng.uniform(0.2, 1.0) * SAMPLE_RATE)  # pause
+        speaker = 1 - speaker
+
+    audio += 0.005 * rng.standard_normal(n).astype(np.float32)
+    return audio
+
+
+def tiled_recording(source: str, seconds: float) -> np.ndarray:
+    """Repeat a real recording until it is `seconds` long."""
+    from faster_whisper import decode_audio
+
+    base = decode_audio(source, sampling_rate=SAMPLE_RATE)
+    n = int(seconds * SAMPLE_RATE)
+    reps = int(np.ceil(n / max(1, len(base))))
+    return np.tile(base, reps)[:n]
+
+
+def write_wav(path: str, audio: np.ndarray) -> None:
+    pcm = (np.clip(audio, -1.0, 1.0) * 32767).astype(np.int16)
+    with wave.open(path, "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(SAMPLE_RATE)
+        wf.writeframes(pcm.tobytes())
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 ** 2 if sys.platform == "darwin" else 1024)
+
+
+def run_single(length: float, align: str, source: Optional[str]) -> Dict[str, Any]:
+    """Executed in the child process; model settings come from the environment."""
+    import stt_with_diarization_new as stt
+
+    timings: Dict[str, float] = {}
+
+    t0 = time.perf_counter()
+    stt.get_whisper_model()
+    timings["load_whisper"] = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    stt.get_diarization_pipeline()
+    timings["load_diarization"] = time.perf_counter() - t0
+
+    audio = tiled_recording(source, length) if source else synthetic_conversation(length)
+
+    with tempfile.TemporaryDirectory(prefix="bench_") as tmp_dir:
+        wav_path = os.path.join(tmp_dir, "call.wav")
+        write_wav(wav_path, audio)
+        del audio
+
+        t0 = time.perf_counter()
+        stt.process_call(
+            wav_path,
+            use_cache=False,
+            parallel=False,  # sequential, so every stage is timed on its own
+            align=align,
+            timings=timings,
+            output="both",  # so "merge" times the turn building
+        )
+        total = time.perf_counter() - t0
+
+    pipeline_stages = ("decode", "vad", "transcribe", "diarize", "assign", "merge")
+    return {
+        "model_size": stt.MODEL_SIZE,
+        "compute_type": stt.COMPUTE_TYPE,
+        "align": align,
+        "audio_seconds": length,
+        "seconds": timings,
+        "total_seconds": total,
+        # real-time factor: processing time / audio duration (lower is better)
+        "rtf": {
+            **{s: timings.get(s, 0.0) / length for s in pipeline_stages},
+            "total": total / length,
+        },
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+
+
+def run_matrix(args: argparse.Namespace) -> Dict[str, Any]:
+    runs: List[Dict[str, Any]] = []
+
+    for model_size in args.model_sizes:
+        for compute_type in args.compute_types:
+            for align in args.align:
+                for length in args.lengths:
+                    env = dict(os.environ)
+                    env["WHISPER_MODEL_SIZE"] = model_size
+                    env["WHISPER_COMPUTE_TYPE"] = compute_type
+                    cmd = [
+                        sys.executable, os.path.abspath(__file__), "--child",
+                        "--lengths", str(length), "--align", align,
+                    ]
+                    if args.source:
+                        cmd += ["--source", args.source]
+
+                    print(
+                        f"{model_size}/{compute_type} align={align} {length:.0f}s ...",
+                        file=sys.stderr,
+                        flush=True,
+                    )
+                    proc = subprocess.run(
+                        cmd, env=env, capture_output=True, text=True,
+                        cwd=os.path.dirname(os.path.abspath(__file__)),
+                    )
+                    if proc.returncode != 0:
+                        runs.append({
+                            "model_size": model_size,
+                            "compute_type": compute_type,
+                            "align": align,
+                            "audio_seconds": length,
+                            "error": proc.stderr.strip().splitlines()[-1:] or ["failed"],
+                        })
+                        continue
+                    runs.append(json.loads(proc.stdout.strip().splitlines()[-1]))
+
+    return {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "host": {
+            "platform": platform.platform(),
+            "python": platform.python_version(),
+            "cpu_count": os.cpu_count(),
+        },
+        "source": args.source or "synthetic",
+        "runs": runs,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Time the stages of the transcription pipeline.",
+    )
+    parser.add_argument("--lengths", type=float, nargs="+", default=[60.0, 300.0, 900.0],
+                        help="call lengths in seconds")
+    parser.add_argument("--model-sizes", nargs="+", default=["medium"])
+    parser.add_argument("--compute-types", nargs="+", default=["float32", "int8"])
+    parser.add_argument("--align", nargs="+", choices=("segments", "words"),
+                        default=["segments"])
+    parser.add_argument("--source", default=None,
+                        help="real recording to tile instead of synthetic audio")
+    parser.add_argument("--output", default=None, help="write the JSON report here")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        result = run_single(args.lengths[0], args.align[0], args.source)
+        print(json.dumps(result))
+        return
+
+    report = run_matrix(args)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+# file: bench_speaker_assignment.py
+#
+# Compare the interval-index speaker assignment against the original
+# nested scans on synthetic inputs (no audio or models needed).
+#
+#   python bench_speaker_assignment.py --sizes 1000 2000 5000 10000
+
+import sys
+import time
+import random
+import argparse
+from typing import Dict, Any, List, Tuple
+
+from speaker_index import LinearTurnScan
+from stt_with_diarization_new import assign_speakers_to_segments, split_segment_by_speaker
+
+
+def make_synthetic_call(
+    n_segments: int,
+    n_turns: int,
+    seed: int = 0,
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Whisper-like segments and pyannote-like turns over the same timeline.
+    Turns alternate between two speakers, with occasional overlapping
+    speech and gaps, so all code paths (split, single speaker, fallback)
+    are exercised.
+    """
+    rng = random.Random(seed)
+    duration = 3.0 * max(n_segments, n_turns)
+
+    spk_segments: List[Dict[str, Any]] = []
+    t = 0.0
+    step = duration / n_turns
+    for i in range(n_turns):
+        start = t + rng.uniform(0.0, 0.3 * step)
+        end = start + rng.uniform(0.5, 1.3) * step
+        spk_segments.append(
+            {"speaker_id": f"SPEAKER_0{i % 2}", "start": start, "end": end}
+        )
+        t += step
+    spk_segments.sort(key=lambda s: s["start"])
+
+    segments: List[Dict[str, Any]] = []
+    t = 0.0
+    step = duration / n_segments
+    for _ in range(n_segments):
+        start = t + rng.uniform(0.0, 0.2 * step)
+        end = start + rng.uniform(0.3, 1.0) * step
+        n_words = rng.randint(1, 25)
+        segments.append(
+            {
+                "start": start,
+                "end": end,
+                "text": " ".join(f"wort{k}" for k in range(n_words)),
+            }
+        )
+        t += step
+
+    return segments, spk_segments
+
+
+def assign_with_linear_scan(
+    segments: List[Dict[str, Any]],
+    spk_segments: List[Dict[str, Any]],
+) -> List[Dict[str, Any]]:
+    """The previous O(N*M) behaviour, for timing and equality checks."""
+    scan = LinearTurnScan(spk_segments)
+    out: List[Dict[str, Any]] = []
+    for seg in segments:
+        out.extend(split_segment_by_speaker(seg, spk_segments, scan))
+    out.sort(key=lambda s: s["start"])
+    return out
+
+
+def _timed(fn, *args) -> Tuple[float, Any]:
+    t0 = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - t0, result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Benchmark interval-index vs. nested-scan speaker assignment.",
+    )
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=[1000, 2000, 5000, 10000],
+        help="number of segments and turns per run (N x N)",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--max-linear",
+        type=int,
+        default=10000,
+        help="skip the slow linear scan above this size",
+    )
+    args = parser.parse_args()
+
+    print(f"{'size':>8} {'index [s]':>10} {'linear [s]':>11} {'speedup':>8}  identical")
+    for n in args.sizes:
+        segments, spk_segments = make_synthetic_call(n, n, seed=args.seed)
+
+        t_index, indexed = _timed(assign_speakers_to_segments, segments, spk_segments)
+
+        if n > args.max_linear:
+            print(f"{n:>8} {t_index:>10.3f} {'-':>11} {'-':>8}  -")
+            continue
+
+        t_linear, linear = _timed(assign_with_linear_scan, segments, spk_segments)
+        identical = indexed == linear
+        print(
+            f"{n:>8} {t_index:>10.3f} {t_linear:>11.3f} "
+            f"{t_linear / t_index:>7.1f}x  {identical}"
+        )
+        if not identical:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,14 @@
 # diarize_only.py
 
 import os
+import sys
 from pyannote.audio import Pipeline
 import torchaudio
 
+from segment_store import OUTPUT_FORMATS, SegmentTableBuilder, encode_result
 
-def main(audio_path: str):
+
+def main(audio_path: str, fmt: str = "json"):
     hf_token = os.getenv("HF_TOKEN")
     if hf_token is None:
         raise RuntimeError(
@@ -24,6 +27,15 @@ def main(audio_path: str):
 
     # NEW: call pipeline → DiarizeOutput
     output = pipeline(audio_dict)
+
+    if fmt != "json":
+        # binary result only on stdout: columnar speaker turns
+        spk_segments = SegmentTableBuilder(text_key=None)
+        for turn, speaker in output.speaker_diarization:
+            spk_segments.append({"start": turn.start, "end": turn.end, "speaker_id": speaker})
+        sys.stdout.buffer.write(encode_result({"spk_segments": spk_segments.build()}, fmt))
+        return
+
     print(output.json().keys())
     print(output)
 
@@ -33,10 +45,17 @@ def main(audio_path: str):
 
 
 if __name__ == "__main__":
-    import sys
-
-    if len(sys.argv) < 2:
-        print("Usage: python diarize_only.py path/to/audio.mp3")
-        raise SystemExit(1)
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Speaker diarization only.")
+    parser.add_argument("audio_file", help="path/to/audio.mp3")
+    parser.add_argument(
+        "--format",
+        choices=OUTPUT_FORMATS,
+        default="json",
+        help="json (default): the readable turn listing; msgpack / arrow: columnar "
+             "speaker turns on stdout",
+    )
+    args = parser.parse_args()
 
-    main(sys.argv[1])
\ No newline at end of file
+    main(args.audio_file, args.format)
\ No newline at end of file
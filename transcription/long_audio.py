@@ -0,0 +1,190 @@
+# file: long_audio.py
+#
+# Helpers for the chunked mode of stt_with_diarization_new.py:
+# recordings are decoded once to a 16 kHz mono PCM WAV on disk (streamed,
+# never fully in memory), then read back in overlapping windows. Each
+# window is diarized on its own, so pyannote's local labels have to be
+# stitched into call-wide speaker ids; SpeakerStitcher does that from the
+# turns both windows see in their overlap (plus speaker embeddings when
+# the pipeline provides them).
+
+import wave
+from typing import Dict, Any, Iterator, List, NamedTuple, Optional
+
+import av
+import numpy as np
+
+
+def decode_to_wav(audio_path: str, wav_path: str, sample_rate: int = 16000) -> int:
+    """
+    Stream-decode any input PyAV understands into a mono 16-bit WAV at
+    `sample_rate`. Returns the number of samples written.
+    """
+    resampler = av.audio.resampler.AudioResampler(
+        format="s16",
+        layout="mono",
+        rate=sample_rate,
+    )
+    n_samples = 0
+
+    with av.open(audio_path, metadata_errors="ignore") as container, \
+            wave.open(wav_path, "wb") as out:
+        out.setnchannels(1)
+        out.setsampwidth(2)
+        out.setframerate(sample_rate)
+
+        def _write(frames) -> None:
+            nonlocal n_samples
+            for frame in frames:
+                pcm = frame.to_ndarray()
+                out.writeframes(pcm.tobytes())
+                n_samples += pcm.shape[-1]
+
+        for frame in container.decode(audio=0):
+            frame.pts = None  # let the resampler handle timestamps
+            _write(resampler.resample(frame))
+        _write(resampler.resample(None))  # flush
+
+    return n_samples
+
+
+class AudioWindow(NamedTuple):
+    start: float        # window start on the call timeline (s)
+    end: float          # window end (s)
+    keep_start: float   # results starting in [keep_start, keep_end) belong to this window
+    keep_end: float
+    samples: np.ndarray  # float32 mono samples of [start, end)
+
+
+def iter_windows(
+    wav_path: str,
+    chunk_seconds: float,
+    overlap_seconds: float,
+) -> Iterator[AudioWindow]:
+    """
+    Read a WAV written by decode_to_wav in overlapping windows. Only one
+    window is held in memory at a time. Neighbouring windows split their
+    overlap in the middle, so every instant is "kept" by exactly one window.
+    """
+    if overlap_seconds >= chunk_seconds:
+        raise ValueError("overlap_seconds must be smaller than chunk_seconds")
+
+    with wave.open(wav_path, "rb") as wf:
+        rate = wf.getframerate()
+        total = wf.getnframes() / rate
+        step = chunk_seconds - overlap_seconds
+        half_overlap = 0.5 * overlap_seconds
+
+        start = 0.0
+        while True:
+            end = min(start + chunk_seconds, total)
+            last = end >= total
+
+            first_frame = int(round(start * rate))
+            n_frames = int(round(end * rate)) - first_frame
+            wf.setpos(first_frame)
+            pcm = np.frombuffer(wf.readframes(n_frames), dtype=np.int16)
+
+            yield AudioWindow(
+                start=start,
+                end=end,
+                keep_start=0.0 if start == 0.0 else start + half_overlap,
+                keep_end=float("inf") if last else end - half_overlap,
+                samples=pcm.astype(np.float32) / 32768.0,
+            )
+
+            if last:
+                break
+            start += step
+
+
+def _cosine(a: np.ndarray, b: np.ndarray) -> float:
+    denom = float(np.linalg.norm(a) * np.linalg.norm(b))
+    return float(np.dot(a, b)) / denom if denom > 0 else -1.0
+
+
+class SpeakerStitcher:
+    """
+    Map per-window speaker labels onto call-wide ids.
+
+    1. Local speakers that talk in the overlap with the previous window get
+       the global id they overlap most with (greedy, largest overlap first).
+    2. Remaining local speakers are matched by cosine similarity of their
+       embedding to the running global centroids, if embeddings exist.
+    3. Otherwise they take a known global id not used in this window yet,
+       or a fresh one.
+    """
+
+    def __init__(self, min_similarity: float = 0.3):
+        self.min_similarity = min_similarity
+        self._prev_turns: List[Dict[str, Any]] = []
+        self._prev_end = float("-inf")
+        self._centroids: Dict[str, np.ndarray] = {}
+        self._known: List[str] = []
+
+    def relabel(
+        self,
+        turns: List[Dict[str, Any]],
+        window_start: float,
+        window_end: float,
+        embeddings: Optional[Dict[str, np.ndarray]] = None,
+    ) -> List[Dict[str, Any]]:
+        """`turns` use absolute times and local labels; returns relabeled copies."""
+        local_labels = sorted({t["speaker_id"] for t in turns})
+        mapping: Dict[str, str] = {}
+
+        # 1. temporal agreement in the overlap region
+        ov_start, ov_end = window_start, self._prev_end
+        if ov_end > ov_start:
+            scores: Dict[tuple, float] = {}
+            for t in turns:
+                a_start = max(t["start"], ov_start)
+                a_end = min(t["end"], ov_end)
+                if a_end <= a_start:
+                    continue
+                for p in self._prev_turns:
+                    o = min(a_end, p["end"]) - max(a_start, p["start"])
+                    if o > 0:
+                        key = (t["speaker_id"], p["speaker_id"])
+                        scores[key] = scores.get(key, 0.0) + o
+            for (local, glob), _ in sorted(scores.items(), key=lambda kv: -kv[1]):
+                if local not in mapping and glob not in mapping.values():
+                    mapping[local] = glob
+
+        # 2. embedding similarity
+        if embeddings:
+            for local in local_labels:
+                if local in mapping or local not in embeddings:
+                    continue
+                best, best_sim = None, self.min_similarity
+                for glob, centroid in self._centroids.items():
+                    if glob in mapping.values():
+                        continue
+                    sim = _cosine(embeddings[local], centroid)
+                    if sim > best_sim:
+                        best, best_sim = glob, sim
+                if best is not None:
+                    mapping[local] = best
+
+        # 3. unused known ids, then fresh ones
+        for local in local_labels:
+            if local in mapping:
+                continue
+            unused = [g for g in self._known if g not in mapping.values()]
+            if unused:
+                mapping[local] = unused[0]
+            else:
+                mapping[local] = f"SPEAKER_{len(self._known):02d}"
+                self._known.append(mapping[local])
+
+        if embeddings:
+            for local, glob in mapping.items():
+                if local in embeddings:
+                    emb = np.asarray(embeddings[local], dtype=np.float64)
+                    prev = self._centroids.get(glob)
+                    self._centroids[glob] = emb if prev is None else 0.5 * (prev + emb)
+
+        relabeled = [dict(t, speaker_id=mapping[t["speaker_id"]]) for t in turns]
+        self._prev_turns = relabeled
+        self._prev_end = window_end
+        return relabeled
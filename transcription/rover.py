@@ -0,0 +1,130 @@
+# file: rover.py
+#
+# ROVER-style fusion of several transcripts of the same audio:
+# the hypotheses are aligned word by word into one word transition network
+# (one column per aligned position, a gap where a hypothesis has no word),
+# and every column is decided by weighted vote. The share of the vote the
+# winning word got is its confidence.
+#
+#   fuse([["ich", "kaufe", "zehn"], ["ich", "kaufe", "zehn"], ["ich", "laufe", "zehn"]])
+#   -> [{"word": "ich", "confidence": 1.0}, {"word": "kaufe", "confidence": 0.67}, ...]
+
+import re
+from difflib import SequenceMatcher
+from typing import Any, Dict, List, Optional, Sequence
+
+
+_PUNCT = re.compile(r"[^\w]+")
+
+GAP = None   # "no word here" in a network column
+
+
+def norm_word(word: str) -> str:
+    """Comparison key: case and punctuation don't make two words different."""
+    return _PUNCT.sub("", word.lower())
+
+
+def _substitution_cost(key: str, column_keys: set) -> float:
+    """0 for a match, otherwise 0.5..1 depending on spelling similarity, so
+    "laufen" lines up with "kaufen" rather than with an unrelated word."""
+    if key in column_keys:
+        return 0.0
+    best = max((SequenceMatcher(None, key, other).ratio() for other in column_keys), default=0.0)
+    return 1.0 - 0.5 * best
+
+
+def _align(
+    columns: List[List[Optional[str]]],
+    words: Sequence[str],
+    n_prev: int,
+) -> List[List[Optional[str]]]:
+    """
+    Add one hypothesis to the network with a Levenshtein alignment against
+    the columns (a word matches a column if any earlier hypothesis has the
+    same normalized word there; near-misses are cheaper substitutions).
+    `n_prev` is the number of hypotheses already aligned; the network has no
+    columns yet if they were all empty, so it can't be read off the columns.
+    Returns the new network; every column gets exactly one more entry.
+    """
+    keys = [{norm_word(w) for w in col if w is not GAP} for col in columns]
+    word_keys = [norm_word(w) for w in words]
+    rows, cols = len(columns), len(words)
+
+    # cost[i][j]: best alignment of the first i columns with the first j words
+    cost = [[0.0] * (cols + 1) for _ in range(rows + 1)]
+    sub = [[0.0] * (cols + 1) for _ in range(rows + 1)]
+    for i in range(1, rows + 1):
+        cost[i][0] = float(i)
+    for j in range(1, cols + 1):
+        cost[0][j] = float(j)
+    for i in range(1, rows + 1):
+        for j in range(1, cols + 1):
+            sub[i][j] = _substitution_cost(word_keys[j - 1], keys[i - 1])
+            cost[i][j] = min(
+                cost[i - 1][j - 1] + sub[i][j],   # word into this column
+                cost[i - 1][j] + 1,               # column gets a gap
+                cost[i][j - 1] + 1,               # word gets a new column
+            )
+
+    # backtrack
+    eps = 1e-9
+    out: List[List[Optional[str]]] = []
+    i, j = rows, cols
+    while i > 0 or j > 0:
+        if i > 0 and j > 0 and abs(cost[i][j] - (cost[i - 1][j - 1] + sub[i][j])) < eps:
+            out.append(columns[i - 1] + [words[j - 1]])
+            i, j = i - 1, j - 1
+            continue
+        if i > 0 and abs(cost[i][j] - (cost[i - 1][j] + 1)) < eps:
+            out.append(columns[i - 1] + [GAP])
+            i -= 1
+        else:
+            out.append([GAP] * n_prev + [words[j - 1]])
+            j -= 1
+    out.reverse()
+    return out
+
+
+def build_network(hypotheses: Sequence[Sequence[str]]) -> List[List[Optional[str]]]:
+    """Columns of the word transition network; column[k] is hypothesis k's word (or GAP)."""
+    columns: List[List[Optional[str]]] = []
+    for k, words in enumerate(hypotheses):
+        columns = _align(columns, words, k)
+    return columns
+
+
+def fuse(
+    hypotheses: Sequence[Sequence[str]],
+    weights: Optional[Sequence[float]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Consensus word sequence with per-word confidence. Hypotheses should be
+    ordered best first: ties go to the earlier one, and it also provides
+    the spelling of the winning word. Columns won by GAP are dropped.
+    """
+    hypotheses = [list(h) for h in hypotheses]
+    if not hypotheses:
+        return []
+    if weights is None:
+        weights = [1.0] * len(hypotheses)
+    total = float(sum(weights)) or 1.0
+
+    consensus: List[Dict[str, Any]] = []
+    for column in build_network(hypotheses):
+        votes: Dict[Optional[str], float] = {}
+        spelling: Dict[Optional[str], Optional[str]] = {}
+        order: Dict[Optional[str], int] = {}
+        for k, word in enumerate(column):
+            key = GAP if word is GAP else norm_word(word)
+            votes[key] = votes.get(key, 0.0) + weights[k]
+            spelling.setdefault(key, word)
+            order.setdefault(key, k)
+
+        winner = max(votes, key=lambda key: (votes[key], -order[key]))
+        if winner is GAP:
+            continue
+        consensus.append({
+            "word": spelling[winner],
+            "confidence": round(votes[winner] / total, 3),
+        })
+    return consensus
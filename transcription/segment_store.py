@@ -0,0 +1,348 @@
+# file: segment_store.py
+#
+# Columnar storage for speaker segments, words and diarization turns, and
+# its encodings (streamed JSON, msgpack, Arrow IPC).
+#
+# A long call has tens of thousands of segments/words; as Python dicts each
+# one costs a few hundred bytes plus a float object per timestamp. Here
+# every column is one packed array (float64 start/end, int16 speaker code)
+# and speaker ids are interned once in a small table. Texts are kept as one
+# UTF-8 blob with offsets, so serialization is a handful of buffer copies
+# instead of one JSON object per segment.
+#
+#   builder = SegmentTableBuilder()                  # rows appended as they arrive
+#   builder.append(seg); table = builder.build()
+#   dump_json({"segments_with_speaker": table}, sys.stdout)   # rows streamed
+#   sys.stdout.buffer.write(encode_result(result, "msgpack")) # needs msgpack
+#   sys.stdout.buffer.write(encode_result(result, "arrow"))   # needs pyarrow
+#
+# Rows keep start / end / speaker_id / text (or "word" for word tables);
+# other keys of the input dicts are not stored.
+
+import sys
+import json
+from array import array
+from typing import Any, Dict, IO, Iterable, Iterator, List, Optional
+
+import numpy as np
+
+
+FORMAT_VERSION = "segments-columnar/1"
+
+OUTPUT_FORMATS = ("json", "msgpack", "arrow")
+
+# speaker code for rows without a speaker (e.g. chunked mode without turns)
+NO_SPEAKER = -1
+
+
+class SpeakerTable:
+    """speaker_id <-> small integer code, each id stored once."""
+
+    __slots__ = ("labels", "_codes")
+
+    def __init__(self, labels: Iterable[str] = ()):
+        self.labels: List[str] = []
+        self._codes: Dict[str, int] = {}
+        for label in labels:
+            self.code(label)
+
+    def code(self, speaker_id: Optional[str]) -> int:
+        if speaker_id is None:
+            return NO_SPEAKER
+        code = self._codes.get(speaker_id)
+        if code is None:
+            code = len(self.labels)
+            self._codes[speaker_id] = code
+            self.labels.append(sys.intern(speaker_id))
+        return code
+
+    def label(self, code: int) -> Optional[str]:
+        return None if code == NO_SPEAKER else self.labels[code]
+
+
+class SegmentTable:
+    """
+    Rows as columns, read back as dicts on demand. `text_key` names the
+    text field ("text" for segments, "word" for words, None for
+    diarization turns); `with_speaker` whether rows carry a speaker_id.
+    """
+
+    __slots__ = (
+        "speakers", "start", "end", "speaker", "text_offsets", "text_blob",
+        "text_key", "with_speaker",
+    )
+
+    def __init__(
+        self,
+        speakers: SpeakerTable,
+        start: np.ndarray,
+        end: np.ndarray,
+        speaker: np.ndarray,
+        text_offsets: np.ndarray,
+        text_blob: bytes,
+        text_key: Optional[str] = "text",
+        with_speaker: bool = True,
+    ):
+        self.speakers = speakers
+        self.start = start
+        self.end = end
+        self.speaker = speaker
+        self.text_offsets = text_offsets   # len(self) + 1 byte offsets into text_blob
+        self.text_blob = text_blob
+        self.text_key = text_key
+        self.with_speaker = with_speaker
+
+    @classmethod
+    def from_segments(
+        cls,
+        segments: Iterable[Dict[str, Any]],
+        text_key: Optional[str] = "text",
+        with_speaker: bool = True,
+    ) -> "SegmentTable":
+        builder = SegmentTableBuilder(text_key, with_speaker)
+        builder.extend(segments)
+        return builder.build()
+
+    def __len__(self) -> int:
+        return len(self.start)
+
+    def text(self, i: int) -> str:
+        return self.text_blob[self.text_offsets[i]:self.text_offsets[i + 1]].decode("utf-8")
+
+    def __getitem__(self, i: int) -> Dict[str, Any]:
+        row: Dict[str, Any] = {"start": float(self.start[i]), "end": float(self.end[i])}
+        if self.text_key is not None:
+            row[self.text_key] = self.text(i)
+        if self.with_speaker:
+            row["speaker_id"] = self.speakers.label(int(self.speaker[i]))
+        return row
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for i in range(len(self)):
+            yield self[i]
+
+    def to_dicts(self) -> List[Dict[str, Any]]:
+        return list(self)
+
+    @property
+    def nbytes(self) -> int:
+        return (
+            self.start.nbytes + self.end.nbytes + self.speaker.nbytes
+            + self.text_offsets.nbytes + len(self.text_blob)
+        )
+
+    # ----- binary formats -----
+
+    def to_columns(self) -> Dict[str, Any]:
+        """
+        The table as one msgpack-ready map; numeric columns are raw
+        little-endian buffers:
+        {"format", "text_key", "with_speaker", "speakers": [...],
+         "start": f8[], "end": f8[], "speaker": i2[], "text_offsets": i8[],
+         "text": utf-8 bytes}
+        """
+        return {
+            "format": FORMAT_VERSION,
+            "text_key": self.text_key,
+            "with_speaker": self.with_speaker,
+            "speakers": self.speakers.labels,
+            "start": self.start.astype("<f8", copy=False).tobytes(),
+            "end": self.end.astype("<f8", copy=False).tobytes(),
+            "speaker": self.speaker.astype("<i2", copy=False).tobytes(),
+            "text_offsets": self.text_offsets.astype("<i8", copy=False).tobytes(),
+            "text": self.text_blob,
+        }
+
+    @classmethod
+    def from_columns(cls, columns: Dict[str, Any]) -> "SegmentTable":
+        if columns.get("format") != FORMAT_VERSION:
+            raise ValueError(f"unsupported segment format: {columns.get('format')!r}")
+        return cls(
+            SpeakerTable(columns["speakers"]),
+            np.frombuffer(columns["start"], dtype="<f8"),
+            np.frombuffer(columns["end"], dtype="<f8"),
+            np.frombuffer(columns["speaker"], dtype="<i2"),
+            np.frombuffer(columns["text_offsets"], dtype="<i8"),
+            columns["text"],
+            columns.get("text_key", "text"),
+            columns.get("with_speaker", True),
+        )
+
+    def to_msgpack(self, extra: Optional[Dict[str, Any]] = None) -> bytes:
+        """to_columns() (plus `extra` keys) packed into one msgpack map."""
+        import msgpack
+
+        payload = self.to_columns()
+        if extra:
+            payload.update(extra)
+        return msgpack.packb(payload, use_bin_type=True)
+
+    @classmethod
+    def from_msgpack(cls, data: bytes) -> "SegmentTable":
+        import msgpack
+
+        return cls.from_columns(msgpack.unpackb(data, raw=False))
+
+    def to_arrow_ipc(self, extra: Optional[Dict[str, Any]] = None) -> bytes:
+        """
+        Arrow IPC stream with one record batch; speaker is dictionary-encoded,
+        `extra` goes into the schema metadata as JSON.
+        """
+        import pyarrow as pa
+
+        arrays = [pa.array(self.start), pa.array(self.end)]
+        names = ["start", "end"]
+        if self.with_speaker:
+            arrays.append(pa.DictionaryArray.from_arrays(
+                pa.array(self.speaker, mask=self.speaker == NO_SPEAKER),
+                pa.array(self.speakers.labels, type=pa.string()),
+            ))
+            names.append("speaker_id")
+        if self.text_key is not None:
+            offsets = self.text_offsets.astype(np.int64, copy=False)
+            arrays.append(pa.LargeStringArray.from_buffers(
+                len(self), pa.py_buffer(offsets.tobytes()), pa.py_buffer(self.text_blob),
+            ))
+            names.append(self.text_key)
+
+        batch = pa.record_batch(arrays, names=names)
+        metadata = {"format": FORMAT_VERSION}
+        if extra:
+            metadata["extra"] = json.dumps(extra, ensure_ascii=False)
+        batch = batch.replace_schema_metadata(metadata)
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, batch.schema) as writer:
+            writer.write_batch(batch)
+        return sink.getvalue().to_pybytes()
+
+
+class SegmentTableBuilder:
+    """
+    Appends rows straight into packed arrays, so a table can be filled
+    while the pipeline produces segments and no dict list is kept.
+    """
+
+    __slots__ = ("text_key", "with_speaker", "_speakers", "_start", "_end",
+                 "_speaker", "_offsets", "_blob")
+
+    def __init__(self, text_key: Optional[str] = "text", with_speaker: bool = True):
+        self.text_key = text_key
+        self.with_speaker = with_speaker
+        self._speakers = SpeakerTable()
+        self._start = array("d")
+        self._end = array("d")
+        self._speaker = array("h")
+        self._offsets = array("q", [0])
+        self._blob = bytearray()
+
+    def __len__(self) -> int:
+        return len(self._start)
+
+    def append(self, seg: Dict[str, Any]) -> None:
+        self._start.append(seg["start"])
+        self._end.append(seg["end"])
+        self._speaker.append(
+            self._speakers.code(seg.get("speaker_id")) if self.with_speaker else NO_SPEAKER
+        )
+        if self.text_key is not None:
+            self._blob += seg[self.text_key].encode("utf-8")
+        self._offsets.append(len(self._blob))
+
+    def extend(self, segments: Iterable[Dict[str, Any]]) -> None:
+        for seg in segments:
+            self.append(seg)
+
+    def build(self) -> SegmentTable:
+        return SegmentTable(
+            self._speakers,
+            np.frombuffer(self._start, dtype=np.float64),
+            np.frombuffer(self._end, dtype=np.float64),
+            np.frombuffer(self._speaker, dtype=np.int16),
+            np.frombuffer(self._offsets, dtype=np.int64),
+            bytes(self._blob),
+            self.text_key,
+            self.with_speaker,
+        )
+
+
+# -------------------------
+# Results with tables inside
+# -------------------------
+
+# result keys holding rows, and how their tables are laid out
+ROW_KEYS: Dict[str, Dict[str, Any]] = {
+    "segments_with_speaker": {"text_key": "text", "with_speaker": True},
+    "turns": {"text_key": "text", "with_speaker": True},
+    "segments": {"text_key": "text", "with_speaker": False},
+    "words": {"text_key": "word", "with_speaker": False},
+    "spk_segments": {"text_key": None, "with_speaker": True},
+}
+
+
+def to_plain(value: Any) -> Any:
+    """Copy of a result with every SegmentTable turned back into a dict list."""
+    if isinstance(value, SegmentTable):
+        return value.to_dicts()
+    if isinstance(value, dict):
+        return {k: to_plain(v) for k, v in value.items()}
+    return value
+
+
+def dump_json(value: Any, fp: IO[str]) -> None:
+    """
+    json.dump for results that contain SegmentTables: table rows are
+    encoded and written one at a time instead of building the whole list
+    (and the whole JSON string) first.
+    """
+    if isinstance(value, SegmentTable):
+        fp.write("[")
+        for i, row in enumerate(value):
+            if i:
+                fp.write(", ")
+            fp.write(json.dumps(row, ensure_ascii=False))
+        fp.write("]")
+    elif isinstance(value, dict):
+        fp.write("{")
+        for i, (key, item) in enumerate(value.items()):
+            if i:
+                fp.write(", ")
+            fp.write(json.dumps(str(key), ensure_ascii=False) + ": ")
+            dump_json(item, fp)
+        fp.write("}")
+    else:
+        json.dump(value, fp, ensure_ascii=False)
+
+
+def encode_result(result: Dict[str, Any], fmt: str) -> bytes:
+    """
+    Result dict -> msgpack / Arrow IPC bytes. Dict lists under the usual
+    keys are converted to tables first.
+
+    msgpack: one map, every table as its to_columns() map under its key,
+    the other keys as they are.
+    Arrow: one IPC stream holds one table, so the table with the most rows
+    is written as the record batch (metadata "rows" names its key) and the
+    rest of the result, smaller tables included, goes into the schema
+    metadata as JSON.
+    """
+    result = {
+        k: SegmentTable.from_segments(v, **ROW_KEYS[k]) if k in ROW_KEYS and isinstance(v, list) else v
+        for k, v in result.items()
+    }
+    if fmt == "msgpack":
+        import msgpack
+
+        payload: Dict[str, Any] = {"format": FORMAT_VERSION}
+        for k, v in result.items():
+            payload[k] = v.to_columns() if isinstance(v, SegmentTable) else v
+        return msgpack.packb(payload, use_bin_type=True)
+    if fmt == "arrow":
+        tables = [k for k, v in result.items() if isinstance(v, SegmentTable)]
+        if not tables:
+            raise ValueError("result has no segment table to write as Arrow")
+        rows = max(tables, key=lambda k: len(result[k]))
+        extra = to_plain({k: v for k, v in result.items() if k != rows})
+        extra["rows"] = rows
+        return result[rows].to_arrow_ipc(extra)
+    raise ValueError(f"format must be one of {OUTPUT_FORMATS[1:]}, got {fmt!r}")
+
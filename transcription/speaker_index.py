@@ -0,0 +1,193 @@
+# file: speaker_index.py
+#
+# Interval lookups over pyannote speaker turns.
+#
+# Both diarization scripts need, for every Whisper segment, the speaker
+# turns overlapping it (and, if there are none, the turn whose center is
+# closest). Scanning all turns for every segment is O(N*M); the index below
+# answers each query with a couple of bisects plus the actual matches.
+#
+# Results are returned in the original list order and ties are broken the
+# same way as the plain loops, so swapping the index in does not change
+# the output.
+#
+# TurnPointLookup is the NumPy counterpart for point lookups (one speaker
+# per word midpoint), used by the word-level alignment mode.
+
+from bisect import bisect_left, bisect_right
+from typing import Dict, Any, List, Tuple
+
+import numpy as np
+
+
+# (index into spk_segments, overlap start, overlap end)
+Overlap = Tuple[int, float, float]
+
+
+class SpeakerTurnIndex:
+    """Sorted-interval index over a list of {"start", "end", "speaker_id"} dicts."""
+
+    def __init__(self, spk_segments: List[Dict[str, Any]]):
+        self.spk_segments = spk_segments
+
+        # turns ordered by start; prefix maximum of the ends lets us skip
+        # every turn that ended before a query starts, even when turns
+        # overlap each other (pyannote can emit overlapping speech)
+        self._order = sorted(
+            range(len(spk_segments)), key=lambda i: (spk_segments[i]["start"], i)
+        )
+        self._starts = [spk_segments[i]["start"] for i in self._order]
+        self._max_ends: List[float] = []
+        running = float("-inf")
+        for i in self._order:
+            running = max(running, spk_segments[i]["end"])
+            self._max_ends.append(running)
+
+        centers = sorted(
+            (0.5 * (s["start"] + s["end"]), i) for i, s in enumerate(spk_segments)
+        )
+        self._center_values = [c for c, _ in centers]
+        self._center_ids = [i for _, i in centers]
+
+    def overlapping(self, start: float, end: float) -> List[Overlap]:
+        """All turns with a positive overlap with [start, end], in list order."""
+        lo = bisect_right(self._max_ends, start)
+        hi = bisect_left(self._starts, end)
+
+        found: List[Overlap] = []
+        for k in range(lo, hi):
+            i = self._order[k]
+            spk_seg = self.spk_segments[i]
+            o_start = max(start, spk_seg["start"])
+            o_end = min(end, spk_seg["end"])
+            if o_end > o_start:
+                found.append((i, o_start, o_end))
+
+        found.sort(key=lambda o: o[0])
+        return found
+
+    def nearest(self, start: float, end: float) -> Dict[str, Any]:
+        """
+        Turn whose center is closest to the center of [start, end]; on ties
+        the one that comes first in the list (same as min() over the list).
+        """
+        if not self._center_values:
+            raise ValueError("nearest() on an empty speaker index")
+
+        mid = 0.5 * (start + end)
+        values = self._center_values
+        pos = bisect_left(values, mid)
+
+        best = float("inf")
+        if pos > 0:
+            best = min(best, abs(values[pos - 1] - mid))
+        if pos < len(values):
+            best = min(best, abs(values[pos] - mid))
+
+        # ties sit in contiguous runs on both sides of `pos`
+        best_id = len(self.spk_segments)
+        k = pos - 1
+        while k >= 0 and abs(values[k] - mid) == best:
+            best_id = min(best_id, self._center_ids[k])
+            k -= 1
+        k = pos
+        while k < len(values) and abs(values[k] - mid) == best:
+            best_id = min(best_id, self._center_ids[k])
+            k += 1
+
+        return self.spk_segments[best_id]
+
+
+class LinearTurnScan:
+    """
+    Reference implementation with the original full scans.
+    Same interface as SpeakerTurnIndex; used by the benchmark to check
+    that both produce identical output.
+    """
+
+    def __init__(self, spk_segments: List[Dict[str, Any]]):
+        self.spk_segments = spk_segments
+
+    def overlapping(self, start: float, end: float) -> List[Overlap]:
+        found: List[Overlap] = []
+        for i, spk_seg in enumerate(self.spk_segments):
+            o_start = max(start, spk_seg["start"])
+            o_end = min(end, spk_seg["end"])
+            if o_end > o_start:
+                found.append((i, o_start, o_end))
+        return found
+
+    def nearest(self, start: float, end: float) -> Dict[str, Any]:
+        mid = 0.5 * (start + end)
+        return min(
+            self.spk_segments,
+            key=lambda s: abs(0.5 * (s["start"] + s["end"]) - mid),
+        )
+
+
+class TurnPointLookup:
+    """
+    Vectorized point lookup: index into spk_segments of the turn active at
+    each given time (e.g. word midpoints). The sorted arrays are built once,
+    so repeated lookups (one per streamed segment) stay cheap.
+
+    If several turns cover a point, the most recently started one wins
+    (falling back to the longest-running one when the latest turn already
+    ended). Points outside every turn get the turn with the nearest center.
+    """
+
+    def __init__(self, spk_segments: List[Dict[str, Any]]):
+        if len(spk_segments) == 0:
+            raise ValueError("TurnPointLookup needs at least one speaker turn")
+
+        n = len(spk_segments)
+        starts = np.fromiter((s["start"] for s in spk_segments), np.float64, n)
+        ends = np.fromiter((s["end"] for s in spk_segments), np.float64, n)
+
+        self._order = np.argsort(starts, kind="stable")
+        self._sorted_starts = starts[self._order]
+        self._sorted_ends = ends[self._order]
+
+        # for every prefix of the start-sorted turns: which turn reaches furthest
+        running_max = np.maximum.accumulate(self._sorted_ends)
+        is_new_max = np.empty(n, dtype=bool)
+        is_new_max[0] = True
+        is_new_max[1:] = self._sorted_ends[1:] > running_max[:-1]
+        self._furthest = np.maximum.accumulate(np.where(is_new_max, np.arange(n), 0))
+
+        centers = 0.5 * (starts + ends)
+        self._c_order = np.argsort(centers, kind="stable")
+        self._sorted_centers = centers[self._c_order]
+
+    def __call__(self, times: np.ndarray) -> np.ndarray:
+        times = np.asarray(times, dtype=np.float64)
+        sorted_ends = self._sorted_ends
+
+        pos = np.searchsorted(self._sorted_starts, times, side="right") - 1
+        has_prev = pos >= 0
+        pos_c = np.clip(pos, 0, None)
+
+        latest_covers = has_prev & (sorted_ends[pos_c] > times)
+        furthest_pos = self._furthest[pos_c]
+        furthest_covers = has_prev & (sorted_ends[furthest_pos] > times)
+
+        result = np.where(latest_covers, self._order[pos_c], self._order[furthest_pos])
+
+        uncovered = ~(latest_covers | furthest_covers)
+        if uncovered.any():
+            sorted_centers = self._sorted_centers
+            t = times[uncovered]
+            right = np.clip(np.searchsorted(sorted_centers, t), 0, len(sorted_centers) - 1)
+            left = np.clip(right - 1, 0, None)
+            take_left = np.abs(sorted_centers[left] - t) <= np.abs(sorted_centers[right] - t)
+            result[uncovered] = self._c_order[np.where(take_left, left, right)]
+
+        return result
+
+
+def turns_at_times(
+    spk_segments: List[Dict[str, Any]],
+    times: np.ndarray,
+) -> np.ndarray:
+    """One-off version of TurnPointLookup(spk_segments)(times)."""
+    return TurnPointLookup(spk_segments)(times)
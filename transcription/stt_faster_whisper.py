@@ -1,7 +1,11 @@
 # file: stt_faster_whisper.py
 
+import sys
+
 from faster_whisper import WhisperModel
-from typing import Dict, Any, List
+from typing import Dict, Any, TextIO
+
+from segment_store import OUTPUT_FORMATS, SegmentTableBuilder, dump_json, encode_result
 
 
 MODEL_SIZE = "medium"
@@ -18,13 +22,16 @@ model = WhisperModel(
 
 def transcribe_audio(
     audio_path: str,
-    language: str = "de"
+    language: str = "de",
+    log: TextIO = sys.stdout,
 ) -> Dict[str, Any]:
     """
     Transcribe audio file with faster-whisper and return
     segments + word-level timestamps (for later diarization alignment).
+    Segments and words are columnar SegmentTables (see segment_store.py),
+    filled while Whisper decodes.
 
-    Also prints each segment as it is produced.
+    Also prints each segment to `log` as it is produced.
     """
 
     segments, info = model.transcribe(
@@ -34,12 +41,12 @@ def transcribe_audio(
         word_timestamps=True
     )
 
-    segment_list: List[Dict[str, Any]] = []
-    word_list: List[Dict[str, Any]] = []
+    segment_list = SegmentTableBuilder(text_key="text", with_speaker=False)
+    word_list = SegmentTableBuilder(text_key="word", with_speaker=False)
 
     for seg in segments:
         # --- live-ish console output ---
-        print(f"[{seg.start:.2f} - {seg.end:.2f}] {seg.text.strip()}", flush=True)
+        print(f"[{seg.start:.2f} - {seg.end:.2f}] {seg.text.strip()}", file=log, flush=True)
 
         # --- collect segments for JSON result ---
         segment_list.append(
@@ -64,22 +71,34 @@ def transcribe_audio(
     return {
         "language": info.language,
         "language_probability": info.language_probability,
-        "segments": segment_list,
-        "words": word_list,
+        "segments": segment_list.build(),
+        "words": word_list.build(),
     }
 
 
 if __name__ == "__main__":
-    import sys
-    import json
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Transcribe with word timestamps.")
+    parser.add_argument("audio_file", help="path/to/audio.(wav|mp3)")
+    parser.add_argument("--language", default="de")
+    parser.add_argument(
+        "--format",
+        choices=OUTPUT_FORMATS,
+        default="json",
+        help="result format; msgpack / arrow write only the binary result to "
+             "stdout (segment lines go to stderr)",
+    )
+    args = parser.parse_args()
 
-    if len(sys.argv) < 2:
-        print("Usage: python stt_faster_whisper.py path/to/audio.(wav|mp3)", flush=True)
-        sys.exit(1)
+    if args.format != "json":
+        result = transcribe_audio(args.audio_file, language=args.language, log=sys.stderr)
+        sys.stdout.buffer.write(encode_result(result, args.format))
+        sys.exit(0)
 
-    audio_file = sys.argv[1]
-    result = transcribe_audio(audio_file, language="de")
+    result = transcribe_audio(args.audio_file, language=args.language)
 
     # final JSON output after all segments were printed
     print("\n--- JSON RESULT ---")
-    print(json.dumps(result, ensure_ascii=False, indent=2))
+    dump_json(result, sys.stdout)
+    sys.stdout.write("\n")
@@ -3,52 +3,143 @@ os.environ["TORCH_CPP_LOG_LEVEL"] = "ERROR"
 import warnings
 warnings.filterwarnings("ignore", category=UserWarning)
 
+import sys
 import json
-from typing import Dict, Any, List, Optional
+import time
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Tuple, Union
 
-from faster_whisper import WhisperModel
+import numpy as np
+from faster_whisper import WhisperModel, decode_audio
 from pyannote.audio import Pipeline
+import torch
 import torchaudio
 
+from long_audio import SpeakerStitcher, decode_to_wav, iter_windows
+from speaker_index import SpeakerTurnIndex, TurnPointLookup
+from transcript_cache import TranscriptCache, hash_audio_file, make_cache_key
+from vad import VAD_METHODS, SpeechMap, detect_speech, energy_speech_spans
+from rover import fuse
+from segment_store import OUTPUT_FORMATS, ROW_KEYS, SegmentTable, SegmentTableBuilder, dump_json, encode_result
+from turns import TurnBuilder, iter_turns, merge_segments_by_speaker
+
+# -------------------------
+# 0. Decode audio once
+# -------------------------
+
+SAMPLE_RATE = 16000  # what Whisper expects; pyannote resamples to 16 kHz too
+
+# Either a path (each stage decodes on its own) or the shared buffer
+# returned by load_audio.
+AudioInput = Union[str, np.ndarray]
+
+
+def load_audio(audio_path: str) -> np.ndarray:
+    """
+    Decode and resample the file a single time into one mono 16 kHz
+    float32 buffer that both Whisper and pyannote consume directly.
+    """
+    return decode_audio(audio_path, sampling_rate=SAMPLE_RATE)
+
+
+# Voice-activity pre-pass (see vad.py): "off", "energy" (NumPy) or
+# "silero" (faster-whisper's VAD). Silence, ringing and hold music are cut
+# out before Whisper and pyannote run; timestamps are mapped back to the
+# original recording and the result reports how much audio was skipped.
+VAD_MODES = ("off",) + VAD_METHODS
+VAD_MODE = os.getenv("STT_VAD", "off")
+
+
 # -------------------------
 # 1. Setup faster-whisper
 # -------------------------
 
-MODEL_SIZE = "medium"
+MODEL_SIZE = os.getenv("WHISPER_MODEL_SIZE", "medium")
+DEVICE = os.getenv("WHISPER_DEVICE", "cpu")      # change to "cuda" on GPU
+COMPUTE_TYPE = os.getenv("WHISPER_COMPUTE_TYPE", "float32")
+BEAM_SIZE = 5
+
+# Run Whisper and pyannote side by side (they only meet in
+# assign_speakers_to_segments). Both release the GIL during inference, so
+# plain threads are enough; the CPU cores are split between the two stages
+# so they don't oversubscribe each other.
+PARALLEL_STAGES = os.getenv("STT_PARALLEL", "1") == "1"
+_CPU_COUNT = os.cpu_count() or 1
+_DEFAULT_STAGE_THREADS = max(1, _CPU_COUNT // 2) if PARALLEL_STAGES else _CPU_COUNT
+WHISPER_CPU_THREADS = int(os.getenv("WHISPER_CPU_THREADS", str(_DEFAULT_STAGE_THREADS)))
+DIARIZATION_THREADS = int(os.getenv("DIARIZATION_THREADS", str(_DEFAULT_STAGE_THREADS)))
 
-whisper_model = WhisperModel(
-    MODEL_SIZE,
-    device="cpu",      # change to "cuda" on GPU
-    compute_type="float32"
-)
+_whisper_model: Optional[WhisperModel] = None
 
 
-def transcribe_segments(audio_path: str, language: str = "de") -> Dict[str, Any]:
+def get_whisper_model() -> WhisperModel:
     """
-    Transcribe audio file with faster-whisper and return
-    only segment-level timestamps + text.
-    We don't need word-level timestamps for speaker mapping now.
+    Load the faster-whisper model on first use and keep it for the
+    lifetime of the process, so the worker mode pays the load only once.
     """
-    segments, info = whisper_model.transcribe(
-        audio_path,
+    global _whisper_model
+    if _whisper_model is None:
+        _whisper_model = WhisperModel(
+            MODEL_SIZE,
+            device=DEVICE,
+            compute_type=COMPUTE_TYPE,
+            cpu_threads=WHISPER_CPU_THREADS,
+        )
+    return _whisper_model
+
+
+def iter_transcribed_segments(
+    audio: AudioInput,
+    language: str = "de",
+    word_timestamps: bool = False,
+) -> Tuple[Iterator[Dict[str, Any]], Any]:
+    """
+    Lazy version of transcribe_segments: returns (segments, info) where
+    `segments` yields each segment dict as soon as Whisper finishes it.
+    """
+    segments, info = get_whisper_model().transcribe(
+        audio,
         language=language,
-        beam_size=5,
-        word_timestamps=False,   # IMPORTANT: we only use segments now
+        beam_size=BEAM_SIZE,
+        word_timestamps=word_timestamps,
     )
 
-    segment_list: List[Dict[str, Any]] = []
+    def _entries() -> Iterator[Dict[str, Any]]:
+        for seg in segments:
+            # live-ish console output
+           # print(f"[{seg.start:.2f} - {seg.end:.2f}] {seg.text.strip()}", flush=True)
 
-    for seg in segments:
-        # live-ish console output
-       # print(f"[{seg.start:.2f} - {seg.end:.2f}] {seg.text.strip()}", flush=True)
-
-        segment_list.append(
-            {
+            entry: Dict[str, Any] = {
                 "start": float(seg.start),
                 "end": float(seg.end),
                 "text": seg.text.strip(),
             }
-        )
+            if word_timestamps:
+                entry["words"] = [
+                    {"start": float(w.start), "end": float(w.end), "word": w.word}
+                    for w in (seg.words or [])
+                ]
+            yield entry
+
+    return _entries(), info
+
+
+def transcribe_segments(
+    audio: AudioInput,
+    language: str = "de",
+    word_timestamps: bool = False,
+) -> Dict[str, Any]:
+    """
+    Transcribe audio file (or decoded 16 kHz buffer) with faster-whisper
+    and return segment-level timestamps + text.
+
+    Word timestamps are only needed for the word-level alignment mode;
+    they cost an extra alignment pass inside faster-whisper, so the
+    default segment mode leaves them off.
+    """
+    segments, info = iter_transcribed_segments(audio, language, word_timestamps)
+    segment_list: List[Dict[str, Any]] = list(segments)
 
     return {
         "language": info.language,
@@ -68,25 +159,42 @@ if HF_TOKEN is None:
         "Create a Hugging Face token and export HF_TOKEN before running."
     )
 
-diarization_pipeline = Pipeline.from_pretrained(
-    "pyannote/speaker-diarization-community-1",
-    token=HF_TOKEN,
-)
+DIARIZATION_MODEL = "pyannote/speaker-diarization-community-1"
 
+_diarization_pipeline: Optional[Pipeline] = None
 
-def diarize_audio(audio_path: str) -> List[Dict[str, Any]]:
-    """
-    Run pyannote diarization and return a list of speaker segments.
 
-    We treat all calls as 2-person conversations (advisor + client), so we
-    fix the number of speakers to 2 via min_speakers / max_speakers.
-    Uses torchaudio to load the waveform to avoid torchcodec/FFmpeg issues.
+def get_diarization_pipeline() -> Pipeline:
+    """Load the pyannote pipeline on first use and cache it (see get_whisper_model)."""
+    global _diarization_pipeline
+    if _diarization_pipeline is None:
+        # torch intra-op threads are process-wide; Whisper (CTranslate2)
+        # has its own pool sized by WHISPER_CPU_THREADS.
+        torch.set_num_threads(DIARIZATION_THREADS)
+        _diarization_pipeline = Pipeline.from_pretrained(
+            DIARIZATION_MODEL,
+            token=HF_TOKEN,
+        )
+    return _diarization_pipeline
+
+
+def diarize_audio_with_embeddings(
+    audio: AudioInput,
+) -> Tuple[List[Dict[str, Any]], Optional[Dict[str, np.ndarray]]]:
     """
-    waveform, sample_rate = torchaudio.load(audio_path)
+    Same as diarize_audio, but also returns one embedding per speaker
+    label (or None if the pipeline output has none). The chunked mode uses
+    them to keep speaker ids consistent across windows.
+    """
+    if isinstance(audio, np.ndarray):
+        waveform = torch.from_numpy(audio).unsqueeze(0)
+        sample_rate = SAMPLE_RATE
+    else:
+        waveform, sample_rate = torchaudio.load(audio)
     audio_dict = {"waveform": waveform, "sample_rate": sample_rate}
 
     # Two-person call: enforce exactly 2 speakers
-    output = diarization_pipeline(
+    output = get_diarization_pipeline()(
         audio_dict,
         min_speakers=2,
         max_speakers=2,
@@ -104,6 +212,31 @@ def diarize_audio(audio_path: str) -> List[Dict[str, Any]]:
 
     # sort by start time just in case
     spk_segments.sort(key=lambda s: s["start"])
+
+    embeddings: Optional[Dict[str, np.ndarray]] = None
+    raw_embeddings = getattr(output, "speaker_embeddings", None)
+    if raw_embeddings is not None:
+        labels = output.speaker_diarization.labels()
+        embeddings = {
+            label: np.asarray(raw_embeddings[i])
+            for i, label in enumerate(labels)
+            if i < len(raw_embeddings)
+        }
+
+    return spk_segments, embeddings
+
+
+def diarize_audio(audio: AudioInput) -> List[Dict[str, Any]]:
+    """
+    Run pyannote diarization and return a list of speaker segments.
+
+    We treat all calls as 2-person conversations (advisor + client), so we
+    fix the number of speakers to 2 via min_speakers / max_speakers.
+    A decoded buffer from load_audio is wrapped as a (1, n) tensor view
+    without copying; a path is loaded with torchaudio to avoid
+    torchcodec/FFmpeg issues.
+    """
+    spk_segments, _ = diarize_audio_with_embeddings(audio)
     return spk_segments
 
 
@@ -121,13 +254,18 @@ def _overlap(a_start: float, a_end: float, b_start: float, b_end: float) -> floa
 def split_segment_by_speaker(
     seg: Dict[str, Any],
     spk_segments: List[Dict[str, Any]],
+    index: Optional[SpeakerTurnIndex] = None,
 ) -> List[Dict[str, Any]]:
     """Split a single Whisper segment into multiple chunks
     whenever different speakers occur inside its time range.
 
     Text is divided approximately proportionally to the duration
-    of each speaker's overlap with the segment.
+    of each speaker's overlap with the segment. Pass a prebuilt
+    SpeakerTurnIndex when splitting many segments against the same turns.
     """
+    if index is None:
+        index = SpeakerTurnIndex(spk_segments)
+
     seg_start = seg["start"]
     seg_end = seg["end"]
     text = seg["text"]
@@ -137,27 +275,19 @@ def split_segment_by_speaker(
         return []
 
     # Collect all diarization chunks that overlap this Whisper segment
-    overlaps: List[Dict[str, Any]] = []
-    for spk_seg in spk_segments:
-        o_start = max(seg_start, spk_seg["start"])
-        o_end = min(seg_end, spk_seg["end"])
-        if o_end > o_start:
-            overlaps.append(
-                {
-                    "start": o_start,
-                    "end": o_end,
-                    "speaker_id": spk_seg["speaker_id"],
-                }
-            )
+    overlaps: List[Dict[str, Any]] = [
+        {
+            "start": o_start,
+            "end": o_end,
+            "speaker_id": spk_segments[i]["speaker_id"],
+        }
+        for i, o_start, o_end in index.overlapping(seg_start, seg_end)
+    ]
 
     # No overlap at all -> fallback: assign whole segment
     # to the diarization segment whose center is closest.
     if not overlaps:
-        mid = 0.5 * (seg_start + seg_end)
-        nearest = min(
-            spk_segments,
-            key=lambda s: abs(0.5 * (s["start"] + s["end"]) - mid),
-        )
+        nearest = index.nearest(seg_start, seg_end)
         new_seg = dict(seg)
         new_seg["speaker_id"] = nearest["speaker_id"]
         return [new_seg]
@@ -245,9 +375,10 @@ def assign_speakers_to_segments(
     60+ second "monologues" when speakers are actually alternating.
     """
     segments_with_speaker: List[Dict[str, Any]] = []
+    index = SpeakerTurnIndex(spk_segments)
 
     for seg in segments:
-        sub_segments = split_segment_by_speaker(seg, spk_segments)
+        sub_segments = split_segment_by_speaker(seg, spk_segments, index)
         segments_with_speaker.extend(sub_segments)
 
     # Ensure chronological order
@@ -255,96 +386,926 @@ def assign_speakers_to_segments(
     return segments_with_speaker
 
 
-# -------------------------
-# 4. Merge consecutive segments with same speaker into "turns"
-# -------------------------
-
-def merge_segments_by_speaker(
-    segments_with_speaker: List[Dict[str, Any]],
-    max_gap: float = 1.0,
+def assign_speakers_to_words(
+    segments: List[Dict[str, Any]],
+    spk_segments: List[Dict[str, Any]],
+    lookup: Optional[TurnPointLookup] = None,
+    index: Optional[SpeakerTurnIndex] = None,
 ) -> List[Dict[str, Any]]:
+    """Word-level alternative to assign_speakers_to_segments.
+
+    Needs segments from transcribe_segments(..., word_timestamps=True).
+    Every word gets the speaker active at its midpoint (one vectorized
+    lookup over all words), then consecutive words of the same speaker
+    inside a Whisper segment are rebuilt into sub-segments. Segments
+    without word timings fall back to split_segment_by_speaker.
+    Prebuilt `lookup` / `index` can be passed when called repeatedly.
     """
-    Merge consecutive Whisper segments that have the same speaker_id
-    and are not too far apart in time.
-    """
-    if not segments_with_speaker:
-        return []
+    words = [w for seg in segments for w in seg.get("words") or []]
+    if words:
+        mids = np.fromiter(
+            (0.5 * (w["start"] + w["end"]) for w in words), np.float64, len(words)
+        )
+        if lookup is None:
+            lookup = TurnPointLookup(spk_segments)
+        word_turns = lookup(mids)
+    else:
+        word_turns = np.empty(0, dtype=np.int64)
 
-    # segments should already be in chronological order
-    turns: List[Dict[str, Any]] = []
-    current: Optional[Dict[str, Any]] = None
+    segments_with_speaker: List[Dict[str, Any]] = []
+    cursor = 0
 
-    for seg in segments_with_speaker:
-        if current is None:
-            current = {
-                "speaker_id": seg["speaker_id"],
-                "start": seg["start"],
-                "end": seg["end"],
-                "text": seg["text"],
-            }
+    for seg in segments:
+        seg_words = seg.get("words") or []
+        if not seg_words:
+            if index is None:
+                index = SpeakerTurnIndex(spk_segments)
+            segments_with_speaker.extend(split_segment_by_speaker(seg, spk_segments, index))
             continue
 
-        same_speaker = (seg["speaker_id"] == current["speaker_id"])
-        small_gap = (seg["start"] - current["end"] <= max_gap)
+        current: Optional[Dict[str, Any]] = None
+        parts: List[str] = []
+        for w in seg_words:
+            speaker_id = spk_segments[word_turns[cursor]]["speaker_id"]
+            cursor += 1
 
-        if same_speaker and small_gap:
-            # extend current turn
-            current["end"] = seg["end"]
-            # add a space so texts don't glue together
-            current["text"] = current["text"].rstrip() + " " + seg["text"].lstrip()
-        else:
-            # close current turn and start a new one
-            turns.append(current)
+            if current is not None and current["speaker_id"] == speaker_id:
+                current["end"] = w["end"]
+                parts.append(w["word"])
+                continue
+
+            if current is not None:
+                current["text"] = "".join(parts).strip()
+                segments_with_speaker.append(current)
             current = {
-                "speaker_id": seg["speaker_id"],
-                "start": seg["start"],
-                "end": seg["end"],
-                "text": seg["text"],
+                "start": w["start"],
+                "end": w["end"],
+                "text": "",
+                "speaker_id": speaker_id,
             }
+            parts = [w["word"]]
 
-    if current is not None:
-        turns.append(current)
+        if current is not None:
+            current["text"] = "".join(parts).strip()
+            segments_with_speaker.append(current)
+
+    segments_with_speaker.sort(key=lambda s: s["start"])
+    return segments_with_speaker
+
+
+# -------------------------
+# 4. Merge consecutive segments with same speaker into "turns"
+#    (TurnBuilder / iter_turns are in turns.py)
+# -------------------------
+
+OUTPUT_MODES = ("segments", "turns", "both")
 
-    return turns
+
+class SpeakerOutput:
+    """
+    Collects the pipeline result in one pass over the speaker segments:
+    the segments themselves, the merged turns, or both. Segments that are
+    only needed for turns are not kept. Turn building (only that) is
+    added to timings["merge"] when a `timings` dict is passed.
+    With columnar=True rows go straight into SegmentTables (see
+    segment_store.py) instead of dict lists.
+    """
+
+    def __init__(
+        self,
+        output: str = "segments",
+        max_gap: float = 1.0,
+        timings: Optional[Dict[str, float]] = None,
+        columnar: bool = False,
+    ):
+        if output not in OUTPUT_MODES:
+            raise ValueError(f"output must be one of {OUTPUT_MODES}, got {output!r}")
+        new_rows = SegmentTableBuilder if columnar else list
+        self.segments = new_rows() if output != "turns" else None
+        self.turns = new_rows() if output != "segments" else None
+        self._builder = TurnBuilder(max_gap) if self.turns is not None else None
+        self._timings = timings if timings is not None else {}
+
+    def extend(self, segments: Iterable[Dict[str, Any]]) -> None:
+        merge_seconds = 0.0
+        for seg in segments:
+            if self.segments is not None:
+                self.segments.append(seg)
+            if self._builder is not None:
+                t0 = time.perf_counter()
+                turn = self._builder.add(seg)
+                merge_seconds += time.perf_counter() - t0
+                if turn is not None:
+                    self.turns.append(turn)
+        if self._builder is not None:
+            self._timings["merge"] = self._timings.get("merge", 0.0) + merge_seconds
+
+    def result(self) -> Dict[str, Any]:
+        result: Dict[str, Any] = {}
+        if self.segments is not None:
+            result["segments_with_speaker"] = self.segments
+        if self._builder is not None:
+            turn = _timed(self._timings, "merge", self._builder.finish)
+            if turn is not None:
+                self.turns.append(turn)
+            result["turns"] = self.turns
+        return {
+            k: rows.build() if isinstance(rows, SegmentTableBuilder) else rows
+            for k, rows in result.items()
+        }
 
 
 # -------------------------
 # 5. Main entry point
 # -------------------------
 
-def process_call(audio_path: str, language: str = "de") -> Dict[str, Any]:
+ALIGN_MODES = ("segments", "words")
+
+# Chunked mode for multi-hour recordings (see _run_pipeline_chunked)
+CHUNK_SECONDS = float(os.getenv("STT_CHUNK_SECONDS", "600"))
+CHUNK_OVERLAP_SECONDS = float(os.getenv("STT_CHUNK_OVERLAP_SECONDS", "30"))
+
+
+def pipeline_settings(
+    language: str,
+    align: str = "segments",
+    chunk_seconds: Optional[float] = None,
+    chunk_overlap: float = CHUNK_OVERLAP_SECONDS,
+    vad: str = "off",
+    output: str = "segments",
+) -> Dict[str, Any]:
+    """Every setting that changes the output; part of the transcript cache key."""
+    settings = {
+        "model_size": MODEL_SIZE,
+        "compute_type": COMPUTE_TYPE,
+        "language": language,
+        "beam_size": BEAM_SIZE,
+        "diarization_model": DIARIZATION_MODEL,
+        "align": align,
+    }
+    if chunk_seconds:
+        settings["chunk_seconds"] = chunk_seconds
+        settings["chunk_overlap"] = chunk_overlap
+    if vad != "off":
+        settings["vad"] = vad
+    if output != "segments":
+        settings["output"] = output
+    return settings
+
+
+def _timed(timings: Dict[str, float], stage: str, fn, *args, **kwargs):
+    """Call fn and add its duration to timings[stage] (summed over chunks)."""
+    t0 = time.perf_counter()
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        timings[stage] = timings.get(stage, 0.0) + time.perf_counter() - t0
+
+
+def _transcribe_and_diarize(
+    audio: np.ndarray,
+    language: str,
+    word_timestamps: bool,
+    parallel: bool,
+    timings: Dict[str, float],
+    diarize=diarize_audio,
+):
+    """Run both model stages on one decoded buffer; returns (stt_result, diarization)."""
+    if parallel:
+        # make sure both models exist before the threads race to load them
+        get_whisper_model()
+        get_diarization_pipeline()
+
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            stt_future = pool.submit(
+                _timed, timings, "transcribe", transcribe_segments,
+                audio, language, word_timestamps,
+            )
+            spk_future = pool.submit(_timed, timings, "diarize", diarize, audio)
+            return stt_future.result(), spk_future.result()
+
     #print("=== Transcribing with faster-whisper ===")
-    stt_result = transcribe_segments(audio_path, language=language)
+    stt_result = _timed(
+        timings, "transcribe", transcribe_segments,
+        audio, language, word_timestamps,
+    )
 
     #print("\n=== Running diarization with pyannote ===")
-    spk_segments = diarize_audio(audio_path)
+    diarization = _timed(timings, "diarize", diarize, audio)
+    return stt_result, diarization
+
+
+def _run_pipeline(
+    audio_path: str,
+    language: str,
+    parallel: bool = PARALLEL_STAGES,
+    align: str = "segments",
+    timings: Optional[Dict[str, float]] = None,
+    vad: str = "off",
+    output: str = "segments",
+    columnar: bool = False,
+) -> Dict[str, Any]:
+    if timings is None:
+        timings = {}
+    word_timestamps = align == "words"
+    collected = SpeakerOutput(output, timings=timings, columnar=columnar)
+
+    audio = _timed(timings, "decode", load_audio, audio_path)
+
+    speech: Optional[SpeechMap] = None
+    if vad != "off":
+        speech = _timed(timings, "vad", detect_speech, audio, vad)
+        audio = speech.compact(audio)
+        if not speech.spans:
+            return dict(collected.result(), vad=speech.report())
+
+    stt_result, spk_segments = _transcribe_and_diarize(
+        audio, language, word_timestamps, parallel, timings,
+    )
 
     #print("\n=== Assigning speakers to Whisper segments ===")
-    segments_with_speaker = assign_speakers_to_segments(stt_result["segments"], spk_segments)
+    assign = assign_speakers_to_words if word_timestamps else assign_speakers_to_segments
+    segments_with_speaker = _timed(
+        timings, "assign", assign, stt_result["segments"], spk_segments,
+    )
+    if speech is not None:
+        # both stages saw the same compacted audio, so assignment above is
+        # consistent; only the final times move back to the recording
+        segments_with_speaker = (speech.map_segment(seg) for seg in segments_with_speaker)
 
     #print("\n=== Building speaker turns ===")
-    turns = merge_segments_by_speaker(segments_with_speaker)
+    collected.extend(segments_with_speaker)
+
+    result = collected.result()
+    if speech is not None:
+        result["vad"] = speech.report()
+    return result
+
+
+def _shift_segment(seg: Dict[str, Any], offset: float) -> Dict[str, Any]:
+    shifted = dict(seg, start=seg["start"] + offset, end=seg["end"] + offset)
+    if "words" in seg:
+        shifted["words"] = [
+            dict(w, start=w["start"] + offset, end=w["end"] + offset)
+            for w in seg["words"]
+        ]
+    return shifted
+
+
+def _run_pipeline_chunked(
+    audio_path: str,
+    language: str,
+    parallel: bool = PARALLEL_STAGES,
+    align: str = "segments",
+    timings: Optional[Dict[str, float]] = None,
+    chunk_seconds: float = CHUNK_SECONDS,
+    chunk_overlap: float = CHUNK_OVERLAP_SECONDS,
+    vad: str = "off",
+    output: str = "segments",
+    columnar: bool = False,
+) -> Dict[str, Any]:
+    """
+    Bounded-memory variant of _run_pipeline for very long recordings.
+
+    The file is stream-decoded to a temporary 16 kHz WAV and then processed
+    in overlapping windows of `chunk_seconds`; only one window of audio is
+    in memory at a time. Speaker labels are stitched across windows with
+    SpeakerStitcher, and each instant of the call is taken from exactly
+    one window (the overlap is split in the middle). With `vad` the
+    pre-pass runs per window. With output="turns" the segments are folded
+    into turns window by window and not kept.
+    """
+    if timings is None:
+        timings = {}
+    word_timestamps = align == "words"
+    assign = assign_speakers_to_words if word_timestamps else assign_speakers_to_segments
+
+    collected = SpeakerOutput(output, timings=timings, columnar=columnar)
+    stitcher = SpeakerStitcher()
+    last_end = float("-inf")
+    # each window's own share of the timeline, so overlaps aren't counted twice
+    total_seconds = 0.0
+    speech_seconds = 0.0
+
+    with tempfile.TemporaryDirectory(prefix="stt_chunks_") as tmp_dir:
+        wav_path = os.path.join(tmp_dir, "audio.wav")
+        _timed(timings, "decode", decode_to_wav, audio_path, wav_path, SAMPLE_RATE)
+
+        for window in iter_windows(wav_path, chunk_seconds, chunk_overlap):
+            samples = window.samples
+            speech: Optional[SpeechMap] = None
+            if vad != "off":
+                speech = _timed(timings, "vad", detect_speech, samples, vad)
+                # the last window keeps everything up to keep_end=inf
+                keep_end = min(window.keep_end, window.end)
+                total_seconds += keep_end - window.keep_start
+                speech_seconds += speech.speech_seconds_between(
+                    window.keep_start - window.start, keep_end - window.start,
+                )
+                if not speech.spans:
+                    continue
+                samples = speech.compact(samples)
+
+            stt_result, (local_turns, embeddings) = _transcribe_and_diarize(
+                samples, language, word_timestamps, parallel, timings,
+                diarize=diarize_audio_with_embeddings,
+            )
+            if speech is not None:
+                stt_result["segments"] = [speech.map_segment(seg) for seg in stt_result["segments"]]
+                local_turns = [piece for t in local_turns for piece in speech.map_turn(t)]
+
+            turns = stitcher.relabel(
+                [_shift_segment(t, window.start) for t in local_turns],
+                window.start,
+                window.end,
+                embeddings,
+            )
+
+            # keep segments that start in this window's share of the timeline
+            # and do not repeat speech the previous window already covered
+            kept: List[Dict[str, Any]] = []
+            for seg in stt_result["segments"]:
+                seg = _shift_segment(seg, window.start)
+                if window.keep_start <= seg["start"] < window.keep_end \
+                        and seg["start"] >= last_end - 0.25:
+                    kept.append(seg)
+            if kept:
+                last_end = max(last_end, kept[-1]["end"])
+
+            if kept and turns:
+                assigned = _timed(timings, "assign", assign, kept, turns)
+            else:
+                # no speech turns found in this window: keep the text anyway
+                assigned = [dict(seg, speaker_id=None) for seg in kept]
+            for seg in assigned:
+                seg.pop("words", None)
+            collected.extend(assigned)
+
+    result = collected.result()
+    if vad != "off":
+        result["vad"] = {
+            "audio_seconds": round(total_seconds, 2),
+            "speech_seconds": round(speech_seconds, 2),
+            "skipped_percent": round(
+                100.0 * (1.0 - speech_seconds / total_seconds) if total_seconds else 0.0, 1,
+            ),
+        }
+    return result
+
+
+def process_call(
+    audio_path: str,
+    language: str = "de",
+    use_cache: bool = True,
+    parallel: bool = PARALLEL_STAGES,
+    align: str = "segments",
+    timings: Optional[Dict[str, float]] = None,
+    chunk_seconds: Optional[float] = None,
+    chunk_overlap: float = CHUNK_OVERLAP_SECONDS,
+    vad: str = VAD_MODE,
+    output: str = "segments",
+    columnar: bool = False,
+) -> Dict[str, Any]:
+    """
+    Run the full pipeline, reusing a cached result when the exact same
+    audio was already processed with the same settings.
+
+    With parallel=True transcription and diarization run concurrently,
+    so wall-clock time approaches max(STT, diarization).
+    align="words" assigns speakers per word (see assign_speakers_to_words)
+    instead of splitting segments proportionally.
+    chunk_seconds switches to the bounded-memory chunked mode for long
+    recordings (see _run_pipeline_chunked).
+    vad="energy"/"silero" cuts non-speech before both models run; the
+    result then has a "vad" entry with the share of audio skipped.
+    output="turns"/"both" returns speaker turns (consecutive segments of
+    one speaker merged) instead of / next to "segments_with_speaker".
+    columnar=True returns those as SegmentTables instead of dict lists
+    (write them with segment_store.dump_json / encode_result).
+    If a `timings` dict is passed, per-stage durations in seconds are
+    written into it (empty on a cache hit).
+    """
+    if align not in ALIGN_MODES:
+        raise ValueError(f"align must be one of {ALIGN_MODES}, got {align!r}")
+    if vad not in VAD_MODES:
+        raise ValueError(f"vad must be one of {VAD_MODES}, got {vad!r}")
+    if output not in OUTPUT_MODES:
+        raise ValueError(f"output must be one of {OUTPUT_MODES}, got {output!r}")
+
+    def _run() -> Dict[str, Any]:
+        if chunk_seconds:
+            return _run_pipeline_chunked(
+                audio_path, language, parallel, align, timings,
+                chunk_seconds, chunk_overlap, vad, output, columnar,
+            )
+        return _run_pipeline(
+            audio_path, language, parallel, align, timings, vad, output, columnar,
+        )
+
+    if not use_cache:
+        return _run()
+
+    cache = TranscriptCache()
+    key = make_cache_key(
+        hash_audio_file(audio_path),
+        pipeline_settings(language, align, chunk_seconds, chunk_overlap, vad, output),
+    )
+
+    cached = cache.get(key)
+    if cached is not None:
+        if columnar:
+            return {
+                k: SegmentTable.from_segments(v, **ROW_KEYS[k]) if k in ROW_KEYS else v
+                for k, v in cached.items()
+            }
+        return cached
+
+    result = _run()
+    cache.put(key, result)
+    return result
+
+
+# -------------------------
+# 6. Streaming mode (one segment at a time)
+# -------------------------
+
+def stream_call(
+    audio_path: str,
+    language: str = "de",
+    align: str = "segments",
+    vad: str = VAD_MODE,
+    provisional: bool = False,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Yield speaker segments while the call is still being processed.
+
+    Diarization runs in a background thread over the whole decoded
+    recording (pyannote needs all of it, so the audio buffer is held
+    for the duration of the call) while Whisper produces segments. Once
+    the speaker turns are known, every Whisper segment is assigned and
+    yielded immediately. Segments finished before that are held back
+    (their text only) and released together when diarization is done;
+    on CPU diarization is usually the slower stage, so that backlog can
+    be most of the call.
+
+    With provisional=True nothing is held back: every item carries the
+    index of its Whisper segment ("segment"), segments finished before
+    diarization are yielded at once with speaker_id None, and when the
+    speakers are known their assigned pieces follow with "update": true
+    and replace all earlier items with the same "segment" index.
+    """
+    if align not in ALIGN_MODES:
+        raise ValueError(f"align must be one of {ALIGN_MODES}, got {align!r}")
+    if vad not in VAD_MODES:
+        raise ValueError(f"vad must be one of {VAD_MODES}, got {vad!r}")
+    word_timestamps = align == "words"
+
+    audio = load_audio(audio_path)
+    speech: Optional[SpeechMap] = None
+    if vad != "off":
+        speech = detect_speech(audio, vad)
+        audio = speech.compact(audio)
+        if not speech.spans:
+            return
+    get_whisper_model()
+    get_diarization_pipeline()
+
+    # no `with`: leaving it would wait for diarization when the consumer
+    # closes the generator early; the running job finishes on its own
+    pool = ThreadPoolExecutor(max_workers=1)
+    try:
+        spk_future = pool.submit(diarize_audio, audio)
+        segments, _ = iter_transcribed_segments(audio, language, word_timestamps)
+
+        pending: List[Tuple[int, Dict[str, Any]]] = []
+        assign = None
+
+        def _assigner(spk_segments: List[Dict[str, Any]]):
+            index = SpeakerTurnIndex(spk_segments)
+            lookup = TurnPointLookup(spk_segments) if word_timestamps else None
+
+            def assign_one(seg: Dict[str, Any]) -> List[Dict[str, Any]]:
+                if word_timestamps:
+                    out = assign_speakers_to_words([seg], spk_segments, lookup, index)
+                else:
+                    out = split_segment_by_speaker(seg, spk_segments, index)
+                if speech is not None:
+                    out = [speech.map_segment(piece) for piece in out]
+                return out
+
+            return assign_one
+
+        def _tagged(pieces: List[Dict[str, Any]], i: int, update: bool = False):
+            if not provisional:
+                return pieces
+            tag = {"segment": i, "update": True} if update else {"segment": i}
+            return [dict(piece, **tag) for piece in pieces]
+
+        for i, seg in enumerate(segments):
+            if assign is None and spk_future.done():
+                assign = _assigner(spk_future.result())
+
+            if assign is None:
+                pending.append((i, seg))
+                if provisional:
+                    draft = speech.map_segment(seg) if speech is not None else dict(seg)
+                    draft.pop("words", None)
+                    yield dict(draft, speaker_id=None, segment=i)
+                continue
+
+            for j, held in pending:
+                yield from _tagged(assign(held), j, update=provisional)
+            pending = []
+            yield from _tagged(assign(seg), i)
+
+        if assign is None:
+            assign = _assigner(spk_future.result())
+        for j, held in pending:
+            yield from _tagged(assign(held), j, update=provisional)
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+# -------------------------
+# 7. Worker mode (models stay loaded between calls)
+# -------------------------
+
+def serve(stdin=sys.stdin, stdout=sys.stdout) -> None:
+    """
+    Long-lived worker: load both models once, then answer one JSON request
+    per line on stdin with one JSON response per line on stdout.
+
+    Request:  {"id": "1", "audio_path": "/abs/path.mp3", "language": "de"}
+              (add "output": "turns" / "both" for merged speaker turns,
+              or "consensus": 3 for a fused n-best transcript instead,
+              see consensus_call)
+    Response: {"id": "1", "result": {...}}  or  {"id": "1", "error": "..."}
+
+    Results are kept columnar and their rows written out one by one (see
+    segment_store.dump_json). The protocol stays JSON lines; binary
+    formats are only offered by the one-shot CLI.
+
+    A single {"ready": true} line is written once the models are loaded.
+    """
+    get_whisper_model()
+    get_diarization_pipeline()
+
+    stdout.write(json.dumps({"ready": True}) + "\n")
+    stdout.flush()
+
+    for line in stdin:
+        line = line.strip()
+        if not line:
+            continue
+
+        request_id = None
+        try:
+            request = json.loads(line)
+            request_id = request.get("id")
+            if request.get("consensus"):
+                result = consensus_call(
+                    request["audio_path"],
+                    language=request.get("language", "de"),
+                    num_beams=int(request["consensus"]),
+                    temperatures=tuple(request.get("temperatures", ())),
+                    use_cache=request.get("use_cache", True),
+                )
+            else:
+                result = process_call(
+                    request["audio_path"],
+                    language=request.get("language", "de"),
+                    use_cache=request.get("use_cache", True),
+                    align=request.get("align", "segments"),
+                    chunk_seconds=request.get("chunk_seconds"),
+                    vad=request.get("vad", VAD_MODE),
+                    output=request.get("output", "segments"),
+                    columnar=True,
+                )
+            response = {"id": request_id, "result": result}
+        except Exception as e:  # keep the worker alive on bad input
+            response = {"id": request_id, "error": f"{type(e).__name__}: {e}"}
+
+        dump_json(response, stdout)
+        stdout.write("\n")
+        stdout.flush()
+
+
+# -------------------------
+# 8. Consensus transcript (n-best + ROVER, one model, one encoder pass)
+# -------------------------
+
+WHISPER_WINDOW_SECONDS = 30.0   # Whisper's fixed input length
+_MAX_DECODE_TOKENS = 448
+
+
+def _consensus_windows(audio: np.ndarray) -> List[Tuple[int, int]]:
+    """
+    Cut the call into <= 30 s windows at pauses (energy VAD), so a window
+    boundary never splits a word and silence is not decoded at all. Speech
+    runs longer than one window are cut hard.
+    """
+    max_len = int(WHISPER_WINDOW_SECONDS * SAMPLE_RATE)
+    windows: List[Tuple[int, int]] = []
+    current: Optional[List[int]] = None
+
+    for start, end in energy_speech_spans(audio, SAMPLE_RATE):
+        while end - start > max_len:
+            if current is not None:
+                windows.append((current[0], current[1]))
+                current = None
+            windows.append((start, start + max_len))
+            start += max_len
+        if current is not None and end - current[0] <= max_len:
+            current[1] = end
+            continue
+        if current is not None:
+            windows.append((current[0], current[1]))
+        current = [start, end]
+
+    if current is not None:
+        windows.append((current[0], current[1]))
+    return windows
+
+
+def decode_hypotheses(
+    samples: np.ndarray,
+    language: str,
+    num_beams: int = 3,
+    temperatures: Tuple[float, ...] = (),
+) -> List[str]:
+    """
+    Alternative transcripts of one <= 30 s window, best first.
+
+    The window is encoded once; the `num_beams` best beam-search results
+    and one sampled decode per temperature all reuse that encoder output,
+    so the extra hypotheses only cost decoder steps.
+    """
+    from faster_whisper.audio import pad_or_trim
+    from faster_whisper.tokenizer import Tokenizer
+
+    model = get_whisper_model()
+    tokenizer = Tokenizer(
+        model.hf_tokenizer,
+        model.model.is_multilingual,
+        task="transcribe",
+        language=language,
+    )
+    prompt = model.get_prompt(tokenizer, [], without_timestamps=True)
+    encoder_output = model.encode(pad_or_trim(model.feature_extractor(samples)))
+
+    def _texts(results) -> List[str]:
+        return [
+            tokenizer.decode([t for t in ids if t < tokenizer.eot]).strip()
+            for ids in results[0].sequences_ids
+        ]
+
+    hypotheses = _texts(model.model.generate(
+        encoder_output,
+        [prompt],
+        beam_size=max(BEAM_SIZE, num_beams),
+        num_hypotheses=num_beams,
+        max_length=_MAX_DECODE_TOKENS,
+        suppress_blank=True,
+    ))
+    for temperature in temperatures:
+        hypotheses += _texts(model.model.generate(
+            encoder_output,
+            [prompt],
+            beam_size=1,
+            sampling_topk=0,            # sample from the full distribution
+            sampling_temperature=temperature,
+            max_length=_MAX_DECODE_TOKENS,
+            suppress_blank=True,
+        ))
+    return hypotheses
+
+
+def consensus_transcript(
+    audio: np.ndarray,
+    language: str = "de",
+    num_beams: int = 3,
+    temperatures: Tuple[float, ...] = (),
+) -> Dict[str, Any]:
+    """
+    One transcript fused from several hypotheses per window (see rover.py),
+    with the share of agreeing hypotheses as per-word confidence. Replaces
+    transcribing the same call several times and merging with an LLM.
+    """
+    segments: List[Dict[str, Any]] = []
+    confidences: List[float] = []
+
+    for start, end in _consensus_windows(audio):
+        hypotheses = decode_hypotheses(audio[start:end], language, num_beams, temperatures)
+        words = fuse([h.split() for h in hypotheses])
+        if not words:
+            continue
+        confidences.extend(w["confidence"] for w in words)
+        segments.append({
+            "start": start / SAMPLE_RATE,
+            "end": end / SAMPLE_RATE,
+            "text": " ".join(w["word"] for w in words),
+            "words": words,
+            "hypotheses": len(hypotheses),
+        })
+
+    return {
+        "text": " ".join(seg["text"] for seg in segments),
+        "mean_confidence": round(sum(confidences) / len(confidences), 3) if confidences else None,
+        "segments": segments,
+    }
+
+
+def consensus_call(
+    audio_path: str,
+    language: str = "de",
+    num_beams: int = 3,
+    temperatures: Tuple[float, ...] = (),
+    use_cache: bool = True,
+) -> Dict[str, Any]:
+    """consensus_transcript for a file, cached like process_call."""
+    def _run() -> Dict[str, Any]:
+        return {"consensus": consensus_transcript(
+            load_audio(audio_path), language, num_beams, tuple(temperatures),
+        )}
+
+    if not use_cache:
+        return _run()
+
+    cache = TranscriptCache()
+    settings = pipeline_settings(language)
+    settings.pop("diarization_model")
+    settings.pop("align")
+    settings.update(consensus_beams=num_beams, consensus_temperatures=list(temperatures))
+    key = make_cache_key(hash_audio_file(audio_path), settings)
+
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
 
-    return {"segments_with_speaker": segments_with_speaker}
-    # or, if you ever want turns instead:
-    # return {"turns": turns}
+    result = _run()
+    cache.put(key, result)
+    return result
 
 
 if __name__ == "__main__":
-    import sys
-    import json
+    import argparse
 
-    if len(sys.argv) < 2:
-        print("Usage: python stt_with_diarization_old.py AUDIO_FILE", file=sys.stderr)
+    parser = argparse.ArgumentParser(
+        description="Transcribe a call with faster-whisper and attach pyannote speakers.",
+    )
+    parser.add_argument("audio_file", nargs="?", help="path to the audio file")
+    parser.add_argument("--language", default="de")
+    parser.add_argument(
+        "--serve",
+        action="store_true",
+        help="run as a long-lived worker reading JSON requests from stdin",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="always re-run the pipeline instead of using the transcript cache",
+    )
+    parser.add_argument(
+        "--sequential",
+        action="store_true",
+        help="run transcription and diarization one after another",
+    )
+    parser.add_argument(
+        "--align",
+        choices=ALIGN_MODES,
+        default="segments",
+        help="assign speakers per Whisper segment or per word",
+    )
+    parser.add_argument(
+        "--chunk-seconds",
+        type=float,
+        default=None,
+        help=f"process long recordings in windows of this length "
+             f"(bounded memory; e.g. {CHUNK_SECONDS:.0f})",
+    )
+    parser.add_argument(
+        "--chunk-overlap",
+        type=float,
+        default=CHUNK_OVERLAP_SECONDS,
+        help="overlap between neighbouring windows in seconds",
+    )
+    parser.add_argument(
+        "--vad",
+        choices=VAD_MODES,
+        default=VAD_MODE,
+        help="cut silence / ringing / hold music before transcription",
+    )
+    parser.add_argument(
+        "--consensus",
+        type=int,
+        default=0,
+        metavar="N",
+        help="output one transcript fused from the N best beam hypotheses "
+             "(no speakers; see consensus_call)",
+    )
+    parser.add_argument(
+        "--consensus-temperatures",
+        type=float,
+        nargs="*",
+        default=[],
+        help="add one sampled hypothesis per temperature to the consensus",
+    )
+    parser.add_argument(
+        "--output",
+        choices=OUTPUT_MODES,
+        default="segments",
+        help="speaker segments, merged speaker turns, or both "
+             "(with --stream: segments or turns)",
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="write each speaker segment as one JSON line as soon as it is ready",
+    )
+    parser.add_argument(
+        "--provisional",
+        action="store_true",
+        help="with --stream: write segments at once without speaker and send "
+             "speaker updates later (see stream_call)",
+    )
+    parser.add_argument(
+        "--format",
+        choices=OUTPUT_FORMATS,
+        default="json",
+        help="stdout format of the result: JSON, or columnar msgpack / Arrow IPC "
+             "(see segment_store.py)",
+    )
+    parser.add_argument(
+        "--timings",
+        action="store_true",
+        help="print per-stage durations as JSON to stderr",
+    )
+    args = parser.parse_args()
+
+    if args.serve:
+        serve()
+        sys.exit(0)
+
+    if not args.audio_file:
+        parser.print_usage(sys.stderr)
         sys.exit(1)
 
-    audio_file = sys.argv[1]
+    if args.consensus:
+        result = consensus_call(
+            args.audio_file,
+            language=args.language,
+            num_beams=args.consensus,
+            temperatures=tuple(args.consensus_temperatures),
+            use_cache=not args.no_cache,
+        )
+        json.dump(result, sys.stdout, ensure_ascii=False)
+        sys.stdout.write("\n")
+        sys.exit(0)
+
+    if args.stream:
+        if args.output == "both":
+            parser.error("--stream writes either segments or turns, not both")
+        if args.provisional and args.output == "turns":
+            parser.error("--provisional streams segments, not turns")
+        # NDJSON: one segment (or finished turn) per line, flushed immediately
+        items = stream_call(
+            args.audio_file, language=args.language, align=args.align, vad=args.vad,
+            provisional=args.provisional,
+        )
+        if args.output == "turns":
+            items = iter_turns(items)
+        for item in items:
+            sys.stdout.write(json.dumps(item, ensure_ascii=False) + "\n")
+            sys.stdout.flush()
+        sys.exit(0)
 
     # Run the full pipeline
-    result = process_call(audio_file, language="de")
+    timings: Dict[str, float] = {}
+    result = process_call(
+        args.audio_file,
+        language=args.language,
+        use_cache=not args.no_cache,
+        parallel=PARALLEL_STAGES and not args.sequential,
+        align=args.align,
+        timings=timings,
+        chunk_seconds=args.chunk_seconds,
+        chunk_overlap=args.chunk_overlap,
+        vad=args.vad,
+        output=args.output,
+        columnar=True,
+    )
+
+    if args.timings:
+        # stderr only: stdout must stay a single JSON object
+        print(json.dumps({"align": args.align, "timings": timings}), file=sys.stderr)
+
+    if args.format != "json":
+        sys.stdout.buffer.write(encode_result(result, args.format))
+        sys.stdout.flush()
+        sys.exit(0)
 
     # IMPORTANT:
     #  - Print exactly ONE JSON object to stdout
     #  - No other prints to stdout, so Node can parse it
-    json.dump(result, sys.stdout, ensure_ascii=False)
-    sys.stdout.write("\n")
\ No newline at end of file
+    dump_json(result, sys.stdout)
+    sys.stdout.write("\n")
@@ -10,6 +10,8 @@ from faster_whisper import WhisperModel
 from pyannote.audio import Pipeline
 import torchaudio
 
+from speaker_index import SpeakerTurnIndex
+
 # -------------------------
 # 1. Setup faster-whisper
 # -------------------------
@@ -119,6 +121,7 @@ def assign_speakers_to_segments(
     based on maximum time overlap with diarization segments.
     """
     segments_with_speaker: List[Dict[str, Any]] = []
+    index = SpeakerTurnIndex(spk_segments)
 
     for seg in segments:
         seg_start = seg["start"]
@@ -127,24 +130,16 @@ def assign_speakers_to_segments(
         # accumulate overlap duration per speaker
         overlap_by_speaker: Dict[str, float] = {}
 
-        for spk_seg in spk_segments:
-            ov = _overlap(seg_start, seg_end, spk_seg["start"], spk_seg["end"])
-            if ov <= 0:
-                continue
-            spk_id = spk_seg["speaker_id"]
-            overlap_by_speaker[spk_id] = overlap_by_speaker.get(spk_id, 0.0) + ov
+        for i, o_start, o_end in index.overlapping(seg_start, seg_end):
+            spk_id = spk_segments[i]["speaker_id"]
+            overlap_by_speaker[spk_id] = overlap_by_speaker.get(spk_id, 0.0) + (o_end - o_start)
 
         if overlap_by_speaker:
             # choose speaker with max overlap
             best_speaker = max(overlap_by_speaker.items(), key=lambda kv: kv[1])[0]
         else:
             # fallback: choose nearest diarization segment by center time
-            mid = 0.5 * (seg_start + seg_end)
-            nearest = min(
-                spk_segments,
-                key=lambda s: abs(0.5 * (s["start"] + s["end"]) - mid),
-            )
-            best_speaker = nearest["speaker_id"]
+            best_speaker = index.nearest(seg_start, seg_end)["speaker_id"]
 
         new_seg = {
             "start": seg_start,
@@ -0,0 +1,146 @@
+# file: transcript_cache.py
+#
+# Content-addressed on-disk cache for finished transcripts.
+# The key is a hash of the audio bytes plus every setting that changes the
+# output (model size, compute type, language, beam size, ...), so identical
+# audio is never transcribed or diarized twice.
+#
+# Same storage scheme as python_method/disk_cache.py (atomic writes, mtime
+# LRU, size limit), kept separate so this directory runs on its own; results
+# may hold SegmentTables and are written with segment_store.dump_json.
+
+import os
+import json
+import hashlib
+import tempfile
+import threading
+from pathlib import Path
+from typing import Dict, Any, Optional
+
+from segment_store import dump_json
+
+
+CACHE_DIR = Path(
+    os.getenv("STT_CACHE_DIR", str(Path.home() / ".cache" / "apobank-stt"))
+)
+CACHE_MAX_BYTES = int(os.getenv("STT_CACHE_MAX_BYTES", str(2 * 1024 ** 3)))  # 2 GB
+
+_HASH_CHUNK = 1024 * 1024
+
+
+def hash_audio_file(audio_path: str) -> str:
+    """sha256 of the raw audio bytes, read in chunks so big files stay cheap."""
+    digest = hashlib.sha256()
+    with open(audio_path, "rb") as f:
+        for chunk in iter(lambda: f.read(_HASH_CHUNK), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def make_cache_key(audio_hash: str, settings: Dict[str, Any]) -> str:
+    """Combine the audio hash with the (JSON-serialisable) model settings."""
+    payload = json.dumps(
+        {"audio": audio_hash, "settings": settings},
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class TranscriptCache:
+    """
+    One JSON file per entry. Recency is tracked through the file mtime
+    (bumped on every hit), and the oldest entries are deleted whenever the
+    directory grows beyond max_bytes. A running size estimate (updated
+    under a lock, so puts from several threads are fine) saves listing the
+    directory on every put.
+    """
+
+    def __init__(self, directory: Path = CACHE_DIR, max_bytes: int = CACHE_MAX_BYTES):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._approx_bytes: Optional[int] = None
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.json"
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        path = self._path(key)
+        try:
+            with path.open(encoding="utf-8") as f:
+                value = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+        try:
+            os.utime(path)  # mark as recently used
+        except OSError:
+            pass
+        return value
+
+    def put(self, key: str, value: Dict[str, Any]) -> None:
+        # write to a temp file first so concurrent readers never see half a file
+        fd, tmp_name = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                dump_json(value, f)
+            size = os.path.getsize(tmp_name)
+        except BaseException:
+            try:
+                os.unlink(tmp_name)
+            except OSError:
+                pass
+            raise
+
+        path = self._path(key)
+        with self._lock:
+            # an overwritten entry's old size leaves the estimate with it
+            try:
+                replaced = path.stat().st_size
+            except FileNotFoundError:
+                replaced = 0
+            try:
+                os.replace(tmp_name, path)
+            except BaseException:
+                try:
+                    os.unlink(tmp_name)
+                except OSError:
+                    pass
+                raise
+
+            if self._approx_bytes is None:
+                self._evict()
+            else:
+                self._approx_bytes += size - replaced
+                if self._approx_bytes > self.max_bytes:
+                    self._evict()
+
+    def _evict(self) -> None:
+        """Recount the directory and drop LRU entries; caller holds self._lock."""
+        entries = []
+        total = 0
+        for path in self.directory.glob("*.json"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+
+        self._approx_bytes = total
+        if total <= self.max_bytes:
+            return
+
+        # least recently used first
+        entries.sort(key=lambda e: e[0])
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                path.unlink()
+                total -= size
+            except FileNotFoundError:
+                pass
+        self._approx_bytes = total
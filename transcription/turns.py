@@ -0,0 +1,84 @@
+# file: turns.py
+#
+# Speaker turns: consecutive segments of the same speaker, not too far
+# apart in time, merged into one. Built incrementally so turns can be
+# emitted while segments are still coming in (streaming and chunked modes).
+#
+#   for turn in iter_turns(segments_with_speaker): ...
+#   turns = merge_segments_by_speaker(segments_with_speaker)
+
+from typing import Dict, Any, Iterable, Iterator, List, Optional
+
+
+class TurnBuilder:
+    """
+    Incremental speaker turns: feed segments in chronological order with
+    add(), which returns the turn it closed (if any); finish() returns the
+    last one. Texts are collected as pieces and joined once per turn, so
+    a long monologue costs linear time.
+    """
+
+    def __init__(self, max_gap: float = 1.0):
+        self.max_gap = max_gap
+        self._current: Optional[Dict[str, Any]] = None
+        self._pieces: List[str] = []
+
+    def _close(self) -> Optional[Dict[str, Any]]:
+        turn = self._current
+        if turn is not None:
+            turn["text"] = " ".join(self._pieces)
+        self._current = None
+        self._pieces = []
+        return turn
+
+    def add(self, seg: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        current = self._current
+        if current is not None \
+                and seg["speaker_id"] == current["speaker_id"] \
+                and seg["start"] - current["end"] <= self.max_gap:
+            # extend current turn; strip at the seam so texts are joined by
+            # exactly one space (a blank piece vanishes with its separator)
+            current["end"] = seg["end"]
+            while len(self._pieces) > 1 and not self._pieces[-1].rstrip():
+                self._pieces.pop()
+            self._pieces[-1] = self._pieces[-1].rstrip()
+            self._pieces.append(seg["text"].lstrip())
+            return None
+
+        closed = self._close()
+        self._current = {
+            "speaker_id": seg["speaker_id"],
+            "start": seg["start"],
+            "end": seg["end"],
+        }
+        self._pieces = [seg["text"]]
+        return closed
+
+    def finish(self) -> Optional[Dict[str, Any]]:
+        return self._close()
+
+
+def iter_turns(
+    segments_with_speaker: Iterable[Dict[str, Any]],
+    max_gap: float = 1.0,
+) -> Iterator[Dict[str, Any]]:
+    """Yield each turn as soon as the segment after it shows it is over."""
+    builder = TurnBuilder(max_gap)
+    for seg in segments_with_speaker:
+        turn = builder.add(seg)
+        if turn is not None:
+            yield turn
+    turn = builder.finish()
+    if turn is not None:
+        yield turn
+
+
+def merge_segments_by_speaker(
+    segments_with_speaker: Iterable[Dict[str, Any]],
+    max_gap: float = 1.0,
+) -> List[Dict[str, Any]]:
+    """
+    Merge consecutive Whisper segments that have the same speaker_id
+    and are not too far apart in time.
+    """
+    return list(iter_turns(segments_with_speaker, max_gap))